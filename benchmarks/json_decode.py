@@ -0,0 +1,80 @@
+# -*- coding:utf-8 -*-
+
+"""
+websocket深度推送的解码速度
+
+对比原来okex websocket中的eval()、标准库json与purequant.codec可用的各个解码库，输出每秒解码的帧数。
+默认使用合成的okex深度推送（400档全量与增量，与实际推送格式相同），
+也可以传入录制的推送文件，每行一帧解压后的JSON：
+    python benchmarks/json_decode.py [录制文件路径]
+"""
+
+import os
+import sys
+import json
+import time
+import zlib
+import random
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # 在仓库中直接运行时也能导入purequant
+from purequant import codec
+
+
+def inflate(data):
+    """与purequant.exchange.okex.websocket.inflate()相同，这里不导入该模块以免需要安装推送等依赖"""
+    decompress = zlib.decompressobj(-zlib.MAX_WBITS)
+    return decompress.decompress(data) + decompress.flush()
+
+
+def synthetic_frames(count=2000):
+    """合成okex深度推送，第一帧为400档全量，其后为增量，返回deflate压缩后的bytes列表"""
+    frames = []
+    price = 9000.0
+    for i in range(count):
+        levels = 400 if i == 0 else random.randint(1, 40)
+        bids = [["%.2f" % (price - 0.01 * k), str(random.randint(0, 500)), "0", str(random.randint(1, 9))] for k in range(levels)]
+        asks = [["%.2f" % (price + 0.01 * (k + 1)), str(random.randint(0, 500)), "0", str(random.randint(1, 9))] for k in range(levels)]
+        data = {
+            "table": "futures/depth_l2_tbt",
+            "action": "partial" if i == 0 else "update",
+            "data": [{"instrument_id": "BTC-USD-201225", "asks": asks, "bids": bids,
+                      "timestamp": "2020-07-25T03:05:00.%03dZ" % (i % 1000), "checksum": random.randint(-2 ** 31, 2 ** 31)}]
+        }
+        compress = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+        frames.append(compress.compress(json.dumps(data).encode()) + compress.flush())
+    return frames
+
+
+def recorded_frames(path):
+    """读取录制的推送，压缩成与okex相同的格式"""
+    frames = []
+    with open(path, "rb") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                compress = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+                frames.append(compress.compress(line) + compress.flush())
+    return frames
+
+
+def run(name, decode, frames, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for frame in frames:
+            decode(inflate(frame).decode('utf-8'))
+        best = min(best, time.perf_counter() - start)
+    print("{:<16}{:>12.0f} 帧/秒".format(name, len(frames) / best))
+
+
+if __name__ == "__main__":
+    frames = recorded_frames(sys.argv[1]) if len(sys.argv) > 1 else synthetic_frames()
+    print("帧数：{}，解压后平均{:.0f}字节".format(len(frames), sum(len(inflate(x)) for x in frames) / len(frames)))
+    run("eval（原来）", eval, frames)
+    run("json", json.loads, frames)
+    for decoder in ("ujson", "orjson"):
+        try:
+            codec.set_decoder(decoder)
+        except ImportError:
+            print("{:<16}{:>12}".format(decoder, "未安装"))
+            continue
+        run(decoder, codec.loads, frames)
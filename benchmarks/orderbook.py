@@ -0,0 +1,173 @@
+# -*- coding:utf-8 -*-
+
+"""
+okex深度增量合并的速度
+
+对比okex websocket原来的update_bids()/update_asks()列表合并与purequant.orderbook.OrderBook，
+每条推送合并后都计算校验和并与推送中的checksum比较，输出每秒合并的推送条数与档位数，
+另外单独对比原来逐段拼接字符串的check()与OrderBook增量计算校验和的耗时。
+默认使用合成的okex 400档深度推送（第一条全量，其后为增量，包含新增、修改与删除），
+也可以传入录制的推送文件，每行一条解压后的JSON：
+    python benchmarks/orderbook.py [录制文件路径]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import zlib
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # 在仓库中直接运行时也能导入purequant
+from purequant.orderbook import OrderBook, checksum
+
+
+def legacy_merge(rows, side, reverse):
+    """与okex websocket原来的update_bids()/update_asks()相同，去掉了打印"""
+    for i in rows:
+        for j in side:
+            if i[0] == j[0]:
+                if i[1] == '0':
+                    side.remove(j)
+                    break
+                else:
+                    del j[1]
+                    j.insert(1, i[1])
+                    break
+        else:
+            if i[1] != "0":
+                side.append(i)
+    side.sort(key=lambda price: int(price[0]) if price[0].isdigit() else float(price[0]), reverse=reverse)
+    return side
+
+
+def legacy_check(bids, asks):
+    """与okex websocket原来的check()相同，逐段拼接字符串"""
+    bid_l = [':'.join(j[0:2]) for j in bids[:25]]
+    ask_l = [':'.join(k[0:2]) for k in asks[:25]]
+    num = ''
+    for n in range(min(len(bid_l), len(ask_l))):
+        num += bid_l[n] + ':' + ask_l[n] + ':'
+    for l in range(min(len(bid_l), len(ask_l)), max(len(bid_l), len(ask_l))):
+        num += (bid_l if len(bid_l) > len(ask_l) else ask_l)[l] + ':'
+    value = zlib.crc32(num[:-1].encode())
+    return value - (1 << 32) if value > (1 << 31) - 1 else value
+
+
+def synthetic_frames(count=5000, levels=400):
+    """合成okex深度推送，返回解码后的字典列表"""
+    bids = {}
+    asks = {}
+    price = 9000.0
+
+    def row(p):
+        return ["%.1f" % p, str(random.randint(1, 500)), "0", str(random.randint(1, 9))]
+
+    for k in range(levels):
+        bids[round(price - 0.1 * k, 1)] = row(price - 0.1 * k)
+        asks[round(price + 0.1 * (k + 1), 1)] = row(price + 0.1 * (k + 1))
+    frames = []
+    for i in range(count):
+        if i == 0:
+            bids_u, asks_u = list(bids.values()), list(asks.values())
+        else:
+            price += random.choice((-0.1, 0, 0.1))
+            bids_u, asks_u = [], []
+            for book, delta, sign in ((bids, bids_u, -1), (asks, asks_u, 1)):
+                for _ in range(random.randint(1, 20)):
+                    p = round(price + sign * 0.1 * random.randint(0, levels), 1)
+                    if p in book and random.random() < 0.3:
+                        del book[p]
+                        delta.append(["%.1f" % p, "0", "0", "0"])
+                    else:
+                        book[p] = row(p)
+                        delta.append(book[p])
+        data = {"instrument_id": "BTC-USD-201225", "bids": bids_u, "asks": asks_u,
+                "timestamp": "2020-07-25T03:05:00.%03dZ" % (i % 1000),
+                "checksum": checksum([bids[p] for p in sorted(bids, reverse=True)[:25]],
+                                     [asks[p] for p in sorted(asks)[:25]])}
+        frames.append({"table": "futures/depth_l2_tbt", "action": "partial" if i == 0 else "update",
+                       "data": [json.loads(json.dumps(data))]})
+    return frames
+
+
+def recorded_frames(path):
+    """读取录制的推送，只保留深度频道"""
+    frames = []
+    with open(path, "rb") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                res = json.loads(line)
+                if "depth" in res.get("table", "") and "depth5" not in res["table"]:
+                    frames.append(res)
+    return frames
+
+
+def run_legacy(frames):
+    bids, asks, errors = [], [], 0
+    for res in frames:
+        data = json.loads(json.dumps(res['data'][0]))   # 原来的合并会修改推送中的列表，每次使用副本
+        if res['action'] == 'partial':
+            bids, asks = data['bids'], data['asks']
+        else:
+            bids = legacy_merge(data['bids'], bids, True)
+            asks = legacy_merge(data['asks'], asks, False)
+        errors += legacy_check(bids, asks) != data['checksum']
+    return errors
+
+
+def run_orderbook(frames, check_every=1):
+    book, errors = OrderBook(check_every=check_every), 0
+    for res in frames:
+        data = json.loads(json.dumps(res['data'][0]))
+        errors += not book.apply(data, res['action'])
+    return errors
+
+
+def checksum_cost(frames, repeat=3):
+    """只统计计算校验和的耗时，订单簿先合并到每条推送之后的状态"""
+    book, legacy, cached = OrderBook(), 0.0, 0.0
+    for res in frames:
+        data = res['data'][0]
+        if res['action'] == 'partial':     # 只合并，不校验，校验和留到下面计时
+            book.partial(data['bids'], data['asks'])
+        else:
+            book.update(data['bids'], data['asks'])
+        bids, asks = book.bids(25), book.asks(25)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            legacy_check(bids, asks)
+        legacy += time.perf_counter() - start
+        start = time.perf_counter()
+        book.checksum()     # 前25档变化时重新计算
+        cached += (time.perf_counter() - start) * repeat
+    print("校验和：原来check() {:.2f}微秒/条，OrderBook.checksum() {:.2f}微秒/条".format(
+        legacy / repeat / len(frames) * 1e6, cached / repeat / len(frames) * 1e6))
+
+
+def copy_cost(frames):
+    for res in frames:
+        json.loads(json.dumps(res['data'][0]))
+
+
+def run(name, merge, frames, repeat=3):
+    best = float("inf")
+    errors = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        errors = merge(frames)
+        best = min(best, time.perf_counter() - start)
+    start = time.perf_counter()
+    copy_cost(frames)
+    best = max(best - (time.perf_counter() - start), 1e-9)     # 扣除复制推送数据的时间
+    updates = sum(len(res['data'][0]['bids']) + len(res['data'][0]['asks']) for res in frames)
+    print("{:<20}{:>10.0f} 条/秒{:>12.0f} 档/秒   校验失败：{}".format(name, len(frames) / best, updates / best, errors))
+
+
+if __name__ == "__main__":
+    frames = recorded_frames(sys.argv[1]) if len(sys.argv) > 1 else synthetic_frames()
+    print("推送条数：{}".format(len(frames)))
+    run("列表合并（原来）", run_legacy, frames)
+    run("OrderBook", run_orderbook, frames)
+    run("OrderBook（每10条校验）", lambda x: run_orderbook(x, 10), frames)
+    checksum_cost(frames)
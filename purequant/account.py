@@ -0,0 +1,152 @@
+# -*- coding:utf-8 -*-
+
+"""
+回测模拟账户
+
+回测期间策略通过storage.mysql_save_strategy_run_info()保存的运行信息（持仓价格、持仓方向、持仓数量、总盈亏、总资金等）
+全部记录在内存中，POSITION等模块也直接从内存中读取，回测过程中不再读写数据库，
+回测结束时由回测引擎将新增的记录一次性写入数据库。
+"""
+
+import operator as op
+
+OPERATORS = {">": op.gt, "<": op.lt, "=": op.eq, ">=": op.ge, "<=": op.le, "!=": op.ne, "<>": op.ne}
+
+RUN_INFO_COLUMNS = ("时间", "类型", "价格", "数量", "成交金额", "当前持仓价格", "当前持仓方向", "当前持仓数量", "此次盈亏", "总盈亏", "总资金")
+
+
+class __Account:
+    """回测模拟账户"""
+
+    def __init__(self):
+        self.__enabled = False
+        self.__tables = {}     # {(数据库, 数据表): (字段名, 数据行列表)}
+        self.__pending = {}    # {(数据库, 数据表): 尚未写入数据库的数据行列表}
+        self.current = None    # 最近一次写入记录的(数据库, 数据表)
+
+    @property
+    def enabled(self):
+        """是否已启用模拟账户"""
+        return self.__enabled
+
+    def start(self):
+        """启用模拟账户，之后的策略运行信息都记录在内存中"""
+        if not self.__enabled:
+            self.__tables = {}  # 启用前数据库中可能已有新的数据，清空内存中的旧数据，需要时重新读取
+            self.__enabled = True
+
+    def stop(self):
+        """停用模拟账户，停用前须先将未保存的记录写入数据库"""
+        self.__enabled = False
+
+    def reset(self):
+        """清空模拟账户中的所有数据"""
+        self.__tables = {}
+        self.__pending = {}
+        self.current = None
+
+    def snapshot(self):
+        """
+        复制内存中各数据表在写入未保存记录之前的内容，用于在其他进程中恢复，不必再从数据库读取
+        :return: 返回一个字典 {(数据库, 数据表): (字段名, 数据行列表)}
+        """
+        tables = {}
+        for key, (columns, rows) in self.__tables.items():
+            saved = len(rows) - len(self.__pending.get(key, []))   # 未保存的记录都在数据表的末尾
+            tables[key] = (columns, rows[:saved])
+        return tables
+
+    def restore(self, tables):
+        """
+        清空模拟账户并载入snapshot()复制的数据表
+        :param tables: snapshot()的返回结果
+        """
+        self.reset()
+        self.__tables = {key: (columns, list(rows)) for key, (columns, rows) in tables.items()}
+
+    def has(self, database, data_sheet):
+        """内存中是否已有此数据表"""
+        return (database, data_sheet) in self.__tables
+
+    def load(self, database, data_sheet, columns, rows):
+        """
+        将从数据库中读取的整张数据表载入内存
+        :param columns: 字段名
+        :param rows: 数据行
+        """
+        self.__tables[(database, data_sheet)] = (tuple(columns), [tuple(row) for row in rows])
+
+    def record(self, database, data_sheet, row):
+        """
+        记录一条策略运行信息
+        :param row: 数据行，字段顺序与RUN_INFO_COLUMNS相同
+        """
+        key = (database, data_sheet)
+        row = tuple(row)
+        if key not in self.__tables:
+            self.__tables[key] = (RUN_INFO_COLUMNS, [])
+        self.__tables[key][1].append(row)
+        self.__pending.setdefault(key, []).append(row)
+        self.current = key
+
+    def rows(self, database, data_sheet):
+        """获取内存中某数据表的全部数据行"""
+        return self.__tables[(database, data_sheet)][1]
+
+    def select(self, data, database, data_sheet, field, operator):
+        """
+        查询内存中满足条件的数据，与storage.read_mysql_datas()的查询方式相同
+        :param data: 要查询的数据
+        :param field: 字段
+        :param operator: 比较运算符，如">"
+        :return: 返回满足条件的数据行列表
+        """
+        columns, rows = self.__tables[(database, data_sheet)]
+        index = columns.index(field)
+        compare = OPERATORS[operator]
+        result = []
+        for row in rows:
+            value = row[index]
+            target = float(data) if isinstance(value, (int, float)) else str(data)
+            if compare(value, target):
+                result.append(row)
+        return result
+
+    def last(self, database, data_sheet):
+        """获取某数据表中最新的一条记录，内存中没有此数据表时返回None"""
+        table = self.__tables.get((database, data_sheet))
+        if not table or not table[1]:
+            return None
+        return table[1][-1]
+
+    def pending(self):
+        """
+        取出所有尚未写入数据库的记录，取出后即清空
+        :return: 返回一个字典 {(数据库, 数据表): 数据行列表}
+        """
+        pending = self.__pending
+        self.__pending = {}
+        return pending
+
+    def direction(self, database, data_sheet):
+        """当前持仓方向"""
+        return self.last(database, data_sheet)[6]
+
+    def amount(self, database, data_sheet):
+        """当前持仓数量"""
+        return self.last(database, data_sheet)[7]
+
+    def price(self, database, data_sheet):
+        """当前持仓价格"""
+        return self.last(database, data_sheet)[5]
+
+    def total_profit(self, database, data_sheet):
+        """已实现的总盈亏"""
+        return self.last(database, data_sheet)[9]
+
+    def asset(self, database, data_sheet):
+        """当前总资金"""
+        return self.last(database, data_sheet)[10]
+
+
+account = __Account()
@@ -0,0 +1,558 @@
+# -*- coding:utf-8 -*-
+
+"""
+异步交易模块
+
+与purequant.trade中的同名类用法相同，方法改为协程，请求通过transport.async_transport发送，
+互不依赖的请求可以并发等待，一个进程可以不开线程同时驱动多个合约：
+
+    okex = OKEXFUTURES(access_key, secret_key, passphrase, "BTC-USD-201225")
+    await okex.setup()      # 设置全仓模式与杠杆倍数，与同步版本初始化时相同
+    ticker, position, kline = await asyncio.gather(okex.get_ticker(), okex.get_position(), okex.get_kline("1m"))
+
+行情与持仓的返回格式与同步版本相同。下单方法下单后查询一次订单状态即返回，不包含交易助手的撤单重发功能，
+需要时请根据返回的订单状态自行撤单重发。
+需要另外安装aiohttp：pip install aiohttp
+"""
+
+from purequant.exchange.okex import futures_api as okexfutures
+from purequant.exchange.okex import swap_api as okexswap
+from purequant.exchange.huobi import huobi_swap as huobiswap
+from purequant.exchange.binance import binance_futures
+from purequant.exchange.bitmex.bitmex import AsyncBitmex
+from purequant.time import ts_to_utc_str
+from purequant.config import config
+from purequant.exceptions import *
+
+OKEX_GRANULARITY = {"1m": "60", "3m": "180", "5m": "300", "15m": "900", "30m": "1800", "1h": "3600", "2h": "7200",
+                    "4h": "14400", "6h": "21600", "12h": "43200", "1d": "86400"}
+HUOBI_PERIOD = {"1m": "1min", "5m": "5min", "15m": "15min", "30m": "30min", "1h": "60min", "4h": "4hour", "1d": "1day"}
+HUOBI_ORDER_PRICE_TYPE = {0: "limit", 1: "post_only", 2: "fok", 3: "ioc", 4: "opponent"}
+
+
+def _okex_order_info(result, exchange):
+    """将okex交割合约与永续合约的订单信息转换成与同步版本相同的格式"""
+    instrument_id = result['instrument_id']
+    action = {'1': "买入开多", '2': "卖出开空", '3': "卖出平多", '4': "买入平空"}.get(result['type'])
+    price = float(result['price_avg'])   # 成交均价
+    amount = int(result['filled_qty'])   # 已成交数量
+    if instrument_id.split("-")[1] in ("usd", "USD"):
+        turnover = float(result['contract_val']) * amount
+    else:
+        turnover = round(float(result['contract_val']) * amount * price, 2)
+    state = int(result['state'])
+    info = {"交易所": exchange, "合约ID": instrument_id, "方向": action}
+    if state in (2, -1, 1):
+        info.update({"订单状态": {2: "完全成交", -1: "撤单成功", 1: "部分成交"}[state], "成交均价": price,
+                     "已成交数量": amount, "成交金额": turnover})
+    else:
+        info["订单状态"] = {-2: "失败", 0: "等待成交", 3: "下单中", 4: "撤单中"}.get(state)
+    return info
+
+
+def _depth(response, asks_list, bids_list, type):
+    """按type返回卖盘价格、买盘价格或原始深度数据"""
+    if type == "asks":
+        return [float(i[0]) for i in asks_list]
+    elif type == "bids":
+        return [float(j[0]) for j in bids_list]
+    else:
+        return response
+
+
+class OKEXFUTURES:
+    """okex交割合约异步接口"""
+
+    def __init__(self, access_key, secret_key, passphrase, instrument_id, leverage=None):
+        """
+        参数与purequant.trade.OKEXFUTURES相同，初始化时不发送请求，请调用一次setup()设置全仓模式与杠杆倍数
+        :param instrument_id: 例如："BTC-USD-201225", "BTC-USDT-201225"
+        :param leverage:杠杆倍数，如不填则默认设置为20倍杠杆
+        """
+        self.__instrument_id = instrument_id
+        self.__okex_futures = okexfutures.AsyncFutureAPI(access_key, secret_key, passphrase)
+        self.__leverage = leverage or 20
+
+    async def setup(self):
+        underlying = self.__instrument_id.split("-")[0] + "-" + self.__instrument_id.split("-")[1]
+        try:
+            await self.__okex_futures.set_margin_mode(underlying=underlying, margin_mode="crossed")
+            await self.__okex_futures.set_leverage(leverage=self.__leverage, underlying=underlying)
+        except Exception as e:
+            print("OKEX交割合约设置全仓模式失败！错误：{}".format(str(e)))
+
+    async def __order(self, type, price, size, order_type):
+        if config.backtest == "enabled":    # 回测模式
+            return "回测模拟下单成功！"
+        order_type = order_type or 0
+        result = await self.__okex_futures.take_order(self.__instrument_id, type, price, size, order_type=order_type)
+        order_info = await self.get_order_info(order_id=result['order_id'])   # 下单后查询一次订单状态
+        return {"【交易提醒】下单结果": order_info}
+
+    async def buy(self, price, size, order_type=None):
+        return await self.__order(1, price, size, order_type)
+
+    async def sell(self, price, size, order_type=None):
+        return await self.__order(3, price, size, order_type)
+
+    async def sellshort(self, price, size, order_type=None):
+        return await self.__order(2, price, size, order_type)
+
+    async def buytocover(self, price, size, order_type=None):
+        return await self.__order(4, price, size, order_type)
+
+    async def revoke_order(self, order_id):
+        receipt = await self.__okex_futures.revoke_order(self.__instrument_id, order_id)
+        if receipt['error_code'] == "0":
+            return '【交易提醒】撤单成功'
+        else:
+            return '【交易提醒】撤单失败' + receipt['error_message']
+
+    async def get_order_info(self, order_id):
+        result = await self.__okex_futures.get_order_info(self.__instrument_id, order_id)
+        return _okex_order_info(result, "Okex交割合约")
+
+    async def get_kline(self, time_frame):
+        granularity = OKEX_GRANULARITY.get(time_frame.lower())
+        if granularity is None:
+            raise KlineError
+        return await self.__okex_futures.get_kline(self.__instrument_id, granularity=granularity)
+
+    async def get_position(self, mode=None):
+        result = await self.__okex_futures.get_specific_position(instrument_id=self.__instrument_id)
+        holding = result['holding'][0]
+        if mode == "both":     # 若传入参数为"both"则查询双向持仓模式的持仓信息
+            return {"long": {'amount': int(holding['long_qty']), 'price': float(holding['long_avg_cost'])},
+                    "short": {'amount': int(holding['short_qty']), 'price': float(holding['short_avg_cost'])}}
+        if int(holding['long_qty']) > 0:
+            return {'direction': 'long', 'amount': int(holding['long_qty']), 'price': float(holding['long_avg_cost'])}
+        elif int(holding['short_qty']) > 0:
+            return {'direction': 'short', 'amount': int(holding['short_qty']), 'price': float(holding['short_avg_cost'])}
+        else:
+            return {'direction': 'none', 'amount': 0, 'price': 0.0}
+
+    async def get_ticker(self):
+        return await self.__okex_futures.get_specific_ticker(instrument_id=self.__instrument_id)
+
+    async def get_depth(self, type=None, size=None):
+        """
+        OKEX交割合约获取深度数据
+        :param type: 如不传参，返回asks和bids；只获取asks传入type="asks"；只获取"bids"传入type="bids"
+        :param size: 返回深度档位数量，最多返回200，默认10档
+        """
+        response = await self.__okex_futures.get_depth(self.__instrument_id, size=size or 10)
+        return _depth(response, response["asks"], response["bids"], type)
+
+
+class OKEXSWAP:
+    """okex永续合约异步接口"""
+
+    def __init__(self, access_key, secret_key, passphrase, instrument_id, leverage=None):
+        """
+        参数与purequant.trade.OKEXSWAP相同，初始化时不发送请求，请调用一次setup()设置杠杆倍数
+        :param instrument_id: 例如："BTC-USDT-SWAP", "BTC-USD-SWAP"
+        :param leverage:杠杆倍数，如不填则默认设置20倍杠杆
+        """
+        self.__instrument_id = instrument_id
+        self.__okex_swap = okexswap.AsyncSwapAPI(access_key, secret_key, passphrase)
+        self.__leverage = leverage or 20
+
+    async def setup(self):
+        try:
+            await self.__okex_swap.set_leverage(leverage=self.__leverage, instrument_id=self.__instrument_id, side=3)
+        except Exception as e:
+            print("OKEX永续合约设置杠杆倍数失败！请检查账户是否已设置成全仓模式！错误：{}".format(str(e)))
+
+    async def __order(self, type, price, size, order_type):
+        if config.backtest == "enabled":    # 回测模式
+            return "回测模拟下单成功！"
+        order_type = order_type or 0
+        try:
+            result = await self.__okex_swap.take_order(self.__instrument_id, type, price, size, order_type=order_type)
+        except Exception as e:
+            raise SendOrderError(e)
+        order_info = await self.get_order_info(order_id=result['order_id'])   # 下单后查询一次订单状态
+        return {"【交易提醒】下单结果": order_info}
+
+    async def buy(self, price, size, order_type=None):
+        return await self.__order(1, price, size, order_type)
+
+    async def sell(self, price, size, order_type=None):
+        return await self.__order(3, price, size, order_type)
+
+    async def sellshort(self, price, size, order_type=None):
+        return await self.__order(2, price, size, order_type)
+
+    async def buytocover(self, price, size, order_type=None):
+        return await self.__order(4, price, size, order_type)
+
+    async def revoke_order(self, order_id):
+        receipt = await self.__okex_swap.revoke_order(self.__instrument_id, order_id)
+        if receipt['error_code'] == "0":
+            return '【交易提醒】撤单成功'
+        else:
+            return '【交易提醒】撤单失败' + receipt['error_message']
+
+    async def get_order_info(self, order_id):
+        result = await self.__okex_swap.get_order_info(self.__instrument_id, order_id)
+        return _okex_order_info(result, "Okex永续合约")
+
+    async def get_kline(self, time_frame):
+        granularity = OKEX_GRANULARITY.get(time_frame.lower())
+        if granularity is None:
+            raise KlineError
+        return await self.__okex_swap.get_kline(self.__instrument_id, granularity=granularity)
+
+    async def get_position(self, mode=None):
+        receipt = await self.__okex_swap.get_specific_position(self.__instrument_id)
+        holding = receipt['holding']
+        if mode == "both":
+            return {item["side"]: {"price": float(item['avg_cost']), "amount": int(item['position'])} for item in holding[:2]}
+        amount = int(holding[0]['position'])
+        direction = holding[0]['side'] if amount != 0 else "none"
+        return {'direction': direction, 'amount': amount, 'price': float(holding[0]['avg_cost'])}
+
+    async def get_ticker(self):
+        return await self.__okex_swap.get_specific_ticker(instrument_id=self.__instrument_id)
+
+    async def get_depth(self, type=None, size=None):
+        """
+        OKEX永续合约获取深度数据
+        :param type: 如不传参，返回asks和bids；只获取asks传入type="asks"；只获取"bids"传入type="bids"
+        :param size: 返回深度档位数量，最多返回200，默认10档
+        """
+        response = await self.__okex_swap.get_depth(self.__instrument_id, size=size or 10)
+        return _depth(response, response["asks"], response["bids"], type)
+
+
+class HUOBISWAP:
+    """火币永续合约异步接口"""
+
+    def __init__(self, access_key, secret_key, instrument_id, leverage=None):
+        """
+        参数与purequant.trade.HUOBISWAP相同
+        :param instrument_id: 'BTC-USD-SWAP'
+        :param leverage:杠杆倍数，如不填则默认设置为20倍
+        """
+        self.__instrument_id = "{}-{}".format(instrument_id.split("-")[0], instrument_id.split("-")[1])
+        self.__huobi_swap = huobiswap.AsyncHuobiSwap(access_key, secret_key)
+        self.__leverage = leverage or 20
+
+    async def setup(self):
+        """火币永续合约下单时传入杠杆倍数，不需要初始化设置"""
+
+    async def __order(self, direction, offset, price, size, order_type):
+        if config.backtest == "enabled":    # 回测模式
+            return "回测模拟下单成功！"
+        order_price_type = HUOBI_ORDER_PRICE_TYPE.get(order_type or 0)
+        if order_price_type is None:
+            return "【交易提醒】交易所: Huobi 订单报价类型错误！"
+        result = await self.__huobi_swap.send_contract_order(contract_code=self.__instrument_id,
+                            client_order_id='', price=price, volume=size, direction=direction,
+                            offset=offset, lever_rate=self.__leverage, order_price_type=order_price_type)
+        try:
+            order_id = result['data']['order_id_str']
+        except:
+            raise SendOrderError(result['err_msg'])
+        order_info = await self.get_order_info(order_id=order_id)    # 下单后查询一次订单状态
+        return {"【交易提醒】下单结果": order_info}
+
+    async def buy(self, price, size, order_type=None):
+        """
+        火币永续合约下单买入开多
+        :param order_type:  0：限价单 1：只做Maker（Post only） 2：全部成交或立即取消（FOK） 3：立即成交并取消剩余（IOC） 4：对手价下单
+        """
+        return await self.__order("buy", "open", price, size, order_type)
+
+    async def sell(self, price, size, order_type=None):
+        return await self.__order("sell", "close", price, size, order_type)
+
+    async def sellshort(self, price, size, order_type=None):
+        return await self.__order("sell", "open", price, size, order_type)
+
+    async def buytocover(self, price, size, order_type=None):
+        return await self.__order("buy", "close", price, size, order_type)
+
+    async def revoke_order(self, order_id):
+        receipt = await self.__huobi_swap.cancel_contract_order(self.__instrument_id, order_id)
+        if receipt['status'] == "ok":
+            return '【交易提醒】交易所: Huobi 撤单成功'
+        else:
+            return '【交易提醒】交易所: Huobi 撤单失败' + receipt['data']['errors'][0]['err_msg']
+
+    async def get_order_info(self, order_id):
+        result = (await self.__huobi_swap.get_contract_order_info(self.__instrument_id, order_id))['data'][0]
+        state = int(result['status'])
+        action = {("buy", "open"): "买入开多", ("buy", "close"): "买入平空", ("sell", "open"): "卖出开空",
+                  ("sell", "close"): "卖出平多"}.get((result['direction'], result['offset']), "交易方向错误！")
+        info = {"交易所": "Huobi永续合约", "合约ID": self.__instrument_id, "方向": action}
+        if state in (6, 7, 4, 5):
+            info.update({"订单状态": {6: "完全成交", 7: "撤单成功", 4: "部分成交", 5: "部分成交撤销"}[state],
+                         "成交均价": result['trade_avg_price'], "已成交数量": result['trade_volume'],
+                         "成交金额": result['trade_turnover']})
+        else:
+            info["订单状态"] = {1: "准备提交", 2: "准备提交", 3: "已提交", 11: "撤单中"}.get(state)
+        return info
+
+    async def get_kline(self, time_frame):
+        period = HUOBI_PERIOD.get(time_frame.lower())
+        if period is None:
+            raise KlineError("交易所: Huobi k线周期错误，k线周期只能是【1m, 5m, 15m, 30m, 1h, 4h, 1d】!")
+        records = (await self.__huobi_swap.get_contract_kline(self.__instrument_id, period=period))['data']
+        result = [[ts_to_utc_str(item['id']), item['open'], item['high'], item['low'], item['close'], item['vol'],
+                   round(item['amount'], 2)] for item in records]
+        result.reverse()
+        return result
+
+    async def get_position(self, mode=None):
+        data = (await self.__huobi_swap.get_contract_position_info(self.__instrument_id))['data']
+        if mode == "both":
+            result = {"long": {"price": 0, "amount": 0}, "short": {"price": 0, "amount": 0}}
+            for item in data:
+                side = "long" if item['direction'] == "buy" else "short"
+                result[side] = {"price": item['cost_hold'], "amount": item['volume']}
+            return result
+        if data and data[0]['volume'] > 0:
+            direction = 'long' if data[0]['direction'] == "buy" else 'short'
+            return {'direction': direction, 'amount': data[0]['volume'], 'price': data[0]['cost_hold']}
+        return {'direction': 'none', 'amount': 0, 'price': 0.0}
+
+    async def get_ticker(self):
+        receipt = await self.__huobi_swap.get_contract_market_merged(self.__instrument_id)
+        return {"last": receipt['tick']['close']}
+
+    async def get_depth(self, type=None):
+        """
+        火币永续合约获取深度数据
+        :param type: 如不传参，返回asks和bids；只获取asks传入type="asks"；只获取"bids"传入type="bids"
+        """
+        response = await self.__huobi_swap.get_contract_depth(contract_code=self.__instrument_id, type="step0")
+        return _depth(response, response["tick"]["asks"], response["tick"]["bids"], type)
+
+
+class BINANCEFUTURES:
+    """币安币本位合约异步接口"""
+
+    def __init__(self, access_key, secret_key, instrument_id, leverage=None, position_side=None):
+        """
+        参数与purequant.trade.BINANCEFUTURES相同，初始化时不发送请求，请调用一次setup()设置持仓模式、全仓模式与杠杆倍数
+        :param instrument_id: 合约ID，例如：交割合约："ADA-USD-200925"  永续合约："ADA-USD-SWAP"
+        :param leverage:开仓杠杆倍数，如不填则默认设置为20倍
+        :param position_side:持仓模式，如不填则默认为单向持仓，如需双向持仓请传入"both"
+        """
+        if "SWAP" in instrument_id:
+            self.__instrument_id = "{}{}_{}".format(instrument_id.split("-")[0], instrument_id.split("-")[1], "PERP")
+        else:
+            self.__instrument_id = "{}{}_{}".format(instrument_id.split("-")[0], instrument_id.split("-")[1], instrument_id.split("-")[2])
+        self.__binance_futures = binance_futures
+        self.__binance_futures.set(access_key, secret_key)   # 设置api
+        self.position_side = position_side  # 持仓模式
+        self.__leverage = leverage or 20
+
+    async def setup(self):
+        request = self.__binance_futures.asyncSignedRequest
+        await request("POST", "/dapi/v1/positionSide/dual", {"dualSidePosition": "true" if self.position_side == "both" else "false"})
+        await request("POST", "/dapi/v1/marginType", {"symbol": self.__instrument_id, "marginType": "CROSSED"})
+        await request("POST", "/dapi/v1/leverage", {"symbol": self.__instrument_id, "leverage": self.__leverage})
+
+    async def __order(self, side, position_side, price, size, order_type, timeInForce):
+        if config.backtest == "enabled":    # 回测模式
+            return "回测模拟下单成功！"
+        result = await self.__binance_futures.asyncOrder(symbol=self.__instrument_id,
+                                                         side=side,
+                                                         positionSide=position_side if self.position_side == "both" else "BOTH",
+                                                         quantity=size,
+                                                         price=price,
+                                                         orderType=order_type or "LIMIT",
+                                                         timeInForce=timeInForce or "GTC")
+        if "msg" in str(result):   # 如果下单失败就抛出异常，提示错误信息。
+            raise SendOrderError(result["msg"])
+        order_info = await self.get_order_info(order_id=result['orderId'])  # 下单后查询一次订单状态
+        return {"【交易提醒】下单结果": order_info}
+
+    async def buy(self, price, size, order_type=None, timeInForce=None):
+        return await self.__order("BUY", "LONG", price, size, order_type, timeInForce)
+
+    async def sell(self, price, size, order_type=None, timeInForce=None):
+        return await self.__order("SELL", "LONG", price, size, order_type, timeInForce)
+
+    async def sellshort(self, price, size, order_type=None, timeInForce=None):
+        return await self.__order("SELL", "SHORT", price, size, order_type, timeInForce)
+
+    async def buytocover(self, price, size, order_type=None, timeInForce=None):
+        return await self.__order("BUY", "SHORT", price, size, order_type, timeInForce)
+
+    async def get_order_info(self, order_id):
+        """币安币本位合约查询订单信息"""
+        result = await self.__binance_futures.asyncOrderStatus(symbol=self.__instrument_id, orderId=order_id)
+        action = {("BUY", "BOTH"): "买入", ("SELL", "BOTH"): "卖出", ("BUY", "LONG"): "买入开多", ("SELL", "SHORT"): "卖出开空",
+                  ("BUY", "SHORT"): "买入平空", ("SELL", "LONG"): "卖出平多"}.get((result['side'], result["positionSide"]))
+        info = {"交易所": "币安币本位合约", "币对": self.__instrument_id, "方向": action}
+        status = result['status']
+        if status in ("FILLED", "CANCELED", "PARTIALLY_FILLED", "EXPIRED"):
+            info.update({"订单状态": {"FILLED": "完全成交", "CANCELED": "撤单成功", "PARTIALLY_FILLED": "部分成交",
+                                   "EXPIRED": "订单被交易引擎取消"}[status],
+                         "成交均价": float(result['avgPrice']), "已成交数量": int(result['executedQty']),
+                         "成交金额": float(result["cumBase"])})
+        else:
+            info["订单状态"] = {"REJECTED": "失败", "NEW": "等待成交", "PENDING_CANCEL": "撤单中"}.get(status)
+        return info
+
+    async def revoke_order(self, order_id):
+        """币安币本位合约撤销订单"""
+        receipt = await self.__binance_futures.asyncCancel(self.__instrument_id, orderId=order_id)
+        if receipt['status'] == "CANCELED":
+            return '【交易提醒】撤单成功'
+        else:
+            return '【交易提醒】撤单失败'
+
+    async def get_ticker(self):
+        """币安币本位合约查询最新价"""
+        response = (await self.__binance_futures.asyncGetTicker(self.__instrument_id))[0]
+        return {'symbol': response['symbol'], 'last': response['price']}
+
+    async def get_kline(self, time_frame):
+        """
+        币安币本位合约获取k线数据
+        :param time_frame: k线周期。1m， 3m， 5m， 15m， 30m， 1h， 2h， 4h， 6h， 8h， 12h， 1d， 3d， 1w， 1M
+        :return:返回一个列表，包含开盘时间戳、开盘价、最高价、最低价、收盘价、成交量。
+        """
+        receipt = await self.__binance_futures.asyncKlines(self.__instrument_id, time_frame)
+        result = [[ts_to_utc_str(int(item[0]) / 1000)] + item[1:6] for item in receipt]
+        result.reverse()
+        return result
+
+    async def get_position(self, mode=None):
+        """
+        币安币本位合约获取持仓信息
+        :return: 返回一个字典，{'direction': direction, 'amount': amount, 'price': price}
+        """
+        receipt = await self.__binance_futures.asyncPosition()
+        if mode == "both":
+            result = {"long": {"price": 0, "amount": 0}, "short": {"price": 0, "amount": 0}}
+            for item in receipt:
+                if item["symbol"] == self.__instrument_id and item["positionSide"] in ("LONG", "SHORT"):
+                    result[item["positionSide"].lower()] = {"price": float(item["entryPrice"]),
+                                                            "amount": abs(int(item["positionAmt"]))}
+            return result
+        result = None
+        for item in receipt:
+            if item["symbol"] == self.__instrument_id and item["positionSide"] == "BOTH":
+                if item["positionAmt"] == "0":
+                    direction = "none"
+                else:
+                    direction = 'long' if "-" not in item["positionAmt"] else "short"
+                result = {'direction': direction, 'amount': abs(int(item['positionAmt'])), 'price': float(item["entryPrice"])}
+        return result
+
+    async def get_depth(self, type=None):
+        """
+        币安币本位合约获取深度数据
+        :param type: 如不传参，返回asks和bids；只获取asks传入type="asks"；只获取"bids"传入type="bids"
+        """
+        response = await self.__binance_futures.asyncDepth(self.__instrument_id)
+        return _depth(response, response["asks"], response["bids"], type)
+
+
+class BITMEX:
+    """BITMEX异步接口"""
+
+    def __init__(self, access_key, secret_key, instrument_id, leverage=None, testing=None):
+        """
+        参数与purequant.trade.BITMEX相同，初始化时不发送请求，请调用一次setup()设置杠杆倍数
+        :param instrument_id: 合约id，例如："XBTUSD"
+        :param leverage:开仓杠杆倍数，如不填则默认设置为20倍
+        :param testing:是否是测试账户，默认为False
+        """
+        self.__instrument_id = instrument_id
+        self.__bitmex = AsyncBitmex(access_key, secret_key, testing=False or testing)
+        self.__leverage = leverage or 20
+
+    async def setup(self):
+        await self.__bitmex.set_leverage(self.__instrument_id, leverage=self.__leverage)
+
+    async def __order(self, side, price, size, order_type, timeInForce):
+        if config.backtest == "enabled":    # 回测模式
+            return "回测模拟下单成功！"
+        result = await self.__bitmex.create_order(symbol=self.__instrument_id, side=side, price=price, orderQty=size,
+                                                  ordType=order_type or "Limit", timeInForce=timeInForce or "GoodTillCancel")
+        if "error" in result:
+            raise SendOrderError(msg=result['error']['message'])
+        order_info = await self.get_order_info()  # 下单后查询一次订单状态
+        return {"【交易提醒】下单结果": order_info}
+
+    async def buy(self, price, size, order_type=None, timeInForce=None):
+        """
+        买入开多
+        :param order_type: Market, Limit, Stop, StopLimit, MarketIfTouched, LimitIfTouched, Pegged，默认是"Limit"
+        :param timeInForce:Day, GoodTillCancel, ImmediateOrCancel, FillOrKill, 默认是"GoodTillCancel"
+        """
+        return await self.__order("Buy", price, size, order_type, timeInForce)
+
+    async def sell(self, price, size, order_type=None, timeInForce=None):
+        return await self.__order("Sell", price, size, order_type, timeInForce)
+
+    async def sellshort(self, price, size, order_type=None, timeInForce=None):
+        return await self.__order("Sell", price, size, order_type, timeInForce)
+
+    async def buytocover(self, price, size, order_type=None, timeInForce=None):
+        return await self.__order("Buy", price, size, order_type, timeInForce)
+
+    async def revoke_order(self, order_id):
+        return await self.__bitmex.cancel_order(order_id)
+
+    async def get_order_info(self):
+        result = (await self.__bitmex.get_orders(symbol=self.__instrument_id, count=1, reverse=True))[0]
+        action = "买入" if result['side'] == "Buy" else "卖出"
+        info = {"交易所": "BITMEX", "合约ID": result["symbol"], "方向": action}
+        status = result['ordStatus']
+        if status in ("Filled", "Canceled", "PartiallyFilled"):
+            info.update({"订单状态": {"Filled": "完全成交", "Canceled": "撤单成功", "PartiallyFilled": "部分成交"}[status],
+                         "成交均价": result["avgPx"], "已成交数量": result["cumQty"]})
+        else:
+            info["订单状态"] = {"Rejected": "失败", "New": "等待成交"}.get(status)
+        return info
+
+    async def get_kline(self, time_frame, count=None):
+        """
+        获取k线数据
+        :param time_frame: k线周期
+        :param count: 返回的k线数量，默认为200条
+        """
+        response = await self.__bitmex.get_bucket_trades(binSize=time_frame, partial=False, symbol=self.__instrument_id,
+                                                         columns="timestamp, open, high, low, close, volume",
+                                                         count=count or 200, reverse=True)
+        return [[i['timestamp'], i['open'], i['high'], i['low'], i['close'], i['volume']] for i in response]
+
+    async def get_position(self):
+        try:
+            result = (await self.__bitmex.get_positions(symbol=self.__instrument_id))[0]
+        except Exception as e:
+            raise GetPositionError(e)
+        if result["currentQty"] > 0:
+            return {'direction': 'long', 'amount': result["currentQty"], 'price': result["avgCostPrice"]}
+        elif result["currentQty"] < 0:
+            return {'direction': 'short', 'amount': abs(result['currentQty']), 'price': result['avgCostPrice']}
+        else:
+            return {'direction': 'none', 'amount': 0, 'price': 0.0}
+
+    async def get_ticker(self):
+        """获取最新成交价"""
+        receipt = (await self.__bitmex.get_trade(symbol=self.__instrument_id, reverse=True, count=10))[0]
+        return {"last": receipt["price"]}
+
+    async def get_depth(self, type=None, depth=None):
+        """
+        BITMEX获取深度数据
+        :param type:如不传参，返回asks和bids；只获取asks传入type="asks"；只获取"bids"传入type="bids"
+        :param depth:返回深度档位数量，默认10档
+        """
+        response = await self.__bitmex.get_orderbook(self.__instrument_id, depth=depth or 10)
+        asks_list = [i['price'] for i in response if i['side'] == "Sell"]   # 卖盘
+        bids_list = [i['price'] for i in response if i['side'] == "Buy"]   # 买盘
+        if type == "asks":
+            return asks_list
+        elif type == "bids":
+            return bids_list
+        else:
+            return {"asks": asks_list, "bids": bids_list}
@@ -0,0 +1,233 @@
+# -*- coding:utf-8 -*-
+
+"""
+回测引擎
+
+一次性将历史k线数据载入numpy数组，逐根bar移动游标，每次只向策略传入指向同一份数组的k线视图，
+避免回测时不断向列表追加k线、每次调用指标都重新转换整个历史数据。
+策略写法保持不变，仍为begin_trade(kline=...)。
+运行回测时会启用回测模拟账户，回测过程中策略保存的运行信息只记录在内存中，回测结束后一次性写入数据库并停用模拟账户。
+"""
+
+import numpy as np
+from purequant.time import get_cur_timestamp
+from purequant.account import account
+from purequant.storage import storage
+from purequant.report import REPORT
+from purequant.exceptions import BacktestError
+
+
+class KlineView:
+    """
+    回测时传给策略的k线视图，指向回测引擎中的同一份数组，不复制数据。
+    可以像k线列表一样使用：len(kline)、kline[-1][4]、for item in kline，
+    也可以直接取出numpy数组：kline.close、kline.column(4)。
+    """
+
+    def __init__(self, timestamp, data, start, stop):
+        self.__timestamp = timestamp
+        self.__data = data
+        self.__start = start
+        self.__stop = stop
+
+    def __len__(self):
+        return self.__stop - self.__start
+
+    def __bool__(self):
+        return self.__stop > self.__start
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):    # 切片返回新的视图
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            return KlineView(self.__timestamp, self.__data, self.__start + start, self.__start + max(start, stop))
+        length = len(self)
+        if index < 0:
+            index += length
+        if index < 0 or index >= length:
+            raise IndexError("k线索引超出范围")
+        row = self.__start + index
+        return [self.__timestamp[row]] + self.__data[:, row].tolist()
+
+    def __iter__(self):
+        for row in range(self.__start, self.__stop):
+            yield [self.__timestamp[row]] + self.__data[:, row].tolist()
+
+    def column(self, index):
+        """
+        获取k线数据中的某一列
+        :param index: 列序号，0为时间，1为开盘价，2为最高价，3为最低价，4为收盘价，5为成交量
+        :return: 返回一个只读的一维数组，与回测引擎共用同一块内存，需要修改时先copy()
+        """
+        if index == 0:
+            view = self.__timestamp[self.__start:self.__stop]
+        else:
+            view = self.__data[index - 1, self.__start:self.__stop]
+        view.flags.writeable = False    # 策略不能通过视图改写回测数据
+        return view
+
+    @property
+    def timestamp(self):
+        return self.column(0)
+
+    @property
+    def open(self):
+        return self.column(1)
+
+    @property
+    def high(self):
+        return self.column(2)
+
+    @property
+    def low(self):
+        return self.column(3)
+
+    @property
+    def close(self):
+        return self.column(4)
+
+    @property
+    def volume(self):
+        return self.column(5)
+
+
+class BACKTEST:
+
+    def __init__(self, data, lookback=None):
+        """
+        回测引擎
+        :param data: 历史k线数据，按时间先后排列，每根k线为[时间, 开盘价, 最高价, 最低价, 收盘价, 成交量, ...]，
+                     如storage.read_purequant_server_datas()或pandas的df.values.tolist()的返回结果
+        :param lookback: 每次传给策略的k线数量，不填则传入从第一根k线到当前k线的全部数据。
+                         填写后指标只需计算最近lookback根k线，回测速度更快，但须大于策略所需的最长周期
+        """
+        length = len(data)
+        timestamp = np.empty(length, dtype=object)
+        data_array = np.empty((5, length), dtype=np.float64)
+        for t, item in enumerate(data):
+            timestamp[t] = item[0]
+            data_array[:, t] = item[1:6]
+        self.__setup(timestamp, data_array, lookback)
+
+    @classmethod
+    def from_arrays(cls, timestamp, open, high, low, close, volume, lookback=None):
+        """
+        由已经按列整理好的数组创建回测引擎，无需逐行转换
+        :return: 返回一个BACKTEST对象
+        """
+        engine = cls.__new__(cls)
+        data_array = np.vstack([np.asarray(x, dtype=np.float64) for x in (open, high, low, close, volume)])
+        engine.__setup(np.asarray(timestamp), data_array, lookback)
+        return engine
+
+    @classmethod
+    def from_matrix(cls, timestamp, data, lookback=None):
+        """
+        由形状为(5, n)的二维数组创建回测引擎，五行依次为开盘价、最高价、最低价、收盘价、成交量。
+        数组为float64且每一行内存连续时不复制数据，如共享内存或内存映射文件中的数组及其按列的切片
+        :return: 返回一个BACKTEST对象
+        """
+        engine = cls.__new__(cls)
+        engine.__setup(np.asarray(timestamp), np.asarray(data, dtype=np.float64), lookback)
+        return engine
+
+    def __setup(self, timestamp, data_array, lookback):
+        # 时间转换成python的int、float或str，传给策略的k线与实盘中的k线列表类型相同，numpy的标量类型会被BarUpdate()等判断错误
+        self.__timestamp = np.asarray(timestamp).astype(object)
+        if data_array.strides[-1] != data_array.itemsize:     # 每一行连续即可，取出的一列直接传给talib
+            data_array = np.ascontiguousarray(data_array)
+        self.__data = data_array
+        self.__lookback = lookback
+        self.__cursor = 0
+        self.__equity = None    # 运行回测后才有资金曲线、持仓与运行信息
+        self.__position = None
+        self.__records = None
+
+    def __len__(self):
+        return len(self.__timestamp)
+
+    @property
+    def lookback(self):
+        """每次传给策略的k线数量，None为全部数据"""
+        return self.__lookback
+
+    @property
+    def cursor(self):
+        """当前回测到的k线序号"""
+        return self.__cursor
+
+    def view(self, index):
+        """
+        获取截至第index根k线（包含）的k线视图
+        :param index: k线序号
+        :return: 返回一个KlineView对象
+        """
+        stop = index + 1
+        start = max(0, stop - self.__lookback) if self.__lookback else 0
+        return KlineView(self.__timestamp, self.__data, start, stop)
+
+    @property
+    def data(self):
+        """回测引擎中的全部k线数据，返回(时间数组, 形状为(5, n)的价格与成交量数组)"""
+        return self.__timestamp, self.__data
+
+    def run(self, strategy, start=0, save=True):
+        """
+        逐根k线运行策略，同时记录每根k线上的总资金与持仓数量
+        :param strategy: 策略实例，须有begin_trade(kline=...)方法
+        :param start: 从第几根k线开始回测，默认从第一根开始
+        :param save: 回测结束后是否将模拟账户中的运行信息写入数据库，不写入时丢弃
+        :return: 返回回测用时（秒）
+        """
+        start_time = get_cur_timestamp()
+        self.__equity = np.full(len(self), np.nan)
+        self.__position = np.zeros(len(self))
+        account.start()     # 启用回测模拟账户，回测过程中的持仓与资金信息都记录在内存中
+        try:
+            for index in range(start, len(self)):
+                self.__cursor = index
+                strategy.begin_trade(kline=self.view(index))
+                row = account.last(*account.current) if account.current else None
+                if row:     # 策略最新保存的总资金与持仓
+                    self.__equity[index] = row[10]
+                    self.__position[index] = row[7] if row[6] == "long" else -row[7] if row[6] == "short" else 0
+            self.__records = account.pending()  # 本次回测新增的运行信息
+            self.__fill_start(start)
+            if save:
+                self.flush(self.__records)
+        finally:
+            account.stop()  # 回测结束后停用模拟账户，之后的运行信息照常写入数据库
+        return get_cur_timestamp() - start_time
+
+    def __fill_start(self, start):
+        """策略本次回测中第一次保存运行信息之前的k线，总资金取回测开始时数据表中最新的总资金"""
+        if account.current is None:
+            return
+        rows = account.rows(*account.current)
+        count = len(self.__records.get(account.current, []))
+        if len(rows) <= count:  # 数据表中没有回测开始前的记录
+            return
+        valid = np.flatnonzero(~np.isnan(self.__equity[start:]))
+        stop = start + valid[0] if len(valid) else len(self)
+        self.__equity[start:stop] = float(rows[len(rows) - count - 1][10])
+
+    def flush(self, records=None):
+        """
+        将回测模拟账户中尚未保存的策略运行信息一次性写入数据库
+        :param records: 要写入的运行信息 {(数据库, 数据表): 数据行列表}，不填则写入模拟账户中所有尚未保存的记录
+        """
+        records = account.pending() if records is None else records
+        for (database, data_sheet), rows in records.items():
+            storage.mysql_save_strategy_run_info_many(database, data_sheet, rows)
+
+    def report(self, periods=None):
+        """
+        生成最近一次回测的回测报告
+        :param periods: 一年的k线数量，用于年化，不填则根据k线时间间隔计算
+        :return: 返回一个REPORT对象
+        """
+        if self.__records is None:
+            raise BacktestError()
+        records = self.__records.get(account.current, [])
+        return REPORT(self.__timestamp, self.__equity, self.__position, records, periods)
@@ -19,6 +19,7 @@ class BITMEXWS:
         self.__bitmex = Bitmex(api_key=access_key, api_secret=secret_key, testing=testing)
         self.__bitmex.set_leverage(instrument_id, leverage=leverage or 20)
         self.__instrument_id = instrument_id
+        self.__snapshot = None  # 深度快照，订单簿版本变化后重新生成
 
     def generate_uuid(self):
         """生成client order id"""
@@ -94,38 +95,79 @@ class BITMEXWS:
 
     @property
     def __depth(self):
+        """
+        深度快照，订单簿有更新后第一次读取时由websocket中已排好序的买卖盘生成一次，之后直接返回，
+        返回的列表由多次读取共用，不要修改
+        """
         if self.__ws.ws.sock.connected:
-            asks = []
-            bids = []
-            data = self.__ws.market_depth()
-            for item in data:
-                if item['side'] == 'Sell':
-                    asks.append(item)
-                elif item['side'] == 'Buy':
-                    bids.append(item)
-            ask_price_list = []
-            bid_price_list = []
-            for j in asks:
-                ask_price_list.append(j['price'])
-            for x in bids:
-                bid_price_list.append(x['price'])
-            ask_price_list.sort(reverse=False)
-            bid_price_list.sort(reverse=True)
-            return {
-                "ask_price_list": ask_price_list,
-                "bid_price_list": bid_price_list
-            }
+            version = self.__ws.depth_version()
+            if self.__snapshot is None or self.__snapshot["version"] != version:
+                asks = self.__ws.asks()
+                bids = self.__ws.bids()
+                self.__snapshot = {
+                    "version": version,
+                    "ask_price_list": [item['price'] for item in asks],
+                    "bid_price_list": [item['price'] for item in bids],
+                    "ask_size_list": [item['size'] for item in asks],
+                    "bid_size_list": [item['size'] for item in bids],
+                    "top": {}   # {档数: depth()的结果}
+                }
+            return self.__snapshot
 
     @property
     def asks(self):
+        """卖盘价格列表，从低到高排列"""
         if self.__ws.ws.sock.connected:
             return self.__depth['ask_price_list']
 
     @property
     def bids(self):
+        """买盘价格列表，从高到低排列"""
         if self.__ws.ws.sock.connected:
             return self.__depth['bid_price_list']
 
+    @property
+    def ask_sizes(self):
+        """卖盘数量列表，与asks一一对应"""
+        if self.__ws.ws.sock.connected:
+            return self.__depth['ask_size_list']
+
+    @property
+    def bid_sizes(self):
+        """买盘数量列表，与bids一一对应"""
+        if self.__ws.ws.sock.connected:
+            return self.__depth['bid_size_list']
+
+    @property
+    def best_ask(self):
+        """卖一价，没有卖盘时返回None"""
+        if self.__ws.ws.sock.connected:
+            asks = self.__ws.asks()
+            return asks[0]['price'] if asks else None
+
+    @property
+    def best_bid(self):
+        """买一价，没有买盘时返回None"""
+        if self.__ws.ws.sock.connected:
+            bids = self.__ws.bids()
+            return bids[0]['price'] if bids else None
+
+    def depth(self, size=5):
+        """
+        前若干档深度，同一版本的订单簿只生成一次
+        :param size: 档数
+        :return: 返回{"asks": [[价格, 数量], ...], "bids": [[价格, 数量], ...]}
+        """
+        if self.__ws.ws.sock.connected:
+            snapshot = self.__depth
+            top = snapshot["top"].get(size)
+            if top is None:
+                top = snapshot["top"][size] = {
+                    "asks": [list(x) for x in zip(snapshot['ask_price_list'][:size], snapshot['ask_size_list'][:size])],
+                    "bids": [list(x) for x in zip(snapshot['bid_price_list'][:size], snapshot['bid_size_list'][:size])]
+                }
+            return top
+
     @property
     def hold_amount(self):
         """获取持仓数量，无论多空，返回值均为正数"""
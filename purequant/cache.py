@@ -0,0 +1,49 @@
+# -*- coding:utf-8 -*-
+
+"""
+实盘行情数据缓存
+
+MARKET、INDICATORS、POSITION在实盘模式下都需要获取k线数据，策略每轮询一次会多次调用交易所的k线接口。
+这里按(交易所, 交易对, k线周期)缓存k线数据，缓存时间内的重复调用直接返回缓存，每轮询一次只发起一次网络请求。
+缓存时间可在配置文件中设置：{"CACHE": {"kline_ttl": 1}}，单位为秒，不设置时默认为1秒，须小于策略的轮询间隔。
+"""
+
+from purequant.time import get_cur_timestamp_ms
+from purequant.config import config
+
+
+class __Cache:
+    """实盘行情数据缓存"""
+
+    def __init__(self):
+        self.__klines = {}  # {(交易所类名, 交易对, k线周期): [获取时间(毫秒), 交易所返回的k线数据, 倒序后的k线数据]}
+
+    def kline(self, platform, instrument_id, time_frame, reverse=False):
+        """
+        获取k线数据，缓存未过期时不再请求交易所
+        返回的列表由各模块共用，不要修改其中的数据，需要修改时请先复制
+        :param platform: 交易所对象
+        :param instrument_id: 交易对
+        :param time_frame: k线周期
+        :param reverse: False返回交易所返回的原始顺序（最新的k线在前），True返回按时间先后排列的k线数据
+        :return: 返回一个列表
+        """
+        key = (type(platform).__name__, instrument_id, time_frame)
+        entry = self.__klines.get(key)
+        now = get_cur_timestamp_ms()
+        if entry is None or now - entry[0] >= getattr(config, "kline_ttl", 1) * 1000:
+            records = platform.get_kline(time_frame)
+            entry = [now, records, None]
+            self.__klines[key] = entry
+        if not reverse:
+            return entry[1]
+        if entry[2] is None:
+            entry[2] = entry[1][::-1]
+        return entry[2]
+
+    def clear(self):
+        """清空缓存，下次调用时重新请求交易所"""
+        self.__klines = {}
+
+
+cache = __Cache()
@@ -0,0 +1,139 @@
+# -*- coding:utf-8 -*-
+
+"""
+交易所服务器时钟
+
+签名请求需要与交易所服务器一致的时间戳，每次签名前都请求一次服务器时间会让请求数量翻倍。
+这里在后台线程中定期测量本机时间与交易所服务器时间的偏差，签名时用本机时间加上缓存的偏差得到服务器时间，
+两次测量之间按测得的时钟漂移速度修正偏差。
+校准间隔可在配置文件中设置：{"CLOCK": {"sync_interval": 60}}，单位为秒，不设置时默认为60秒。
+
+用法：
+    clock.register("okex", get_server_time_ms)     # 交易所模块导入时注册获取服务器时间（毫秒）的函数
+    clock.now_ms("okex")                            # 第一次调用时同步测量一次，之后不再发送请求
+"""
+
+import time
+import datetime
+import threading
+from collections import deque
+from purequant.config import config
+
+MAX_DRIFT = 0.0001      # 时钟漂移速度的上限，本机时钟每毫秒最多相差0.0001毫秒
+MIN_SPAN = 600000       # 测量结果跨越10分钟以上才估计漂移速度，避免把网络延迟的波动当成漂移
+
+
+class __Clock:
+    """交易所服务器时钟"""
+
+    def __init__(self):
+        self.__sources = {}     # {交易所名称: 获取服务器时间（毫秒）的函数}
+        self.__samples = {}     # {交易所名称: [测量时的本机时间（毫秒）, 偏差（毫秒）, 漂移速度]}
+        self.__history = {}     # {交易所名称: 最近30次测量的(本机时间, 偏差)}
+        self.__tried = set()
+        self.__lock = threading.Lock()
+        self.__thread = None
+
+    def register(self, name, fetch):
+        """
+        注册交易所的服务器时间接口
+        :param name: 交易所名称，如"okex"
+        :param fetch: 无参数的函数，返回交易所服务器的毫秒时间戳
+        """
+        self.__sources[name] = fetch
+
+    def local_ms(self):
+        """本机的毫秒时间戳"""
+        return time.time() * 1000
+
+    def update(self, name, server_ms, sent_ms, received_ms):
+        """
+        记录一次测量结果，服务器时间视为在请求发出与收到响应的中点
+        :param server_ms: 交易所返回的毫秒时间戳
+        :param sent_ms: 发出请求时的本机毫秒时间戳
+        :param received_ms: 收到响应时的本机毫秒时间戳
+        """
+        middle = (sent_ms + received_ms) / 2
+        offset = server_ms - middle
+        with self.__lock:
+            history = self.__history.setdefault(name, deque(maxlen=30))
+            history.append((middle, offset))
+            drift = 0.0
+            if history[-1][0] - history[0][0] >= MIN_SPAN:    # 最小二乘法拟合偏差随时间的变化速度
+                mean_t = sum(t for t, _ in history) / len(history)
+                mean_o = sum(o for _, o in history) / len(history)
+                drift = sum((t - mean_t) * (o - mean_o) for t, o in history) / sum((t - mean_t) ** 2 for t, _ in history)
+                drift = max(-MAX_DRIFT, min(MAX_DRIFT, drift))
+            self.__samples[name] = [middle, offset, drift]
+        self.__start()
+
+    def measure(self, name):
+        """
+        请求一次交易所服务器时间并更新偏差
+        :param name: 交易所名称
+        """
+        sent_ms = self.local_ms()
+        server_ms = self.__sources[name]()
+        self.update(name, float(server_ms), sent_ms, self.local_ms())
+
+    def synced(self, name):
+        """是否已经测量过偏差"""
+        return name in self.__samples
+
+    def offset(self, name):
+        """
+        交易所服务器时间减去本机时间的偏差（毫秒）
+        第一次调用时同步测量一次，测量失败时返回0，由后台线程继续重试
+        :param name: 交易所名称
+        """
+        sample = self.__samples.get(name)
+        if sample is None:
+            if name not in self.__tried:
+                self.__tried.add(name)
+                try:
+                    self.measure(name)
+                except Exception as e:
+                    print("获取{}服务器时间失败，暂时使用本机时间！错误：{}".format(name, str(e)))
+                    self.__start()
+            sample = self.__samples.get(name)
+            if sample is None:
+                return 0.0
+        middle, offset, drift = sample
+        return offset + drift * (self.local_ms() - middle)
+
+    def now_ms(self, name):
+        """
+        交易所服务器的当前毫秒时间戳
+        :param name: 交易所名称
+        :return: 返回整数
+        """
+        return int(self.local_ms() + self.offset(name))
+
+    def iso(self, name):
+        """
+        交易所服务器的当前时间，ISO格式的utc时间字符串，如'2020-07-25T03:05:00.123Z'
+        :param name: 交易所名称
+        """
+        now = datetime.datetime.utcfromtimestamp(self.now_ms(name) / 1000)
+        return now.isoformat("T", "milliseconds") + "Z"
+
+    def __start(self):
+        """启动后台校准线程"""
+        if self.__thread is None:
+            with self.__lock:
+                if self.__thread is None:
+                    self.__thread = threading.Thread(target=self.__run, daemon=True)
+                    self.__thread.start()
+
+    def __run(self):
+        while True:
+            time.sleep(getattr(config, "clock_sync_interval", 60))
+            for name in list(self.__sources):
+                if name in self.__tried or name in self.__samples:
+                    try:
+                        self.measure(name)
+                    except Exception:   # 下次校准时重试，期间沿用上次测得的偏差
+                        pass
+
+
+clock = __Clock()
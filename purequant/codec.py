@@ -0,0 +1,78 @@
+# -*- coding:utf-8 -*-
+
+"""
+JSON解码
+
+交易所的REST响应与websocket推送都通过这里的loads()解码。安装了orjson或ujson时自动使用，解码深度等大数据量推送比标准库json快数倍，
+都没有安装时使用标准库json：pip install orjson
+也可以用set_decoder()换成其他解码函数。
+
+用法：
+    from purequant import codec
+    codec.loads(b'{"a": 1}')     # 可以传入bytes或字符串
+    codec.name                  # 当前使用的解码库名称
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+def _json_loads(data):
+    return json.loads(data)
+
+
+def _orjson_loads(data):
+    try:
+        return orjson.loads(data)
+    except orjson.JSONDecodeError:  # 交给标准库再解码一次，内容确实有误时抛出标准库的异常
+        return json.loads(data)
+
+
+def _ujson_loads(data):
+    try:
+        return ujson.loads(data)
+    except ValueError:
+        return json.loads(data)
+
+
+if orjson is not None:
+    _decoder, name = _orjson_loads, "orjson"
+elif ujson is not None:
+    _decoder, name = _ujson_loads, "ujson"
+else:
+    _decoder, name = _json_loads, "json"
+
+
+def set_decoder(decoder):
+    """
+    设置解码函数
+    :param decoder: "orjson"、"ujson"、"json"，或者接受bytes与字符串并返回解码结果的函数
+    """
+    global _decoder, name
+    if callable(decoder):
+        _decoder, name = decoder, getattr(decoder, "__name__", "custom")
+    elif decoder == "orjson" and orjson is not None:
+        _decoder, name = _orjson_loads, "orjson"
+    elif decoder == "ujson" and ujson is not None:
+        _decoder, name = _ujson_loads, "ujson"
+    elif decoder == "json":
+        _decoder, name = _json_loads, "json"
+    else:
+        raise ImportError("未安装{}：pip install {}".format(decoder, decoder))
+
+
+def loads(data):
+    """
+    解码JSON
+    :param data: bytes或字符串
+    :return: 返回解码后的字典或列表
+    """
+    return _decoder(data)
@@ -65,8 +65,25 @@ class __Config:
         self.mysql_authorization = configures["MYSQL"]["authorization"]
         self.mysql_user_name = configures["MYSQL"]["user_name"]
         self.mysql_password = configures["MYSQL"]["password"]
+        self.mysql_buffer_size = configures["MYSQL"].get("buffer_size", 100)     # 策略运行信息缓冲的条数，可选配置
+        self.mysql_flush_interval = configures["MYSQL"].get("flush_interval", 5)    # 策略运行信息缓冲的最长秒数，可选配置
         # BACKTEST
         self.backtest = configures["MODE"]["backtest"]
+        # HTTP，可选配置，各交易所REST请求的连接池大小、重试次数与超时秒数
+        http = configures.get("HTTP", {})
+        self.http_pool_size = http.get("pool_size", 10)
+        self.http_retries = http.get("retries", 3)
+        self.http_timeout = http.get("timeout", 10)
+        # CACHE，可选配置，未设置时实盘k线数据缓存1秒
+        self.kline_ttl = configures.get("CACHE", {}).get("kline_ttl", 1)
+        # CLOCK，可选配置，未设置时每60秒校准一次交易所服务器时间
+        self.clock_sync_interval = configures.get("CLOCK", {}).get("sync_interval", 60)
+        # RATELIMIT，可选配置，未设置时按交易所频率限制的90%排队发送请求
+        ratelimit = configures.get("RATELIMIT", {})
+        self.ratelimit_enabled = ratelimit.get("enabled", "true")
+        self.ratelimit_safety = ratelimit.get("safety", 0.9)
+        # DEPTH，可选配置，未设置时okex深度频道每条推送都校验checksum
+        self.depth_checksum_every = configures.get("DEPTH", {}).get("checksum_every", 1)
 
     def update_config(self, config_file, config_content):
         """
@@ -0,0 +1,321 @@
+# -*- coding:utf-8 -*-
+
+"""
+本地k线数据仓库
+
+每个交易对的每个k线周期保存为一个按列存放的二进制文件，按时间先后追加写入，读取时以内存映射方式打开，
+按时间范围查询时在连续存放的时间列上二分查找，回测时直接由内存映射的价格列创建回测引擎，
+不再需要每次回测都通过网络从数据库读取全部历史数据，也不再逐行解析csv。
+
+用法：
+    store = KLINESTORE("btc_1d")
+    store.import_mysql("btc_1d")        # 从PureQuant服务器的数据库导入一次
+    engine = store.backtest(start="2019-01-01T00:00:00.000z")
+    engine.run(strategy)
+"""
+
+import io
+import os
+import numpy as np
+import pandas as pd
+from dateutil import tz
+from purequant.time import sleep
+from purequant.backtest import BACKTEST
+from purequant.storage import storage
+
+MAGIC = b"PQKLINE1"     # k线数据文件的标识
+HEADER_SIZE = 64        # 文件头的字节数，标识之后为int64的k线数量
+MIN_CAPACITY = 1024     # 新建数据文件时每列预留的k线数量
+KLINE_DTYPE = np.dtype([("timestamp", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"), ("close", "<f8"), ("volume", "<f8")])
+
+
+def _local_timezone():
+    """本机时区，优先使用时区数据库中的名称，如"Asia/Shanghai"，无法确定时使用dateutil读取系统设置"""
+    name = os.environ.get("TZ", "").lstrip(":")
+    if not name:
+        path = os.path.realpath("/etc/localtime")
+        name = path.split("zoneinfo/", 1)[1] if "zoneinfo/" in path else ""
+    if name:
+        try:
+            pd.Timestamp(0).tz_localize(name)
+            return name
+        except Exception:
+            pass
+    return tz.tzlocal()
+
+
+def to_ms(values, timezone=None):
+    """
+    将k线时间转换成毫秒时间戳
+    :param values: ISO格式的时间字符串、datetime对象、或秒/毫秒时间戳组成的序列
+    :param timezone: 不带时区的时间字符串所在的时区，如"Asia/Shanghai"，"local"为本机时区，不填则为UTC
+    :return: 返回int64数组
+    """
+    values = np.asarray(values)
+    if values.size == 0:
+        return np.empty(0, dtype=np.int64)
+    if values.dtype.kind == "O" and isinstance(values.flat[0], (int, float, np.number)):
+        values = values.astype(np.float64)
+    if values.dtype.kind in "iuf":
+        values = values.astype(np.int64)
+        return np.where(values < 10 ** 11, values * 1000, values)   # 秒级时间戳转换为毫秒
+    if values.dtype.kind == "M" and timezone is None:
+        return values.astype("datetime64[ms]").astype(np.int64)
+    timestamp = pd.to_datetime(pd.Series(values.ravel()))
+    if timestamp.dt.tz is None:
+        if timezone == "local":
+            timezone = _local_timezone()
+        # 有夏令时的时区整列按各自日期的偏移转换，重复的一小时按先后顺序推断，跳过的一小时顺延
+        timestamp = timestamp.dt.tz_localize(timezone or "UTC", ambiguous="infer", nonexistent="shift_forward")
+    return timestamp.dt.tz_convert("UTC").dt.tz_localize(None).values.astype("datetime64[ms]").astype(np.int64)
+
+
+def ms_to_utc_str(values):
+    """
+    将毫秒时间戳转换成与交易所k线相同格式的utc时间字符串，如'2020-07-25T03:05:00.000z'
+    :param values: int64数组
+    :return: 返回一个字符串数组
+    """
+    result = np.datetime_as_string(np.asarray(values, dtype=np.int64).astype("datetime64[ms]"), unit="ms")
+    return np.char.add(result, "z").astype(object)
+
+
+def read_csv(path, columns=None, timezone=None, chunksize=100000):
+    """
+    分块读取csv文件中的k线数据，整列解析时间与价格，大文件不必一次全部载入内存
+    :param path: csv文件路径
+    :param columns: 时间、开盘价、最高价、最低价、收盘价、成交量在csv中的列名，
+                    不填则为['timestamp', 'open', 'high', 'low', 'close', 'volume']
+    :param timezone: csv中不带时区的时间所在的时区，如"Asia/Shanghai"，"local"为本机时区，不填则为UTC
+    :param chunksize: 每块的行数
+    :return: 返回一个生成器，每次产生一块按KLINE_DTYPE排列的结构化数组
+    """
+    columns = columns or ["timestamp", "open", "high", "low", "close", "volume"]
+    for df in pd.read_csv(path, usecols=columns, chunksize=chunksize, dtype={x: np.float64 for x in columns[1:]}):
+        chunk = np.empty(len(df), dtype=KLINE_DTYPE)
+        chunk["timestamp"] = to_ms(df[columns[0]].values, timezone)
+        for name, column in zip(KLINE_DTYPE.names[1:], columns[1:]):
+            chunk[name] = df[column].values
+        yield chunk
+
+
+def load_csv(path, columns=None, timezone=None, lookback=None, chunksize=100000):
+    """
+    读取csv文件中的k线数据并创建回测引擎，k线须按时间先后排列
+    参数与read_csv()相同，lookback与BACKTEST相同
+    :return: 返回一个BACKTEST对象
+    """
+    chunks = list(read_csv(path, columns, timezone, chunksize))
+    data = np.concatenate(chunks) if chunks else np.empty(0, dtype=KLINE_DTYPE)
+    matrix = np.vstack([data[x] for x in KLINE_DTYPE.names[1:]])
+    return BACKTEST.from_matrix(ms_to_utc_str(data["timestamp"]), matrix, lookback)
+
+
+class KLINESTORE:
+
+    def __init__(self, name, path="kline_data"):
+        """
+        本地k线数据仓库，每个交易对的每个k线周期保存为一个按列存放的文件：
+        文件头记录k线数量，其后依次为时间、开盘价、最高价、最低价、收盘价、成交量各一段连续的数组，
+        每段预留相同的容量，追加k线时直接写入每段的末尾，容量不足时加倍后重写文件
+        :param name: 数据名称，如"btc_1d"，与PureQuant服务器上的数据表名称一致
+        :param path: 数据文件所在的文件夹
+        """
+        os.makedirs(path, exist_ok=True)
+        self.__file = os.path.join(path, name + ".kline")
+        self.__mapped = None    # (k线数量, 容量, 时间数组, 形状为(5, 容量)的价格与成交量数组)
+
+    def __header(self):
+        """读取文件头，返回(k线数量, 容量)，没有数据文件时返回(0, 0)"""
+        if not os.path.exists(self.__file):
+            return 0, 0
+        with io.open(self.__file, "rb") as f:
+            header = f.read(HEADER_SIZE)
+        if header[:len(MAGIC)] != MAGIC:
+            raise ValueError("不是k线数据文件：{}".format(self.__file))
+        count = int(np.frombuffer(header, dtype="<i8", count=1, offset=len(MAGIC))[0])
+        return count, (os.path.getsize(self.__file) - HEADER_SIZE) // (6 * 8)
+
+    def __len__(self):
+        return self.__header()[0]
+
+    def __columns(self):
+        """
+        以内存映射方式打开数据文件，文件有新写入的数据时重新映射
+        :return: 返回(毫秒时间戳数组, 形状为(5, n)的价格与成交量数组)，均为文件中的只读视图
+        """
+        count, capacity = self.__header()
+        if count == 0:
+            return np.empty(0, dtype=np.int64), np.empty((5, 0), dtype=np.float64)
+        if self.__mapped is None or self.__mapped[:2] != (count, capacity):
+            timestamp = np.memmap(self.__file, dtype="<i8", mode="r", offset=HEADER_SIZE, shape=(capacity,))
+            prices = np.memmap(self.__file, dtype="<f8", mode="r", offset=HEADER_SIZE + capacity * 8, shape=(5, capacity))
+            self.__mapped = (count, capacity, timestamp, prices)
+        return self.__mapped[2][:count], self.__mapped[3][:, :count]
+
+    def read(self, start=None, end=None):
+        """
+        按时间范围读取k线数据
+        :param start: 开始时间（包含），ISO格式的utc时间字符串或毫秒时间戳，不填则从第一根k线开始
+        :param end: 结束时间（包含），不填则到最后一根k线
+        :return: 返回(毫秒时间戳数组, 形状为(5, n)的价格与成交量数组)，均为内存映射文件中的只读视图，不复制数据
+        """
+        timestamp, prices = self.__columns()
+        left = 0 if start is None else int(np.searchsorted(timestamp, to_ms([start])[0], side="left"))
+        right = len(timestamp) if end is None else int(np.searchsorted(timestamp, to_ms([end])[0], side="right"))
+        return timestamp[left:right], prices[:, left:right]
+
+    def first(self):
+        """第一根k线的毫秒时间戳，没有数据时返回None"""
+        timestamp = self.__columns()[0]
+        return int(timestamp[0]) if len(timestamp) else None
+
+    def last(self):
+        """最后一根k线的毫秒时间戳，没有数据时返回None"""
+        timestamp = self.__columns()[0]
+        return int(timestamp[-1]) if len(timestamp) else None
+
+    def klines(self, start=None, end=None):
+        """
+        按时间范围读取k线数据，返回与交易所k线格式相同的列表
+        :return: 返回一个列表，每根k线为[时间, 开盘价, 最高价, 最低价, 收盘价, 成交量]
+        """
+        timestamp, prices = self.read(start, end)
+        return [[t] + list(row) for t, row in zip(ms_to_utc_str(timestamp).tolist(), zip(*prices.tolist()))]
+
+    def backtest(self, start=None, end=None, lookback=None):
+        """
+        按时间范围创建回测引擎，价格与成交量直接使用内存映射文件中的数组，不复制数据
+        :return: 返回一个BACKTEST对象
+        """
+        timestamp, prices = self.read(start, end)
+        return BACKTEST.from_matrix(ms_to_utc_str(timestamp), prices, lookback)
+
+    def __write(self, timestamp, prices, capacity):
+        """将全部k线重写到新文件后替换原文件，已经映射的旧文件不受影响"""
+        count = len(timestamp)
+        temp = self.__file + ".tmp"
+        with io.open(temp, "wb") as f:
+            f.write(MAGIC + np.array([count], dtype="<i8").tobytes() + bytes(HEADER_SIZE - len(MAGIC) - 8))
+            column = np.zeros(capacity, dtype="<i8")
+            column[:count] = timestamp
+            f.write(column.tobytes())
+            column = np.zeros(capacity, dtype="<f8")
+            for row in prices:
+                column[:count] = row
+                f.write(column.tobytes())
+        self.__mapped = None
+        os.replace(temp, self.__file)
+
+    def append(self, timestamp, open, high, low, close, volume):
+        """
+        写入k线数据，新数据晚于已有数据时直接写入各列的末尾，否则与已有数据合并后重写文件。
+        时间相同的k线以新数据为准
+        :param timestamp: k线时间，ISO格式的utc时间字符串或秒/毫秒时间戳
+        :return: 返回写入后的k线数量
+        """
+        new_timestamp = to_ms(timestamp)
+        if len(new_timestamp) == 0:
+            return len(self)
+        new_prices = np.vstack([np.asarray(x, dtype=np.float64) for x in (open, high, low, close, volume)])
+        order = np.argsort(new_timestamp, kind="stable")
+        new_timestamp, new_prices = new_timestamp[order], new_prices[:, order]
+        count, capacity = self.__header()
+        last = self.last()
+        if last is None or new_timestamp[0] > last:
+            keep = np.append(new_timestamp[1:] != new_timestamp[:-1], True)   # 同一时间的k线只保留最后一条
+            new_timestamp, new_prices = new_timestamp[keep], new_prices[:, keep]
+            total = count + len(new_timestamp)
+            if total > capacity:    # 容量不足时加倍
+                timestamp, prices = self.__columns()
+                self.__write(np.concatenate((timestamp, new_timestamp)), np.hstack((prices, new_prices)),
+                             max(total, 2 * capacity, MIN_CAPACITY))
+            else:   # 先写入各列的数据，最后更新文件头中的k线数量
+                with io.open(self.__file, "r+b") as f:
+                    f.seek(HEADER_SIZE + count * 8)
+                    f.write(new_timestamp.astype("<i8").tobytes())
+                    for index, row in enumerate(new_prices):
+                        f.seek(HEADER_SIZE + (1 + index) * capacity * 8 + count * 8)
+                        f.write(row.astype("<f8").tobytes())
+                    f.flush()
+                    f.seek(len(MAGIC))
+                    f.write(np.array([total], dtype="<i8").tobytes())
+        else:
+            timestamp, prices = self.__columns()
+            all_timestamp = np.concatenate((new_timestamp[::-1], timestamp[::-1]))  # 新数据在前，去重时优先保留
+            all_prices = np.hstack((new_prices[:, ::-1], prices[:, ::-1]))
+            _, index = np.unique(all_timestamp, return_index=True)
+            self.__write(all_timestamp[index], all_prices[:, index], max(len(index), capacity))
+        return len(self)
+
+    def append_rows(self, rows):
+        """
+        写入k线列表
+        :param rows: k线列表，每根k线为[时间, 开盘价, 最高价, 最低价, 收盘价, 成交量, ...]
+        :return: 返回写入后的k线数量
+        """
+        rows = [row[:6] for row in rows]
+        if not rows:
+            return len(self)
+        columns = list(zip(*rows))
+        return self.append(columns[0], *[np.asarray(column, dtype=object).astype(np.float64) for column in columns[1:]])
+
+    def import_mysql(self, datasheet, database=None):
+        """
+        从mysql数据库导入k线数据
+        :param datasheet: 数据表名称，如"btc_1d"
+        :param database: 本地数据库名称，不填则从PureQuant服务器的数据库导入
+        :return: 返回写入后的k线数量
+        """
+        if database is None:
+            rows = storage.read_purequant_server_datas(datasheet)
+        else:
+            rows = storage.read_mysql_datas(0, database, datasheet, "open", ">")
+        return self.append_rows(rows)
+
+    def import_csv(self, path, columns=None, timezone=None, chunksize=100000):
+        """
+        从csv文件导入k线数据，分块读取，参数与read_csv()相同
+        :return: 返回写入后的k线数量
+        """
+        for chunk in read_csv(path, columns, timezone, chunksize):
+            self.append(chunk["timestamp"], *[chunk[x] for x in KLINE_DTYPE.names[1:]])
+        return len(self)
+
+    def update(self, platform, time_frame):
+        """
+        从交易所获取最新的k线数据，写入已经走完的k线
+        :param platform: 交易所对象，如OKEXFUTURES
+        :param time_frame: k线周期
+        :return: 返回写入后的k线数量
+        """
+        records = platform.get_kline(time_frame)    # 最新的k线在前，第一根尚未走完
+        return self.append_rows(records[1:])
+
+    def backfill(self, api, instrument_id, granularity, start=None, interval=0.2):
+        """
+        使用交易所的历史k线接口向前补齐k线数据，如okex的FutureAPI、SwapAPI、SpotAPI的get_history_kline
+        :param api: 交易所接口对象，须有get_history_kline(instrument_id, start, end, granularity)方法
+        :param instrument_id: 合约ID
+        :param granularity: k线周期的秒数，如"86400"
+        :param start: 补齐到此时间为止，不填则一直获取到交易所没有更早的数据
+        :param interval: 每次请求之间的间隔秒数，防止超出交易所频率限制
+        :return: 返回写入后的k线数量
+        """
+        start = None if start is None else int(to_ms([start])[0])
+        end = self.first()
+        end = "" if end is None else ms_to_utc_str([end])[0]
+        rows = []
+        while True:
+            records = api.get_history_kline(instrument_id, end=end, granularity=granularity)    # 最新的k线在前
+            if not records or records[-1][0] == end:
+                break
+            rows.extend(records)
+            end = records[-1][0]
+            if start is not None and to_ms([end])[0] <= start:
+                break
+            sleep(interval)
+        if start is not None and rows:
+            keep = to_ms([row[0] for row in rows]) >= start
+            rows = [row for row, k in zip(rows, keep) if k]
+        return self.append_rows(rows)
@@ -21,6 +21,7 @@ from purequant.push import push
 from purequant.storage import storage
 from purequant.time import *
 from purequant.config import config
+from purequant.optimize import OPTIMIZE
 
 class Strategy:
 
@@ -177,24 +178,12 @@ if __name__ == "__main__":
     if config.backtest == "enabled":  # 回测模式
         instrument_id = "LTC-USDT-201225"
         time_frame = "1d"
-        fast_length_list = range(5, 20, 2)
-        slow_length_list = range(10, 30, 2)
-        start_time = get_cur_timestamp()
-        for i in fast_length_list:
-            fast_length = i
-            for j in slow_length_list:
-                slow_length = j
-                print("策略参数为{}和{},正在回测，可能需要一段时间，请稍后...".format(fast_length, slow_length))
-                strategy = Strategy(instrument_id=instrument_id, time_frame=time_frame,
-                                    fast_length=fast_length, slow_length=slow_length,
+        data = storage.read_purequant_server_datas(instrument_id.split("-")[0].lower() + "_" + time_frame)   # 历史k线只需载入一次
+        print("正在使用全部cpu核心并行回测，可能需要一段时间，请稍后...")
+        result = OPTIMIZE(data).run(Strategy, {"fast_length": range(5, 20, 2), "slow_length": range(10, 30, 2)},
+                                    instrument_id=instrument_id, time_frame=time_frame,
                                     long_stop=0.95, short_stop=1.05, start_asset=1000)
-                records = []
-                data = storage.read_purequant_server_datas(instrument_id.split("-")[0].lower() + "_" + time_frame)
-                for k in data:
-                    records.append(k)
-                    strategy.begin_trade(kline=records)
-                cost_time = get_cur_timestamp() - start_time
-                print("回测用时{}秒，结果已保存至mysql数据库！".format(cost_time))
+        print(result.sort_values("最终资金", ascending=False))   # 按最终资金从高到低排列各组参数的回测结果
     else:   # 实盘模式
         instrument_id = "LTC-USDT-201225"
         time_frame = "1d"
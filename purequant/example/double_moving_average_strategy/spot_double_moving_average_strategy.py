@@ -16,6 +16,7 @@ from purequant.push import push
 from purequant.storage import storage
 from purequant.time import *
 from purequant.config import config
+from purequant.backtest import BACKTEST
 
 class Strategy:
 
@@ -113,13 +114,8 @@ if __name__ == "__main__":
 
     if config.backtest == "enabled":    # 回测模式
         print("正在回测，可能需要一段时间，请稍后...")
-        start_time = get_cur_timestamp()
-        records = []
         data = storage.read_purequant_server_datas(instrument_id.split("-")[0].lower() + "_" + time_frame)
-        for k in data:
-            records.append(k)
-            strategy.begin_trade(kline=records)
-        cost_time = get_cur_timestamp() - start_time
+        cost_time = BACKTEST(data).run(strategy)   # 一次性载入历史k线，逐根bar运行策略
         print("回测用时{}秒，结果已保存至mysql数据库！".format(cost_time))
     else:   # 实盘模式
         while True:     # 循环运行begin_trade函数
@@ -14,9 +14,9 @@ from purequant.position import POSITION
 from purequant.logger import logger
 from purequant.time import *
 from purequant.config import config
+from purequant.datastore import load_csv
 from purequant.push import push
 from purequant.storage import storage
-import pandas as pd
 
 class Strategy:
 
@@ -222,22 +222,12 @@ if __name__ == "__main__":
     strategy = Strategy(instrument_id, time_frame, start_asset=1000)
 
     if config.backtest == "enabled":  # 回测模式
-        """先处理csv数据"""
-        df = pd.read_csv('BTCUSD_bmx_1d_20170505-20200420.csv')  # 读取csv文件
-        order = ['candle_begin_time', 'open', 'high', 'low', 'close', 'volume']  # 列名排序
-        df = df[order]
-        df.columns = ['timestamp', 'open', 'high', 'low', 'close', 'volume']  # 重命名列
-        for i in df['timestamp']:   # 处理时间戳
-            j = ts_to_utc_str(datetime_str_to_ts(i))
-            df.replace(i, j, inplace=True)
-        data = df.values.tolist()   # 将dataframe转换成list
+        """读取csv数据，整列解析时间，直接创建回测引擎"""
+        engine = load_csv('BTCUSD_bmx_1d_20170505-20200420.csv',
+                          columns=['candle_begin_time', 'open', 'high', 'low', 'close', 'volume'],   # 时间与价格所在的列名
+                          timezone="local")     # csv中的时间为本机时区的时间
         print("正在回测，可能需要一段时间，请稍后...")
-        start_time = get_cur_timestamp()
-        records = []
-        for k in data:
-            records.append(k)
-            strategy.begin_trade(kline=records)
-        cost_time = get_cur_timestamp() - start_time
+        cost_time = engine.run(strategy)   # 逐根bar运行策略
         print("回测用时{}秒，结果已保存至mysql数据库！".format(cost_time))
     else:  # 实盘模式
         while True:  # 循环运行begin_trade函数
@@ -42,4 +42,7 @@ class GetPositionError(CunstomException):
     defaul_msg = "查询持仓失败！"
 
 class SetMarginModeError(CunstomException):
-    defaul_msg = "设置合约币种账户模式失败！"
\ No newline at end of file
+    defaul_msg = "设置合约币种账户模式失败！"
+
+class BacktestError(CunstomException):
+    defaul_msg = "尚未运行回测，请先调用run()！"
@@ -1,8 +1,7 @@
-import hmac
-import hashlib
 import logging
-import requests
 import time
+from purequant.signer import signer
+from purequant.transport import transport, async_transport
 from purequant.time import get_cur_timestamp_ms
 try:
     from urllib import urlencode
@@ -33,6 +32,8 @@ def set(apiKey, secret):
     """
     options["apiKey"] = apiKey
     options["secret"] = secret
+    options["signer"] = signer(secret)
+    options["headers"] = {"X-MBX-APIKEY": apiKey}
 
 def balance():
     """获取账户余额"""
@@ -188,26 +189,47 @@ def myTrades(symbol, **kwargs):
 
 
 def request(method, path, params=None):
-    resp = requests.request(method, ENDPOINT + path, params=params)
+    resp = transport.request(method, ENDPOINT + path, params=params)
     data = resp.json()
     if "msg" in data:
         logging.error(data['msg'])
     return data
 
 
-def signedRequest(method, path, params):
+def signedUrl(path, params):
+    """Return the signed url of a private endpoint."""
     if "apiKey" not in options or "secret" not in options:
         raise ValueError("Api key and secret must be set")
 
     query = urlencode(sorted(params.items()))
     query += "&timestamp={}".format(get_cur_timestamp_ms() - 1000)
-    secret = bytes(options["secret"].encode("utf-8"))
-    signature = hmac.new(secret, query.encode("utf-8"),
-                         hashlib.sha256).hexdigest()
+    signature = options["signer"].hexdigest(query)
     query += "&signature={}".format(signature)
-    resp = requests.request(method,
-                            ENDPOINT + path + "?" + query,
-                            headers={"X-MBX-APIKEY": options["apiKey"]})
+    return ENDPOINT + path + "?" + query
+
+
+def signedRequest(method, path, params):
+    resp = transport.request(method,
+                             signedUrl(path, params),
+                             headers=options["headers"])
+    data = resp.json()
+    if "msg" in data:
+        logging.error(data['msg'])
+    return data
+
+
+async def asyncRequest(method, path, params=None):
+    resp = await async_transport.request(method, ENDPOINT + path, params=params)
+    data = resp.json()
+    if "msg" in data:
+        logging.error(data['msg'])
+    return data
+
+
+async def asyncSignedRequest(method, path, params):
+    resp = await async_transport.request(method,
+                                         signedUrl(path, params),
+                                         headers=options["headers"])
     data = resp.json()
     if "msg" in data:
         logging.error(data['msg'])
@@ -254,4 +276,59 @@ def set_margin_mode(symbol, marginType):
     params = {"symbol": symbol,
               "marginType": marginType}     # 保证金模式 ISOLATED(逐仓), CROSSED(全仓)
     data = signedRequest("POST", "/dapi/v1/marginType", params)
-    return data
\ No newline at end of file
+    return data
+
+
+# Coroutine versions of the calls used by purequant.aiotrade, same arguments and results as above.
+async def asyncDepth(symbol, **kwargs):
+    params = {"symbol": symbol}
+    params.update(kwargs)
+    data = await asyncRequest("GET", "/dapi/v1/depth", params)
+    return {
+        "bids": data["bids"],
+        "asks": data["asks"]
+    }
+
+
+async def asyncKlines(symbol, interval, **kwargs):
+    params = {"symbol": symbol, "interval": interval}
+    params.update(kwargs)
+    return await asyncRequest("GET", "/dapi/v1/klines", params)
+
+
+async def asyncGetTicker(symbol):
+    return await asyncRequest("GET", "/dapi/v1/ticker/price", {"symbol": symbol})
+
+
+async def asyncPosition():
+    data = await asyncSignedRequest("GET", "/dapi/v1/positionRisk", {})
+    if 'msg' in data:
+        raise ValueError("Error from exchange: {}".format(data['msg']))
+    return data
+
+
+async def asyncOrder(symbol, side, quantity, price, orderType=LIMIT, positionSide=None, timeInForce=GTC, **kwargs):
+    positionSide = "BOTH" if positionSide is None else positionSide
+    params = {
+        "symbol": symbol,
+        "side": side,
+        "type": orderType,
+        "positionSide": positionSide,
+        "timeInForce": timeInForce,
+        "quantity": formatNumber(quantity),
+        "price": formatNumber(price)
+    }
+    params.update(kwargs)
+    return await asyncSignedRequest("POST", "/dapi/v1/order", params)
+
+
+async def asyncOrderStatus(symbol, **kwargs):
+    params = {"symbol": symbol}
+    params.update(kwargs)
+    return await asyncSignedRequest("GET", "/dapi/v1/order", params)
+
+
+async def asyncCancel(symbol, **kwargs):
+    params = {"symbol": symbol}
+    params.update(kwargs)
+    return await asyncSignedRequest("DELETE", "/dapi/v1/order", params)
@@ -1,8 +1,7 @@
-import hmac
-import hashlib
 import logging
-import requests
 import time
+from purequant.signer import signer
+from purequant.transport import transport
 from purequant.time import get_cur_timestamp_ms
 try:
     from urllib import urlencode
@@ -33,6 +32,8 @@ def set(apiKey, secret):
     """
     options["apiKey"] = apiKey
     options["secret"] = secret
+    options["signer"] = signer(secret)
+    options["headers"] = {"X-MBX-APIKEY": apiKey}
 
 def balance():
     """获取账户余额"""
@@ -188,7 +189,7 @@ def myTrades(symbol, **kwargs):
 
 
 def request(method, path, params=None):
-    resp = requests.request(method, ENDPOINT + path, params=params)
+    resp = transport.request(method, ENDPOINT + path, params=params)
     data = resp.json()
     if "msg" in data:
         logging.error(data['msg'])
@@ -201,13 +202,11 @@ def signedRequest(method, path, params):
 
     query = urlencode(sorted(params.items()))
     query += "&timestamp={}".format(get_cur_timestamp_ms() - 1000)
-    secret = bytes(options["secret"].encode("utf-8"))
-    signature = hmac.new(secret, query.encode("utf-8"),
-                         hashlib.sha256).hexdigest()
+    signature = options["signer"].hexdigest(query)
     query += "&signature={}".format(signature)
-    resp = requests.request(method,
-                            ENDPOINT + path + "?" + query,
-                            headers={"X-MBX-APIKEY": options["apiKey"]})
+    resp = transport.request(method,
+                             ENDPOINT + path + "?" + query,
+                             headers=options["headers"])
     data = resp.json()
     if "msg" in data:
         logging.error(data['msg'])
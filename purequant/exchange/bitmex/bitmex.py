@@ -2,11 +2,10 @@
 This is the bitmex REST API python call.
 Official documentation can be found at 'https://www.bitmex.com/api/explorer/'
 """
-import hmac
-import hashlib
-import requests
 import time
 import sys
+from purequant.transport import transport, async_transport
+from purequant.signer import signer
 from urllib.parse import urlencode
 
 REAL_BASE = 'https://www.bitmex.com/api/v1'
@@ -897,7 +896,7 @@ class Bitmex(object):
 
         fullURL = "{0}{1}{2}".format(self.BASE_URL, path, query)
 
-        apiResponse = requests.request(method, fullURL)
+        apiResponse = transport.request(method, fullURL)
 
         data = apiResponse.json()
 
@@ -907,6 +906,16 @@ class Bitmex(object):
         """
         This is used to get signed API requests
         """
+        fullURL, headers = self.sign_request(method, path, params)
+        apiResponse = transport.request(method, fullURL, headers=headers)
+        data = apiResponse.json()
+
+        return (data)
+
+    def sign_request(self, method, path, params=None):
+        """
+        This returns the url and the authentication headers of a signed request
+        """
         query = ""
         if self.api_key == '' or self.api_secret == '':
             raise ValueError("Make sure you entered your API key/secret")
@@ -920,7 +929,7 @@ class Bitmex(object):
         fullURL = bytes("{0}{1}{2}".format(self.BASE_URL, path, query), 'utf-8')
         signURL = bytes('{0}/api/v1{1}{2}{3}'.format(method, path, query, nonce), 'utf-8')
 
-        signature = hmac.new(bytes(self.api_secret, 'utf-8'), signURL, digestmod=hashlib.sha256).hexdigest()
+        signature = signer(self.api_secret).hexdigest(signURL)
 
         headers = {
             "api-nonce": str(nonce),
@@ -928,7 +937,25 @@ class Bitmex(object):
             "api-signature": signature
         }
 
-        apiResponse = requests.request(method, fullURL, headers=headers)
-        data = apiResponse.json()
+        return fullURL, headers
+
+
+class AsyncBitmex(Bitmex):
+    """
+    Bitmex whose requests are sent through async_transport, every API method returns a coroutine
+    """
+
+    async def api_request(self, method, path, params=None):
+        query = ""
+        if params != None and params != {}:
+            encodedParams = urlencode(sorted(params.items()))
+            query = "?{0}".format(encodedParams)
+
+        fullURL = "{0}{1}{2}".format(self.BASE_URL, path, query)
+        apiResponse = await async_transport.request(method, fullURL)
+        return apiResponse.json()
 
-        return (data)
\ No newline at end of file
+    async def api_signed_request(self, method, path, params=None):
+        fullURL, headers = self.sign_request(method, path, params)
+        apiResponse = await async_transport.request(method, fullURL, headers=headers)
+        return apiResponse.json()
@@ -7,8 +7,9 @@ import logging
 import math
 import time
 import urllib
-import hmac
-import hashlib
+from bisect import bisect_left
+from purequant import codec
+from purequant.signer import signer
 
 
 def generate_nonce():
@@ -38,7 +39,7 @@ def generate_signature(secret, verb, url, nonce, data):
     # print "Computing HMAC: %s" % verb + path + str(nonce) + data
     message = (verb + path + str(nonce) + data).encode('utf-8')
 
-    signature = hmac.new(secret.encode('utf-8'), message, digestmod=hashlib.sha256).hexdigest()
+    signature = signer(secret).hexdigest(message)
     return signature
 
 # Naive implementation of connecting to BitMEX websocket for streaming realtime data.
@@ -72,6 +73,8 @@ class BitMEXWebsocket:
 
         self.data = {}
         self.keys = {}
+        self.index = {}     # table -> {key tuple: row}, so updates and deletes don't scan the table
+        self.book = OrderBookL2()
         self.exited = False
 
         # We can subscribe right in the connection querystring, so let's build that.
@@ -120,8 +123,20 @@ class BitMEXWebsocket:
         return self.data['position']
 
     def market_depth(self):
-        '''Get market depth (orderbook). Returns all levels.'''
-        return self.data['orderBookL2']
+        '''Get market depth (orderbook). Returns all levels, sells then buys, each by descending price.'''
+        return self.book.levels()
+
+    def bids(self):
+        '''Buy side of the orderbook, best (highest) price first.'''
+        return self.book.bids()
+
+    def depth_version(self):
+        '''Goes up by one for every orderbook message, so readers can tell whether the book changed.'''
+        return self.book.version
+
+    def asks(self):
+        '''Sell side of the orderbook, best (lowest) price first.'''
+        return self.book.asks()
 
     def open_orders(self, clOrdIDPrefix):
         '''Get all your open orders.'''
@@ -216,8 +231,8 @@ class BitMEXWebsocket:
 
     def __on_message(self, message):
         '''Handler for parsing WS messages.'''
-        message = json.loads(message)
-        self.logger.debug(json.dumps(message))
+        self.logger.debug(message)
+        message = codec.loads(message)
 
         table = message.get("table")
         action = message.get("action")
@@ -226,6 +241,17 @@ class BitMEXWebsocket:
                 self.logger.debug("Subscribed to %s." % message['subscribe'])
             elif action:
 
+                if table == 'orderBookL2':
+                    # The book is keyed by id and kept sorted per side, see OrderBookL2.
+                    self.logger.debug("%s: %s" % (table, action))
+                    if action not in ('partial', 'insert', 'update', 'delete'):
+                        raise Exception("Unknown action: %s" % action)
+                    if action == 'partial':
+                        self.keys[table] = message['keys']
+                        self.data[table] = self.book
+                    getattr(self.book, action)(message['data'], self.keys.get(table, []))
+                    return
+
                 if table not in self.data:
                     self.data[table] = []
 
@@ -238,39 +264,61 @@ class BitMEXWebsocket:
                     self.logger.debug("%s: partial" % table)
                     self.data[table] = message['data']
                     # Keys are communicated on partials to let you know how to uniquely identify
-                    # an item. We use it for updates.
+                    # an item. We use them to index the rows for updates.
                     self.keys[table] = message['keys']
+                    self.__reindex(table)
                 elif action == 'insert':
                     self.logger.debug('%s: inserting %s' % (table, message['data']))
                     self.data[table] += message['data']
+                    index = self.index.get(table)
+                    if index is not None:
+                        keys = self.keys[table]
+                        for item in message['data']:
+                            index[row_key(keys, item)] = item
 
                     # Limit the max length of the table to avoid excessive memory usage.
                     # Don't trim orders because we'll lose valuable state if we do.
                     if table not in ['order', 'orderBookL2'] and len(self.data[table]) > BitMEXWebsocket.MAX_TABLE_LEN:
                         self.data[table] = self.data[table][BitMEXWebsocket.MAX_TABLE_LEN // 2:]
+                        self.__reindex(table)
 
                 elif action == 'update':
                     self.logger.debug('%s: updating %s' % (table, message['data']))
                     # Locate the item in the collection and update it.
+                    keys, index = self.keys[table], self.index.get(table)
                     for updateData in message['data']:
-                        item = find_by_keys(self.keys[table], self.data[table], updateData)
+                        if index is not None:
+                            item = index.get(row_key(keys, updateData))
+                        else:   # Tables without keys aren't indexed
+                            item = find_by_keys(keys, self.data[table], updateData)
                         if not item:
                             return  # No item found to update. Could happen before push
                         item.update(updateData)
                         # Remove cancelled / filled orders
                         if table == 'order' and not order_leaves_quantity(item):
                             self.data[table].remove(item)
+                            if index is not None:
+                                del index[row_key(keys, item)]
                 elif action == 'delete':
                     self.logger.debug('%s: deleting %s' % (table, message['data']))
                     # Locate the item in the collection and remove it.
+                    keys, index = self.keys[table], self.index.get(table)
                     for deleteData in message['data']:
-                        item = find_by_keys(self.keys[table], self.data[table], deleteData)
+                        if index is not None:
+                            item = index.pop(row_key(keys, deleteData))
+                        else:
+                            item = find_by_keys(keys, self.data[table], deleteData)
                         self.data[table].remove(item)
                 else:
                     raise Exception("Unknown action: %s" % action)
         except:
             self.logger.error(traceback.format_exc())
 
+    def __reindex(self, table):
+        '''Rebuild the key index of a table. Tables without keys get None and are searched with find_by_keys.'''
+        keys = self.keys.get(table)
+        self.index[table] = {row_key(keys, item): item for item in self.data[table]} if keys else None
+
     def __on_error(self, error):
         '''Called on fatal websocket errors. We exit on these.'''
         if not self.exited:
@@ -298,6 +346,115 @@ def find_by_keys(keys, table, matchData):
         if all(item[k] == matchData[k] for k in keys):
             return item
 
+def row_key(keys, row):
+    '''The tuple of key fields that uniquely identifies a row, used as the index key.'''
+    return tuple(row[k] for k in keys)
+
+
+class BookSide:
+    '''One side of orderBookL2, rows keyed by price and kept sorted with the best price first.'''
+
+    def __init__(self, descending):
+        self.descending = descending
+        self.rows = {}      # sort key (price, negated for buys) -> row
+        self.prices = []    # sorted sort keys
+        self.view = []      # rows in price order, rebuilt on the first read after an insert or delete
+        self.stale = False
+
+    def put(self, row):
+        key = -row['price'] if self.descending else row['price']
+        new = key not in self.rows
+        self.rows[key] = row
+        if new:
+            self.prices.insert(bisect_left(self.prices, key), key)
+            self.stale = True
+
+    def remove(self, row):
+        key = -row['price'] if self.descending else row['price']
+        if self.rows.pop(key, None) is not None:
+            del self.prices[bisect_left(self.prices, key)]
+            self.stale = True
+
+    def sorted(self):
+        # Size updates modify the row dicts in place, so the view only goes stale when levels come or go.
+        if self.stale:
+            self.stale = False      # cleared first, so a change made while rebuilding marks the view stale again
+            # The strategy thread reads while the websocket thread writes: copy the keys in one step and skip
+            # levels whose row was removed in the meantime instead of raising KeyError.
+            get = self.rows.get
+            self.view = [row for row in map(get, list(self.prices)) if row is not None]
+        return self.view
+
+
+class OrderBookL2:
+    '''
+    The orderBookL2 table. Rows are indexed by the partial's keys (symbol, id, side), and each side is kept
+    sorted by price, so inserts, updates and deletes are O(log n) at worst instead of a scan of the whole book.
+    Update and delete messages only carry the keys and the new size, the price comes from the indexed row.
+    version goes up by one for every message that changes the book.
+    '''
+
+    def __init__(self):
+        self.index = {}
+        self.sides = {"Buy": BookSide(descending=True), "Sell": BookSide(descending=False)}
+        self.version = 0
+        self.__levels = None
+        self.__levels_version = -1
+
+    def partial(self, rows, keys):
+        self.index = {}
+        self.sides = {"Buy": BookSide(descending=True), "Sell": BookSide(descending=False)}
+        self.insert(rows, keys)
+
+    def insert(self, rows, keys):
+        for row in rows:
+            self.index[row_key(keys, row)] = row
+            self.sides[row['side']].put(row)
+        self.version += 1
+
+    def update(self, rows, keys):
+        for data in rows:
+            row = self.index.get(row_key(keys, data))
+            if row is None:
+                continue    # No level found to update. Could happen before the partial
+            if 'price' in data and data['price'] != row['price']:
+                self.sides[row['side']].remove(row)
+                row.update(data)
+                self.sides[row['side']].put(row)
+            else:
+                row.update(data)
+        self.version += 1
+
+    def delete(self, rows, keys):
+        for data in rows:
+            row = self.index.pop(row_key(keys, data), None)
+            if row is not None:
+                self.sides[row['side']].remove(row)
+        self.version += 1
+
+    def bids(self):
+        '''Buy rows, highest price first.'''
+        return self.sides["Buy"].sorted()
+
+    def asks(self):
+        '''Sell rows, lowest price first.'''
+        return self.sides["Sell"].sorted()
+
+    def levels(self):
+        '''All rows in the order of the REST orderBook: sells then buys, each by descending price.'''
+        version = self.version
+        if self.__levels_version != version:
+            self.__levels = self.asks()[::-1] + self.bids()
+            self.__levels_version = version
+        return self.__levels
+
+    def __iter__(self):
+        return iter(self.levels())
+
+    def __len__(self):
+        return len(self.index)
+
+
 def order_leaves_quantity(o):
     if o['leavesQty'] is None:
         return True
@@ -1,13 +1,12 @@
-import base64
 import datetime
-import hashlib
-import hmac
 import json
 import urllib
 import urllib.parse
 import urllib.request
-import requests
 import pandas as pd
+from purequant.transport import transport
+from purequant.signer import signer
+from purequant.exchange.huobi.util import signed_query, parse_host_name
 
 # In general, the domain api-aws.huobi.pro is optimized for AWS client, the latency will be lower.
 MARKET_URL = "https://api.huobi.pro"
@@ -510,7 +509,7 @@ class HuobiSVC:
         if add_to_headers:
             headers.update(add_to_headers)
         postdata = urllib.parse.urlencode(params)
-        response = requests.get(url, postdata, headers=headers, timeout=5)
+        response = transport.get(url, postdata, headers=headers, timeout=5)
         try:
 
             if response.status_code == 200:
@@ -529,7 +528,7 @@ class HuobiSVC:
         if add_to_headers:
             headers.update(add_to_headers)
         postdata = json.dumps(params)
-        response = requests.post(url, postdata, headers=headers, timeout=10)
+        response = transport.post(url, postdata, headers=headers, timeout=10)
 
         try:
 
@@ -558,18 +557,8 @@ class HuobiSVC:
         return self.http_get_request(url, params)
 
     def api_key_post(self, params, request_path):
-        method = 'POST'
-        timestamp = datetime.datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S')
-        params_to_sign = {'AccessKeyId': self.access_key,
-                          'SignatureMethod': 'HmacSHA256',
-                          'SignatureVersion': '2',
-                          'Timestamp': timestamp}
-
-        host_url = self.trade_url
-        host_name = urllib.parse.urlparse(host_url).hostname
-        host_name = host_name.lower()
-        params_to_sign['Signature'] = self.createSign(params_to_sign, method, host_name, request_path, self.secret_key)
-        url = host_url + request_path + '?' + urllib.parse.urlencode(params_to_sign)
+        query = signed_query('POST', parse_host_name(self.trade_url), request_path, self.access_key, self.secret_key)
+        url = self.trade_url + request_path + '?' + query
         return self.http_post_request(url, params)
 
     def createSign(self, pParams, method, host_url, request_path, secret_key):
@@ -577,11 +566,7 @@ class HuobiSVC:
         encode_params = urllib.parse.urlencode(sorted_params)
         payload = [method, host_url, request_path, encode_params]
         payload = '\n'.join(payload)
-        payload = payload.encode(encoding='UTF8')
-        secret_key = secret_key.encode(encoding='UTF8')
-
-        digest = hmac.new(secret_key, payload, digestmod=hashlib.sha256).digest()
-        signature = base64.b64encode(digest)
+        signature = signer(secret_key).b64digest(payload)
         signature = signature.decode()
         return signature
 
@@ -5,7 +5,7 @@
 """
 
 
-from purequant.exchange.huobi.util import http_get_request, api_key_post
+from purequant.exchange.huobi.util import http_get_request, api_key_post, async_http_get_request, async_api_key_post
 
 
 class HuobiSwap:
@@ -334,4 +334,72 @@ class HuobiSwap:
         return api_key_post(self.__url, request_path, params, self.__access_key, self.__secret_key)
 
 
+class AsyncHuobiSwap:
+    """
+    火币永续合约的异步接口，只包含行情、持仓与下单撤单查询，参数与HuobiSwap中的同名方法相同，返回协程
+    """
 
+    def __init__(self, access_key, secret_key):
+        self.__url = 'https://api.hbdm.com'
+        self.__access_key = access_key
+        self.__secret_key = secret_key
+
+    async def get_contract_depth(self, contract_code, type):
+        params = {'contract_code': contract_code,
+                  'type': type}
+        url = self.__url + '/swap-ex/market/depth'
+        return await async_http_get_request(url, params)
+
+    async def get_contract_kline(self, contract_code, period, size=150):
+        params = {'contract_code': contract_code,
+                  'period': period}
+        if size:
+            params['size'] = size
+        url = self.__url + '/swap-ex/market/history/kline'
+        return await async_http_get_request(url, params)
+
+    async def get_contract_market_merged(self, contract_code):
+        params = {'contract_code': contract_code}
+        url = self.__url + '/swap-ex/market/detail/merged'
+        return await async_http_get_request(url, params)
+
+    async def get_contract_position_info(self, contract_code=''):
+        params = {}
+        if contract_code:
+            params["contract_code"] = contract_code
+        request_path = '/swap-api/v1/swap_position_info'
+        return await async_api_key_post(self.__url, request_path, params, self.__access_key, self.__secret_key)
+
+    async def send_contract_order(self, contract_code,
+                                  client_order_id, price, volume, direction, offset,
+                                  lever_rate, order_price_type):
+        params = {"price": price,
+                  "volume": volume,
+                  "direction": direction,
+                  "offset": offset,
+                  "lever_rate": lever_rate,
+                  "order_price_type": order_price_type}
+        if contract_code:
+            params['contract_code'] = contract_code
+        if client_order_id:
+            params['client_order_id'] = client_order_id
+        request_path = '/swap-api/v1/swap_order'
+        return await async_api_key_post(self.__url, request_path, params, self.__access_key, self.__secret_key)
+
+    async def cancel_contract_order(self, contract_code, order_id='', client_order_id=''):
+        params = {"contract_code": contract_code}
+        if order_id:
+            params["order_id"] = order_id
+        if client_order_id:
+            params["client_order_id"] = client_order_id
+        request_path = '/swap-api/v1/swap_cancel'
+        return await async_api_key_post(self.__url, request_path, params, self.__access_key, self.__secret_key)
+
+    async def get_contract_order_info(self, contract_code, order_id='', client_order_id=''):
+        params = {"contract_code": contract_code}
+        if order_id:
+            params["order_id"] = order_id
+        if client_order_id:
+            params["client_order_id"] = client_order_id
+        request_path = '/swap-api/v1/swap_order_info'
+        return await async_api_key_post(self.__url, request_path, params, self.__access_key, self.__secret_key)
@@ -4,30 +4,34 @@
 火币
 """
 
-import base64
-import hmac
-import hashlib
 import json
 
 import urllib
 import datetime
-import requests
+import functools
+from purequant.transport import transport, async_transport
+from purequant.signer import signer
 #import urlparse   # urllib.parse in python 3
 
 # timeout in 5 seconds:
 TIMEOUT = 5
 
+GET_HEADERS = {
+    "Content-type": "application/x-www-form-urlencoded",
+    'User-Agent':'Mozilla/5.0 (Windows NT 6.1; WOW64; rv:53.0) Gecko/20100101 Firefox/53.0'
+}
+POST_HEADERS = {
+    "Accept": "application/json",
+    'Content-Type': 'application/json',
+    'User-Agent':'Mozilla/5.0 (Windows NT 6.1; WOW64; rv:53.0) Gecko/20100101 Firefox/53.0'
+}
+
 #各种请求,获取数据方式
 def http_get_request(url, params, add_to_headers=None):
-    headers = {
-        "Content-type": "application/x-www-form-urlencoded",
-        'User-Agent':'Mozilla/5.0 (Windows NT 6.1; WOW64; rv:53.0) Gecko/20100101 Firefox/53.0'
-    }
-    if add_to_headers:
-        headers.update(add_to_headers)
+    headers = dict(GET_HEADERS, **add_to_headers) if add_to_headers else GET_HEADERS
     postdata = urllib.parse.urlencode(params)
     try:
-        response = requests.get(url, postdata, headers=headers, timeout=TIMEOUT)
+        response = transport.get(url, postdata, headers=headers, timeout=TIMEOUT)
         if response.status_code == 200:
             return response.json()
         else:
@@ -37,16 +41,10 @@ def http_get_request(url, params, add_to_headers=None):
         return {"status":"fail","msg": "%s"%e}
 
 def http_post_request(url, params, add_to_headers=None):
-    headers = {
-        "Accept": "application/json",
-        'Content-Type': 'application/json',
-        'User-Agent':'Mozilla/5.0 (Windows NT 6.1; WOW64; rv:53.0) Gecko/20100101 Firefox/53.0'
-    }
-    if add_to_headers:
-        headers.update(add_to_headers)
+    headers = dict(POST_HEADERS, **add_to_headers) if add_to_headers else POST_HEADERS
     postdata = json.dumps(params)
     try:
-        response = requests.post(url, postdata, headers=headers, timeout=TIMEOUT)
+        response = transport.post(url, postdata, headers=headers, timeout=TIMEOUT)
         if response.status_code == 200:
             return response.json()
         else:
@@ -75,32 +73,68 @@ def api_key_get(url, request_path, params, ACCESS_KEY, SECRET_KEY):
 
 
 def api_key_post(url, request_path, params, ACCESS_KEY, SECRET_KEY):
-    method = 'POST'
-    timestamp = datetime.datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S')
-    params_to_sign = {'AccessKeyId': ACCESS_KEY,
-                      'SignatureMethod': 'HmacSHA256',
-                      'SignatureVersion': '2',
-                      'Timestamp': timestamp}
-
-    host_url = url
-    #host_name = urlparse.urlparse(host_url).hostname
-    host_name = urllib.parse.urlparse(host_url).hostname
-    host_name = host_name.lower()
-    params_to_sign['Signature'] = createSign(params_to_sign, method, host_name, request_path, SECRET_KEY)
-    url = host_url + request_path + '?' + urllib.parse.urlencode(params_to_sign)
+    url = url + request_path + '?' + signed_query('POST', parse_host_name(url), request_path, ACCESS_KEY, SECRET_KEY)
     return http_post_request(url, params)
 
 
+async def async_http_get_request(url, params, add_to_headers=None):
+    headers = dict(GET_HEADERS, **add_to_headers) if add_to_headers else GET_HEADERS
+    postdata = urllib.parse.urlencode(params)
+    try:
+        response = await async_transport.get(url, postdata, headers=headers, timeout=TIMEOUT)
+        if response.status_code == 200:
+            return response.json()
+        else:
+            return {"status":"fail"}
+    except Exception as e:
+        print("httpGet failed, detail is:%s" %e)
+        return {"status":"fail","msg": "%s"%e}
+
+async def async_http_post_request(url, params, add_to_headers=None):
+    headers = dict(POST_HEADERS, **add_to_headers) if add_to_headers else POST_HEADERS
+    postdata = json.dumps(params)
+    try:
+        response = await async_transport.post(url, postdata, headers=headers, timeout=TIMEOUT)
+        return response.json()
+    except Exception as e:
+        print("httpPost failed, detail is:%s" % e)
+        return {"status":"fail","msg": "%s"%e}
+
+
+async def async_api_key_post(url, request_path, params, ACCESS_KEY, SECRET_KEY):
+    url = url + request_path + '?' + signed_query('POST', parse_host_name(url), request_path, ACCESS_KEY, SECRET_KEY)
+    return await async_http_post_request(url, params)
+
+
 def createSign(pParams, method, host_url, request_path, secret_key):
     sorted_params = sorted(pParams.items(), key=lambda d: d[0], reverse=False)
     encode_params = urllib.parse.urlencode(sorted_params)
     payload = [method, host_url, request_path, encode_params]
     payload = '\n'.join(payload)
-    payload = payload.encode(encoding='UTF8')
-    secret_key = secret_key.encode(encoding='UTF8')
-    digest = hmac.new(secret_key, payload, digestmod=hashlib.sha256).digest()
-    signature = base64.b64encode(digest)
+    signature = signer(secret_key).b64digest(payload)
     signature = signature.decode()
     return signature
 
 
+@functools.lru_cache(maxsize=None)
+def parse_host_name(url):
+    return urllib.parse.urlparse(url).hostname.lower()
+
+
+@functools.lru_cache(maxsize=None)
+def signed_prefix(ACCESS_KEY):
+    # the fixed signature params, already in sorted order and url-encoded, only the timestamp follows
+    return urllib.parse.urlencode([('AccessKeyId', ACCESS_KEY),
+                                   ('SignatureMethod', 'HmacSHA256'),
+                                   ('SignatureVersion', '2')]) + '&Timestamp='
+
+
+def signed_query(method, host_url, request_path, ACCESS_KEY, SECRET_KEY):
+    """query string of a request signed with only the fixed params (POST), without sorting and encoding them every time"""
+    timestamp = datetime.datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S')
+    query = signed_prefix(ACCESS_KEY) + urllib.parse.quote_plus(timestamp)
+    payload = '\n'.join([method, host_url, request_path, query])
+    signature = signer(SECRET_KEY).b64digest(payload).decode()
+    return query + '&Signature=' + urllib.parse.quote_plus(signature)
+
+
@@ -12,6 +12,7 @@ import traceback
 from purequant.storage import storage
 from purequant.config import config
 from purequant.push import push
+from purequant import codec
 
 
 def generate_signature(host, method, params, request_path, secret_key):
@@ -71,7 +72,7 @@ async def subscribe(url, access_key, secret_key, subs, callback=None, auth=False
             print(f"send: {sub_str}")
         while True:
             rsp = await websocket.recv()
-            data = json.loads(gzip.decompress(rsp).decode())
+            data = codec.loads(gzip.decompress(rsp))
             # print(f"recevie<--: {data}")
             if "op" in data and data.get("op") == "ping":
                 pong_msg = {"op": "pong", "ts": data.get("ts")}
@@ -108,7 +109,7 @@ async def huobi_swap_position_subscribe(url, access_key, secret_key, subs, callb
             print(f"send: {sub_str}")
         while True:
             rsp = await websocket.recv()
-            data = json.loads(gzip.decompress(rsp).decode())
+            data = codec.loads(gzip.decompress(rsp))
             # print(f"recevie<--: {data}")
             if "op" in data and data.get("op") == "ping":
                 pong_msg = {"op": "pong", "ts": data.get("ts")}
@@ -145,7 +146,7 @@ async def huobi_swap_position_subscribe(url, access_key, secret_key, subs, callb
             print(f"send: {sub_str}")
         while True:
             rsp = await websocket.recv()
-            data = json.loads(gzip.decompress(rsp).decode())
+            data = codec.loads(gzip.decompress(rsp))
             # print(f"recevie<--: {data}")
             if "op" in data and data.get("op") == "ping":
                 pong_msg = {"op": "pong", "ts": data.get("ts")}
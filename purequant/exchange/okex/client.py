@@ -1,5 +1,7 @@
-import requests
 import json
+from purequant.transport import transport, async_transport
+from purequant.clock import clock
+from purequant.signer import signer
 from . import consts as c, utils, exceptions
 
 
@@ -13,6 +15,11 @@ class Client(object):
         self.use_server_time = use_server_time
         self.first = first
         self.test = test
+        self.signer = signer(api_secret_key)
+        # header fields that are the same on every request, only the sign and timestamp are added per request
+        self.header = {c.CONTENT_TYPE: c.APPLICATION_JSON, c.OK_ACCESS_KEY: api_key, c.OK_ACCESS_PASSPHRASE: passphrase}
+        if test:
+            self.header['x-simulated-trading'] = '1'
 
     def _request(self, method, request_path, params, cursor=False):
         if method == c.GET:
@@ -25,15 +32,13 @@ class Client(object):
 
         # sign & header
         if self.use_server_time:
-            # 获取服务器时间
-            timestamp = self._get_timestamp()
+            # 服务器时间，由本机时间加上缓存的偏差得到
+            timestamp = utils.get_server_timestamp()
 
         body = json.dumps(params) if method == c.POST else ""
-        sign = utils.sign(utils.pre_hash(timestamp, method, request_path, str(body)), self.API_SECRET_KEY)
-        header = utils.get_header(self.API_KEY, sign, timestamp, self.PASSPHRASE)
-
-        if self.test:
-            header['x-simulated-trading'] = '1'
+        header = self.header.copy()
+        header[c.OK_ACCESS_SIGN] = self.signer.b64digest(utils.pre_hash(timestamp, method, request_path, str(body)))
+        header[c.OK_ACCESS_TIMESTAMP] = str(timestamp)
         if self.first:
             print("url:", url)
             self.first = False
@@ -45,11 +50,11 @@ class Client(object):
         # send request
         response = None
         if method == c.GET:
-            response = requests.get(url, headers=header)
+            response = transport.get(url, headers=header)
         elif method == c.POST:
-            response = requests.post(url, data=body, headers=header)
+            response = transport.post(url, data=body, headers=header)
         elif method == c.DELETE:
-            response = requests.delete(url, headers=header)
+            response = transport.delete(url, headers=header)
 
         # exception handle
         if not str(response.status_code).startswith('2'):
@@ -78,7 +83,56 @@ class Client(object):
 
     def _get_timestamp(self):
         url = c.API_URL + c.SERVER_TIMESTAMP_URL
-        response = requests.get(url)
+        response = transport.get(url)
+        if response.status_code == 200:
+            return response.json()['iso']
+        else:
+            return ""
+
+
+class AsyncClient(Client):
+    """Client whose requests are sent through async_transport, API methods return coroutines"""
+
+    async def _request(self, method, request_path, params, cursor=False):
+        if method == c.GET:
+            request_path = request_path + utils.parse_params_to_str(params)
+        url = c.API_URL + request_path
+        timestamp = utils.get_timestamp()
+        if self.use_server_time:
+            if not clock.synced("okex"):
+                sent_ms = clock.local_ms()
+                response = await async_transport.get(c.API_URL + c.SERVER_TIMESTAMP_URL)
+                clock.update("okex", float(response.json()['epoch']) * 1000, sent_ms, clock.local_ms())
+            timestamp = utils.get_server_timestamp()
+
+        body = json.dumps(params) if method == c.POST else ""
+        header = self.header.copy()
+        header[c.OK_ACCESS_SIGN] = self.signer.b64digest(utils.pre_hash(timestamp, method, request_path, str(body)))
+        header[c.OK_ACCESS_TIMESTAMP] = str(timestamp)
+
+        response = await async_transport.request(method, url, data=body or None, headers=header)
+
+        # exception handle
+        if not str(response.status_code).startswith('2'):
+            raise exceptions.OkexAPIException(response)
+        try:
+            if cursor:
+                r = dict()
+                try:
+                    r['before'] = response.headers['OK-BEFORE']
+                    r['after'] = response.headers['OK-AFTER']
+                except:
+                    pass
+                return response.json(), r
+            else:
+                return response.json()
+
+        except ValueError:
+            raise exceptions.OkexRequestException('Invalid Response: %s' % response.text)
+
+    async def _get_timestamp(self):
+        url = c.API_URL + c.SERVER_TIMESTAMP_URL
+        response = await async_transport.get(url)
         if response.status_code == 200:
             return response.json()['iso']
         else:
@@ -1,4 +1,4 @@
-from .client import Client
+from .client import Client, AsyncClient
 from .consts import *
 
 
@@ -302,3 +302,7 @@ class FutureAPI(Client):
         if granularity:
             params['granularity'] = granularity
         return self._request_with_params(GET, FUTURE_KLINE + str(instrument_id) + '/history' + '/candles', params)
+
+
+class AsyncFutureAPI(AsyncClient, FutureAPI):
+    """FutureAPI whose methods return coroutines, e.g. await AsyncFutureAPI(...).get_kline(...)"""
@@ -1,4 +1,4 @@
-from .client import Client
+from .client import Client, AsyncClient
 from .consts import *
 
 
@@ -257,3 +257,7 @@ class SwapAPI(Client):
         if granularity:
             params['granularity'] = granularity
         return self._request_with_params(GET, SWAP_HISTORY_KLINE + str(instrument_id) + '/history' + '/candles', params)
+
+
+class AsyncSwapAPI(AsyncClient, SwapAPI):
+    """SwapAPI whose methods return coroutines, e.g. await AsyncSwapAPI(...).get_kline(...)"""
@@ -1,13 +1,12 @@
-import hmac
-import base64
 import datetime
+from purequant.clock import clock
+from purequant.signer import signer
+from purequant.transport import transport
 from . import consts as c
 
 
 def sign(message, secret_key):
-    mac = hmac.new(bytes(secret_key, encoding='utf8'), bytes(message, encoding='utf-8'), digestmod='sha256')
-    d = mac.digest()
-    return base64.b64encode(d)
+    return signer(secret_key).b64digest(message)
 
 
 def pre_hash(timestamp, method, request_path, body):
@@ -42,6 +41,17 @@ def signature(timestamp, method, request_path, body, secret_key):
     if str(body) == '{}' or str(body) == 'None':
         body = ''
     message = str(timestamp) + str.upper(method) + request_path + str(body)
-    mac = hmac.new(bytes(secret_key, encoding='utf8'), bytes(message, encoding='utf-8'), digestmod='sha256')
-    d = mac.digest()
-    return base64.b64encode(d)
+    return signer(secret_key).b64digest(message)
+
+
+def get_server_time_ms():
+    response = transport.get(c.API_URL + c.SERVER_TIMESTAMP_URL)
+    return float(response.json()['epoch']) * 1000
+
+
+def get_server_timestamp():
+    """server time in the same format as get_timestamp(), stamped locally from the cached clock offset"""
+    return clock.iso("okex")
+
+
+clock.register("okex", get_server_time_ms)
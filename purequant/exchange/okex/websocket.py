@@ -1,16 +1,18 @@
 import asyncio
 import websockets
 import json
-import requests
-import dateutil.parser as dp
-import hmac
-import base64
+from purequant.transport import transport
 import zlib
 import datetime
 from purequant.push import push
 from purequant.storage import storage
 from purequant.config import config
 from purequant.time import get_localtime
+from purequant.clock import clock
+from purequant import codec
+from purequant.signer import signer
+from purequant.orderbook import OrderBook, checksum
+from purequant.exchange.okex import utils     # 注册okex的服务器时间接口
 
 def get_timestamp():
     now = datetime.datetime.now()
@@ -20,7 +22,7 @@ def get_timestamp():
 
 def get_server_time():
     url = "https://www.okex.com/api/general/v3/time"
-    response = requests.get(url)
+    response = transport.get(url)
     if response.status_code == 200:
         return response.json()['iso']
     else:
@@ -28,18 +30,13 @@ def get_server_time():
 
 
 def server_timestamp():
-    server_time = get_server_time()
-    parsed_t = dp.parse(server_time)
-    timestamp = parsed_t.timestamp()
-    return timestamp
+    return clock.now_ms("okex") / 1000     # 本机时间加上缓存的服务器时间偏差，重连时不再请求服务器时间
 
 
 def login_params(timestamp, api_key, passphrase, secret_key):
     message = timestamp + 'GET' + '/users/self/verify'
 
-    mac = hmac.new(bytes(secret_key, encoding='utf8'), bytes(message, encoding='utf-8'), digestmod='sha256')
-    d = mac.digest()
-    sign = base64.b64encode(d)
+    sign = signer(secret_key).b64digest(message)
 
     login_param = {"op": "login", "args": [api_key, passphrase, timestamp, sign.decode("utf-8")]}
     login_str = json.dumps(login_param)
@@ -55,138 +52,13 @@ def inflate(data):
     return inflated
 
 
-def partial(res, timestamp):
-    data_obj = res['data'][0]
-    bids = data_obj['bids']
-    asks = data_obj['asks']
-    instrument_id = data_obj['instrument_id']
-    print(timestamp + '全量数据bids为：' + str(bids))
-    print('档数为：' + str(len(bids)))
-    print(timestamp + '全量数据asks为：' + str(asks))
-    print('档数为：' + str(len(asks)))
-    return bids, asks, instrument_id
-
-
-def update_bids(res, bids_p, timestamp):
-    # 获取增量bids数据
-    bids_u = res['data'][0]['bids']
-    print(timestamp + '增量数据bids为：' + str(bids_u))
-    print('档数为：' + str(len(bids_u)))
-    # bids合并
-    for i in bids_u:
-        bid_price = i[0]
-        for j in bids_p:
-            if bid_price == j[0]:
-                if i[1] == '0':
-                    bids_p.remove(j)
-                    break
-                else:
-                    del j[1]
-                    j.insert(1, i[1])
-                    break
-        else:
-            if i[1] != "0":
-                bids_p.append(i)
-    else:
-        bids_p.sort(key=lambda price: sort_num(price[0]), reverse=True)
-        print(timestamp + '合并后的bids为：' + str(bids_p) + '，档数为：' + str(len(bids_p)))
-    return bids_p
-
-
-def update_asks(res, asks_p, timestamp):
-    # 获取增量asks数据
-    asks_u = res['data'][0]['asks']
-    print(timestamp + '增量数据asks为：' + str(asks_u))
-    print('档数为：' + str(len(asks_u)))
-    # asks合并
-    for i in asks_u:
-        ask_price = i[0]
-        for j in asks_p:
-            if ask_price == j[0]:
-                if i[1] == '0':
-                    asks_p.remove(j)
-                    break
-                else:
-                    del j[1]
-                    j.insert(1, i[1])
-                    break
-        else:
-            if i[1] != "0":
-                asks_p.append(i)
-    else:
-        asks_p.sort(key=lambda price: sort_num(price[0]))
-        print(timestamp + '合并后的asks为：' + str(asks_p) + '，档数为：' + str(len(asks_p)))
-    return asks_p
-
-
-def sort_num(n):
-    if n.isdigit():
-        return int(n)
-    else:
-        return float(n)
-
-
 def check(bids, asks):
-    # 获取bid档str
-    bids_l = []
-    bid_l = []
-    count_bid = 1
-    while count_bid <= 25:
-        if count_bid > len(bids):
-            break
-        bids_l.append(bids[count_bid-1])
-        count_bid += 1
-    for j in bids_l:
-        str_bid = ':'.join(j[0 : 2])
-        bid_l.append(str_bid)
-    # 获取ask档str
-    asks_l = []
-    ask_l = []
-    count_ask = 1
-    while count_ask <= 25:
-        if count_ask > len(asks):
-            break
-        asks_l.append(asks[count_ask-1])
-        count_ask += 1
-    for k in asks_l:
-        str_ask = ':'.join(k[0 : 2])
-        ask_l.append(str_ask)
-    # 拼接str
-    num = ''
-    if len(bid_l) == len(ask_l):
-        for m in range(len(bid_l)):
-            num += bid_l[m] + ':' + ask_l[m] + ':'
-    elif len(bid_l) > len(ask_l):
-        # bid档比ask档多
-        for n in range(len(ask_l)):
-            num += bid_l[n] + ':' + ask_l[n] + ':'
-        for l in range(len(ask_l), len(bid_l)):
-            num += bid_l[l] + ':'
-    elif len(bid_l) < len(ask_l):
-        # ask档比bid档多
-        for n in range(len(bid_l)):
-            num += bid_l[n] + ':' + ask_l[n] + ':'
-        for l in range(len(bid_l), len(ask_l)):
-            num += ask_l[l] + ':'
-
-    new_num = num[:-1]
-    int_checksum = zlib.crc32(new_num.encode())
-    fina = change(int_checksum)
-    return fina
-
-
-def change(num_old):
-    num = pow(2, 31) - 1
-    if num_old > num:
-        out = num_old - num * 2 - 2
-    else:
-        out = num_old
-    return out
+    return checksum(bids, asks)
 
 
 # subscribe channels un_need login
 async def subscribe_without_login(url, channels):
-    l = []
+    books = {}  # {合约ID: OrderBook}
     while True:
         try:
             async with websockets.connect(url) as ws:
@@ -218,73 +90,26 @@ async def subscribe_without_login(url, channels):
                     data = {'data':res}
                     storage.mongodb_save(data, config.mongodb_database, config.mongodb_collection)
 
-                    res = eval(res)
+                    res = codec.loads(res)
                     if 'event' in res:
                         continue
                     for i in res:
                         if 'depth' in res[i] and 'depth5' not in res[i]:
-                            # 订阅频道是深度频道
+                            # 订阅频道是深度频道，按合约合并全量与增量数据
+                            data = res['data'][0]
+                            instrument_id = data['instrument_id']
                             if res['action'] == 'partial':
-                                for m in l:
-                                    if res['data'][0]['instrument_id'] == m['instrument_id']:
-                                        l.remove(m)
-                                # 获取首次全量深度数据
-                                bids_p, asks_p, instrument_id = partial(res, timestamp)
-                                d = {}
-                                d['instrument_id'] = instrument_id
-                                d['bids_p'] = bids_p
-                                d['asks_p'] = asks_p
-                                l.append(d)
-
-                                # 校验checksum
-                                checksum = res['data'][0]['checksum']
-                                print(timestamp + '推送数据的checksum为：' + str(checksum))
-                                check_num = check(bids_p, asks_p)
-                                print(timestamp + '校验后的checksum为：' + str(check_num))
-                                if check_num == checksum:
-                                    print("校验结果为：True")
-                                else:
-                                    print("校验结果为：False，正在重新订阅……")
-
-                                    # 取消订阅
-                                    await unsubscribe_without_login(url, channels, timestamp)
-                                    # 发送订阅
-                                    async with websockets.connect(url) as ws:
-                                        sub_param = {"op": "subscribe", "args": channels}
-                                        sub_str = json.dumps(sub_param)
-                                        await ws.send(sub_str)
-                                        timestamp = get_timestamp()
-                                        print(timestamp + f"send: {sub_str}")
-
-                            elif res['action'] == 'update':
-                                for j in l:
-                                    if res['data'][0]['instrument_id'] == j['instrument_id']:
-                                        # 获取全量数据
-                                        bids_p = j['bids_p']
-                                        asks_p = j['asks_p']
-                                        # 获取合并后数据
-                                        bids_p = update_bids(res, bids_p, timestamp)
-                                        asks_p = update_asks(res, asks_p, timestamp)
-
-                                        # 校验checksum
-                                        checksum = res['data'][0]['checksum']
-                                        print(timestamp + '推送数据的checksum为：' + str(checksum))
-                                        check_num = check(bids_p, asks_p)
-                                        print(timestamp + '校验后的checksum为：' + str(check_num))
-                                        if check_num == checksum:
-                                            print("校验结果为：True")
-                                        else:
-                                            print("校验结果为：False，正在重新订阅……")
-
-                                            # 取消订阅
-                                            await unsubscribe_without_login(url, channels, timestamp)
-                                            # 发送订阅
-                                            async with websockets.connect(url) as ws:
-                                                sub_param = {"op": "subscribe", "args": channels}
-                                                sub_str = json.dumps(sub_param)
-                                                await ws.send(sub_str)
-                                                timestamp = get_timestamp()
-                                                print(timestamp + f"send: {sub_str}")
+                                books[instrument_id] = OrderBook(instrument_id, getattr(config, "depth_checksum_every", 1))
+                            elif instrument_id not in books:    # 还没有收到全量数据
+                                break
+                            # 校验checksum
+                            if not books[instrument_id].apply(data, res['action']):
+                                print(timestamp + instrument_id + "校验结果为：False，正在重新订阅……")
+                                del books[instrument_id]
+                                # 取消订阅后重新订阅，交易所会重新推送全量数据
+                                await ws.send(json.dumps({"op": "unsubscribe", "args": channels}))
+                                await ws.send(json.dumps({"op": "subscribe", "args": channels}))
+                            break
         except Exception as e:
             timestamp = get_timestamp()
             print(timestamp + "连接断开，正在重连……")
@@ -338,7 +163,7 @@ async def subscribe(url, api_key, passphrase, secret_key, channels):
                     # print(time + res)
                     # 持仓更新
                     length = len(res)
-                    result = eval(res)
+                    result = codec.loads(res)
                     if length > 99:
                         if channels[0][0:16] == "futures/position":
                             data = result['data'][0]
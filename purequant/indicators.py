@@ -1,7 +1,73 @@
+import operator
 import numpy as np
 import talib
 from purequant import time
 from purequant.config import config
+from purequant.cache import cache
+
+
+class __KlineConverter:
+    """
+    将k线列表按列转换成数组，并缓存转换结果。
+    同一份k线数据上计算多个指标时每列只转换一次；回测时不断向同一个列表追加k线，也只转换新增的k线。
+    是否可以沿用缓存只比较最后一根已转换的k线的数值，修改最后一根k线会重新转换，
+    但直接修改列表中更早的k线不会被发现，此时须传入一个新的列表。
+    """
+
+    def __init__(self, size=8):
+        self.__size = size
+        self.__cache = {}   # {id(k线列表): [k线列表, 已转换的k线数量, 最后一根已转换的k线的数值, {列序号: 数组}]}
+
+    def __convert(self, rows, index):
+        """将k线中的某一列整列转换成数组，时间列转换成时间戳（秒）"""
+        values = map(operator.itemgetter(index), rows)
+        if index != 0:
+            return np.fromiter(map(float, values), dtype=np.float64, count=len(rows))
+        values = list(values)
+        if values and isinstance(values[0], str):   # ISO格式的时间字符串整列一次解析
+            values = np.array([value.rstrip("Zz") for value in values], dtype="datetime64[ms]")
+            return values.astype(np.int64) / 1000
+        return np.array(values, dtype=np.float64)
+
+    def __freeze(self, array):
+        """缓存的数组会被多个指标共用，设为只读，防止被修改"""
+        array.flags.writeable = False
+        return array
+
+    def __entry(self, records):
+        key = id(records)
+        entry = self.__cache.get(key)
+        length = len(records)
+        if entry is not None and entry[0] is records and 0 < entry[1] <= length and tuple(records[entry[1] - 1]) == entry[2]:
+            if entry[1] < length:   # 同一个列表追加了新的k线，只转换新增部分
+                rows = records[entry[1]:]
+                for index, array in entry[3].items():
+                    entry[3][index] = self.__freeze(np.concatenate((array, self.__convert(rows, index))))
+                entry[1] = length
+                entry[2] = tuple(records[-1])
+            return entry
+        entry = [records, length, tuple(records[-1]) if length else None, {}]
+        if key not in self.__cache and len(self.__cache) >= self.__size:  # 替换同一个键的旧缓存时不必淘汰其他缓存
+            self.__cache.pop(next(iter(self.__cache)))
+        self.__cache[key] = entry
+        return entry
+
+    def column(self, records, index):
+        """
+        获取k线数据中的某一列
+        :param records: k线数据
+        :param index: 列序号，0为时间戳（秒），1为开盘价，2为最高价，3为最低价，4为收盘价，5为成交量
+        :return: 返回一个一维数组
+        """
+        entry = self.__entry(records)
+        array = entry[3].get(index)
+        if array is None:
+            array = entry[3][index] = self.__freeze(self.__convert(records, index))
+        return array
+
+
+converter = __KlineConverter()
+
 
 class INDICATORS:
 
@@ -11,6 +77,17 @@ class INDICATORS:
         self.__time_frame = time_frame
         self.__last_time_stamp = 0
 
+    def __array(self, records, index):
+        """
+        取出k线数据中的某一列，转换成一维数组
+        :param records: k线数据，回测引擎传入的k线视图直接返回其中的数组，k线列表转换后缓存，不再逐行转换
+        :param index: 列序号，如2为最高价，4为收盘价
+        :return: 返回一个一维数组
+        """
+        if hasattr(records, "column"):    # 回测引擎的KlineView
+            return records.column(index)
+        return converter.column(records, index)
+
     def ATR(self,length, kline=None):
         """
         指数移动平均线
@@ -21,18 +98,10 @@ class INDICATORS:
         if config.backtest == "enabled":    # 如果是回测模式传入了指定的k线数据
             records = kline
         else:   # 实盘模式下从交易所获取k线数据
-            records = self.__platform.get_kline(self.__time_frame)
-            records.reverse()   # 将k线数据倒序排列
-        kline_length = len(records)     # 计算k线数据的长度
-        high_array = np.zeros(kline_length)     # 创建为零的数组
-        low_array = np.zeros(kline_length)
-        close_array = np.zeros(kline_length)
-        t = 0
-        for item in records:
-            high_array[t] = item[2]
-            low_array[t] = item[3]
-            close_array[t] = item[4]
-            t += 1
+            records = cache.kline(self.__platform, self.__instrument_id, self.__time_frame, reverse=True)   # 将k线数据倒序排列
+        high_array = self.__array(records, 2)     # 取出最高价、最低价、收盘价数组
+        low_array = self.__array(records, 3)
+        close_array = self.__array(records, 4)
         result = talib.ATR(high_array, low_array, close_array, timeperiod=length)
         return result
 
@@ -47,14 +116,8 @@ class INDICATORS:
         if config.backtest == "enabled":    # 如果是回测模式传入了指定的k线数据
             records = kline
         else:  # 实盘模式下从交易所获取k线数据
-            records = self.__platform.get_kline(self.__time_frame)
-            records.reverse()
-        kline_length = len(records)
-        close_array = np.zeros(kline_length)
-        t = 0
-        for item in records:
-            close_array[t] = item[4]
-            t += 1
+            records = cache.kline(self.__platform, self.__instrument_id, self.__time_frame, reverse=True)
+        close_array = self.__array(records, 4)
         result = (talib.BBANDS(close_array, timeperiod=length, nbdevup=2, nbdevdn=2, matype=0))
         upperband = result[0]
         middleband = result[1]
@@ -71,11 +134,11 @@ class INDICATORS:
         if config.backtest == "enabled":
             records = kline
         else:
-            records = self.__platform.get_kline(self.__time_frame)
+            records = cache.kline(self.__platform, self.__instrument_id, self.__time_frame)
         kline_length = len(records)
-        if type(records[0][0]) == str:
+        if isinstance(records[0][0], str):
             current_timestamp = time.utctime_str_to_ts(records[kline_length - 1][0])
-        elif type(records[0][0]) == int or type(records[0][0]) == float:
+        elif isinstance(records[0][0], (int, float, np.number)):
             current_timestamp = records[kline_length - 1][0]
         if current_timestamp != self.__last_time_stamp:  # 如果当前时间戳不等于lastTime，说明k线更新
             if current_timestamp < self.__last_time_stamp:
@@ -95,7 +158,7 @@ class INDICATORS:
         if config.backtest == "enabled":
             records = kline
         else:
-            records = self.__platform.get_kline(self.__time_frame)
+            records = cache.kline(self.__platform, self.__instrument_id, self.__time_frame)
         kline_length = len(records)
         return kline_length
 
@@ -109,14 +172,8 @@ class INDICATORS:
         if config.backtest == "enabled":
             records = kline
         else:
-            records = self.__platform.get_kline(self.__time_frame)
-            records.reverse()
-        kline_length = len(records)
-        high_array = np.zeros(kline_length)
-        t = 0
-        for item in records:
-            high_array[t] = item[2]
-            t += 1
+            records = cache.kline(self.__platform, self.__instrument_id, self.__time_frame, reverse=True)
+        high_array = self.__array(records, 2)
         result = (talib.MAX(high_array, length))
         return result
 
@@ -131,14 +188,8 @@ class INDICATORS:
         if config.backtest == "enabled":    # 如果是回测模式传入了指定的k线数据
             records = kline
         else:   # 实盘模式下从交易所获取k线数据
-            records = self.__platform.get_kline(self.__time_frame)
-            records.reverse()
-        kline_length = len(records)
-        close_array = np.zeros(kline_length)
-        t = 0
-        for item in records:
-            close_array[t] = item[4]
-            t += 1
+            records = cache.kline(self.__platform, self.__instrument_id, self.__time_frame, reverse=True)
+        close_array = self.__array(records, 4)
         if len(args) < 1:  # 如果无别的参数
             result = talib.SMA(close_array, length)
         else:   # 如果传入多个参数
@@ -159,14 +210,8 @@ class INDICATORS:
         if config.backtest == "enabled":
             records = kline
         else:
-            records = self.__platform.get_kline(self.__time_frame)
-            records.reverse()
-        kline_length = len(records)
-        close_array = np.zeros(kline_length)
-        t = 0
-        for item in records:
-            close_array[t] = item[4]
-            t += 1
+            records = cache.kline(self.__platform, self.__instrument_id, self.__time_frame, reverse=True)
+        close_array = self.__array(records, 4)
         result = (talib.MACD(close_array, fastperiod=fastperiod, slowperiod=slowperiod, signalperiod=signalperiod))
         DIF = result[0]
         DEA = result[1]
@@ -185,14 +230,8 @@ class INDICATORS:
         if config.backtest == "enabled":
             records = kline
         else:
-            records = self.__platform.get_kline(self.__time_frame)
-            records.reverse()
-        kline_length = len(records)
-        close_array = np.zeros(kline_length)
-        t = 0
-        for item in records:
-            close_array[t] = item[4]
-            t += 1
+            records = cache.kline(self.__platform, self.__instrument_id, self.__time_frame, reverse=True)
+        close_array = self.__array(records, 4)
         if len(args) < 1:  # 如果无别的参数
             result = talib.EMA(close_array, length)
         else:
@@ -212,14 +251,8 @@ class INDICATORS:
         if config.backtest == "enabled":
             records = kline
         else:
-            records = self.__platform.get_kline(self.__time_frame)
-            records.reverse()
-        kline_length = len(records)
-        close_array = np.zeros(kline_length)
-        t = 0
-        for item in records:
-            close_array[t] = item[4]
-            t += 1
+            records = cache.kline(self.__platform, self.__instrument_id, self.__time_frame, reverse=True)
+        close_array = self.__array(records, 4)
         if len(args) < 1:  # 如果无别的参数
             result = talib.KAMA(close_array, length)
         else:
@@ -240,18 +273,10 @@ class INDICATORS:
         if config.backtest == "enabled":
             records = kline
         else:
-            records = self.__platform.get_kline(self.__time_frame)
-            records.reverse()
-        kline_length = len(records)
-        high_array = np.zeros(kline_length)
-        low_array = np.zeros(kline_length)
-        close_array = np.zeros(kline_length)
-        t = 0
-        for item in records:
-            high_array[t1] = item[2]
-            low_array[t2] = item[3]
-            close_array[t3] = item[4]
-            t += 1
+            records = cache.kline(self.__platform, self.__instrument_id, self.__time_frame, reverse=True)
+        high_array = self.__array(records, 2)
+        low_array = self.__array(records, 3)
+        close_array = self.__array(records, 4)
         result = (talib.STOCH(high_array, low_array, close_array, fastk_period=fastk_period,
                                                                 slowk_period=slowk_period,
                                                                 slowk_matype=0,
@@ -272,14 +297,8 @@ class INDICATORS:
         if config.backtest == "enabled":
             records = kline
         else:
-            records = self.__platform.get_kline(self.__time_frame)
-            records.reverse()
-        kline_length = len(records)
-        low_array = np.zeros(kline_length)
-        t = 0
-        for item in records:
-            low_array[t] = item[3]
-            t += 1
+            records = cache.kline(self.__platform, self.__instrument_id, self.__time_frame, reverse=True)
+        low_array = self.__array(records, 3)
         result = (talib.MIN(low_array, length))
         return result
 
@@ -292,15 +311,9 @@ class INDICATORS:
         if config.backtest == "enabled":
             records = kline
         else:
-            records = self.__platform.get_kline(self.__time_frame)
-            records.reverse()
-        kline_length = len(records)
-        close_array = np.zeros(kline_length)
-        t = 0
-        for item in records:
-            close_array[t] = item[4]
-            t += 1
-        result = (talib.OBV(close_array, self.VOLUME()))
+            records = cache.kline(self.__platform, self.__instrument_id, self.__time_frame, reverse=True)
+        close_array = self.__array(records, 4)
+        result = (talib.OBV(close_array, self.VOLUME(kline=kline)))
         return result
 
     def RSI(self, length, kline=None):
@@ -313,14 +326,8 @@ class INDICATORS:
         if config.backtest == "enabled":
             records = kline
         else:
-            records = self.__platform.get_kline(self.__time_frame)
-            records.reverse()
-        kline_length = len(records)
-        close_array = np.zeros(kline_length)
-        t = 0
-        for item in records:
-            close_array[t] = item[4]
-            t += 1
+            records = cache.kline(self.__platform, self.__instrument_id, self.__time_frame, reverse=True)
+        close_array = self.__array(records, 4)
         result = (talib.RSI(close_array, timeperiod=length))
         return result
 
@@ -334,14 +341,8 @@ class INDICATORS:
         if config.backtest == "enabled":
             records = kline
         else:
-            records = self.__platform.get_kline(self.__time_frame)
-            records.reverse()
-        kline_length = len(records)
-        close_array = np.zeros(kline_length)
-        t = 0
-        for item in records:
-            close_array[t] = item[4]
-            t += 1
+            records = cache.kline(self.__platform, self.__instrument_id, self.__time_frame, reverse=True)
+        close_array = self.__array(records, 4)
         result = (talib.ROC(close_array, timeperiod=length))
         return result
 
@@ -357,14 +358,8 @@ class INDICATORS:
         if config.backtest == "enabled":
             records = kline
         else:
-            records = self.__platform.get_kline(self.__time_frame)
-            records.reverse()
-        kline_length = len(records)
-        close_array = np.zeros(kline_length)
-        t = 0
-        for item in records:
-            close_array[t] = item[4]
-            t += 1
+            records = cache.kline(self.__platform, self.__instrument_id, self.__time_frame, reverse=True)
+        close_array = self.__array(records, 4)
         result = (talib.STOCHRSI(close_array, timeperiod=timeperiod, fastk_period=fastk_period, fastd_period=fastd_period, fastd_matype=0))
         STOCHRSI = result[1]
         fastk = talib.MA(STOCHRSI, 3)
@@ -380,16 +375,9 @@ class INDICATORS:
         if config.backtest == "enabled":
             records = kline
         else:
-            records = self.__platform.get_kline(self.__time_frame)
-            records.reverse()
-        kline_length = len(records)
-        high_array = np.zeros(kline_length)
-        low_array = np.zeros(kline_length)
-        t = 0
-        for item in records:
-            high_array[t1] = item[2]
-            low_array[t2] = item[3]
-            t += 1
+            records = cache.kline(self.__platform, self.__instrument_id, self.__time_frame, reverse=True)
+        high_array = self.__array(records, 2)
+        low_array = self.__array(records, 3)
         result = (talib.SAR(high_array, low_array, acceleration=0.02, maximum=0.2))
         return result
 
@@ -405,14 +393,8 @@ class INDICATORS:
         if config.backtest == "enabled":
             records = kline
         else:
-            records = self.__platform.get_kline(self.__time_frame)
-            records.reverse()
-        kline_length = len(records)
-        close_array = np.zeros(kline_length)
-        t = 0
-        for item in records:
-            close_array[t] = item[4]
-            t += 1
+            records = cache.kline(self.__platform, self.__instrument_id, self.__time_frame, reverse=True)
+        close_array = self.__array(records, 4)
         result = (talib.STDDEV(close_array, timeperiod=length, nbdev=1))
         return result
 
@@ -427,14 +409,8 @@ class INDICATORS:
         if config.backtest == "enabled":
             records = kline
         else:
-            records = self.__platform.get_kline(self.__time_frame)
-            records.reverse()
-        kline_length = len(records)
-        close_array = np.zeros(kline_length)
-        t = 0
-        for item in records:
-            close_array[t] = item[4]
-            t += 1
+            records = cache.kline(self.__platform, self.__instrument_id, self.__time_frame, reverse=True)
+        close_array = self.__array(records, 4)
         result = (talib.TRIX(close_array, timeperiod=length))
         return result
 
@@ -447,14 +423,8 @@ class INDICATORS:
         if config.backtest == "enabled":
             records = kline
         else:
-            records = self.__platform.get_kline(self.__time_frame)
-        length = len(records)
-        records.reverse()
-        t = 0
-        volume_array = np.zeros(length)
-        for item in records:
-            volume_array[t] = item[5]
-            t += 1
+            records = cache.kline(self.__platform, self.__instrument_id, self.__time_frame, reverse=True)
+        volume_array = self.__array(records, 5)
         return volume_array
 
 
@@ -9,6 +9,7 @@ email: interstella.ranger2020@gmail.com
 """
 
 from purequant.config import config
+from purequant.cache import cache
 
 class MARKET:
 
@@ -32,8 +33,7 @@ class MARKET:
         if config.backtest == "enabled":    # 回测模式
             return float(kline[param][1])
         else:   # 实盘模式
-            records = self.__platform.get_kline(self.__time_frame)
-            records.reverse()
+            records = cache.kline(self.__platform, self.__instrument_id, self.__time_frame, reverse=True)
             result = float((records)[param][1])
             return result
 
@@ -47,8 +47,7 @@ class MARKET:
         if config.backtest == "enabled":
             return float(kline[param][2])
         else:
-            records = self.__platform.get_kline(self.__time_frame)
-            records.reverse()
+            records = cache.kline(self.__platform, self.__instrument_id, self.__time_frame, reverse=True)
             result = float((records)[param][2])
             return result
 
@@ -62,8 +61,7 @@ class MARKET:
         if config.backtest == "enabled":
             return float(kline[param][3])
         else:
-            records = self.__platform.get_kline(self.__time_frame)
-            records.reverse()
+            records = cache.kline(self.__platform, self.__instrument_id, self.__time_frame, reverse=True)
             result = float((records)[param][3])
             return result
 
@@ -77,8 +75,7 @@ class MARKET:
         if config.backtest == "enabled":
             return float(kline[param][4])
         else:
-            records = self.__platform.get_kline(self.__time_frame)
-            records.reverse()
+            records = cache.kline(self.__platform, self.__instrument_id, self.__time_frame, reverse=True)
             result = float((records)[param][4])
             return result
 
@@ -0,0 +1,432 @@
+# -*- coding:utf-8 -*-
+
+"""
+行情数据中心
+
+原来各交易所的行情websocket各自为政：okex的subscribe_without_login打印全部推送，火币的subscribe需要自己写回调，
+bitmex每个合约一个线程，币安没有websocket行情。订阅30个合约就要30个连接和线程，推送格式也各不相同。
+MARKETDATA在一个asyncio事件循环中为每个交易所只保持一个websocket连接，所有合约与频道都在这个连接上订阅，
+推送统一转换成下面几种精简的记录，分发到各订阅者的asyncio.Queue：
+
+    Trade(exchange, symbol, timestamp, price, size, side)           逐笔成交，side为"buy"或"sell"
+    Ticker(exchange, symbol, timestamp, last, bid, ask)             最新价与买一卖一价，交易所没有推送的字段为None
+    Book(exchange, symbol, timestamp, bids, asks)                   前depth档深度，每档为(价格, 数量)
+    Kline(exchange, symbol, timestamp, open, high, low, close, volume)  1分钟k线
+
+timestamp为毫秒时间戳，价格与数量为浮点数。symbol为订阅时传入的合约ID，各交易所的写法不变：
+    okex："BTC-USD-SWAP"、"BTC-USD-201225"、"BTC-USDT"
+    火币永续合约："BTC-USD"
+    币安现货："BTCUSDT"
+    bitmex："XBTUSD"
+
+断线后自动重连并重新订阅全部频道。订阅者处理不及时、队列已满时丢弃最早的记录，不会阻塞其他订阅者。
+
+用法：
+    hub = MARKETDATA()
+    trades = hub.subscribe("okex", "BTC-USD-SWAP", "trade")
+    books = hub.subscribe("binance", "BTCUSDT", "book")
+    asyncio.ensure_future(hub.run())
+    record = await trades.get()
+"""
+
+import abc
+import gzip
+import json
+import time
+import zlib
+import asyncio
+import calendar
+import datetime
+from collections import namedtuple
+import websockets
+from purequant import codec
+from purequant.orderbook import OrderBook
+
+Trade = namedtuple("Trade", "exchange symbol timestamp price size side")
+Ticker = namedtuple("Ticker", "exchange symbol timestamp last bid ask")
+Book = namedtuple("Book", "exchange symbol timestamp bids asks")
+Kline = namedtuple("Kline", "exchange symbol timestamp open high low close volume")
+
+CHANNELS = ("trade", "ticker", "book", "kline")
+HEARTBEAT_SECONDS = 25  # 没有推送时发送心跳的间隔秒数
+RECONNECT_SECONDS = 3   # 断线后重连的间隔秒数
+
+
+def _iso_ms(text):
+    """'2020-07-25T03:05:00.123Z'格式的utc时间转换成毫秒时间戳"""
+    seconds = calendar.timegm(datetime.datetime.strptime(text[:19], "%Y-%m-%dT%H:%M:%S").timetuple())
+    millisecond = int(text[20:23].ljust(3, "0")) if len(text) > 20 and text[19] == "." else 0
+    return seconds * 1000 + millisecond
+
+
+def _levels(rows, depth):
+    return [(float(row[0]), float(row[1])) for row in rows[:depth]]
+
+
+class _Venue(abc.ABC):
+    """一个交易所的连接，子类实现频道名称的转换、订阅消息与推送的解析"""
+
+    name = ""
+    url = ""
+
+    def __init__(self, depth):
+        self.depth = depth
+        self.topics = {}    # {交易所的频道名称: (频道, 合约ID)}
+
+    @abc.abstractmethod
+    def topic(self, channel, symbol):
+        """返回交易所的频道名称"""
+
+    @abc.abstractmethod
+    def subscribe(self, topics):
+        """返回订阅这些频道需要发送的消息列表"""
+
+    @abc.abstractmethod
+    def unsubscribe(self, topics):
+        """返回取消订阅这些频道需要发送的消息列表"""
+
+    def discard(self, topic):
+        """取消订阅后清除该频道的状态"""
+        self.topics.pop(topic, None)
+
+    def decode(self, message):
+        return codec.loads(message)
+
+    def ping(self):
+        """没有推送时发送的心跳消息，返回None时不发送"""
+        return None
+
+    @abc.abstractmethod
+    def parse(self, res):
+        """
+        解析一条推送
+        :return: 返回(需要回复的消息, [(交易所的频道名称, 记录), ...])
+        """
+
+
+class _Okex(_Venue):
+
+    name = "okex"
+    url = "wss://real.okex.com:8443/ws/v3"
+
+    def __init__(self, depth):
+        super().__init__(depth)
+        self.books = {}     # {交易所的频道名称: OrderBook}
+
+    def discard(self, topic):
+        super().discard(topic)
+        self.books.pop(topic, None)
+
+    def topic(self, channel, symbol):
+        if symbol.upper().endswith("SWAP"):
+            market = "swap"
+        elif symbol.count("-") == 2:
+            market = "futures"
+        else:
+            market = "spot"
+        name = {"trade": "trade", "ticker": "ticker", "book": "depth_l2_tbt", "kline": "candle60s"}[channel]
+        return "{}/{}:{}".format(market, name, symbol)
+
+    def subscribe(self, topics):
+        return [json.dumps({"op": "subscribe", "args": topics})]
+
+    def unsubscribe(self, topics):
+        return [json.dumps({"op": "unsubscribe", "args": topics})]
+
+    def decode(self, message):
+        decompress = zlib.decompressobj(-zlib.MAX_WBITS)
+        message = decompress.decompress(message) + decompress.flush()
+        return None if message == b'pong' else codec.loads(message)
+
+    def ping(self):
+        return 'ping'
+
+    def parse(self, res):
+        table = res.get("table")
+        if table is None:
+            if res.get("event") == "error":
+                print("okex行情订阅失败！错误：{}".format(res.get("message")))
+            return None, []
+        records = []
+        replies = []
+        for item in res.get("data", []):
+            symbol = item['instrument_id']
+            topic = table + ":" + symbol
+            if table.endswith("/trade"):
+                records.append((topic, Trade(self.name, symbol, _iso_ms(item['timestamp']), float(item['price']),
+                                             float(item.get('size') or item.get('qty')), item['side'])))
+            elif table.endswith("/ticker"):
+                records.append((topic, Ticker(self.name, symbol, _iso_ms(item['timestamp']), float(item['last']),
+                                              float(item['best_bid']), float(item['best_ask']))))
+            elif table.endswith("/candle60s"):
+                candle = item['candle']
+                records.append((topic, Kline(self.name, symbol, _iso_ms(candle[0]), *[float(x) for x in candle[1:6]])))
+            elif table.endswith("/depth_l2_tbt"):
+                if res['action'] == 'partial':
+                    self.books[topic] = OrderBook(symbol)
+                book = self.books.get(topic)
+                if book is None:    # 还没有收到全量数据
+                    continue
+                if not book.apply(item, res['action']):     # 校验失败，重新订阅获取全量数据
+                    del self.books[topic]
+                    replies += self.unsubscribe([topic]) + self.subscribe([topic])
+                    continue
+                records.append((topic, Book(self.name, symbol, _iso_ms(item['timestamp']),
+                                            _levels(book.bids(self.depth), self.depth), _levels(book.asks(self.depth), self.depth))))
+        return replies, records
+
+
+class _Huobi(_Venue):
+    """火币永续合约"""
+
+    name = "huobi"
+    url = "wss://api.hbdm.com/swap-ws"
+
+    def topic(self, channel, symbol):
+        name = {"trade": "trade.detail", "ticker": "detail", "book": "depth.step0", "kline": "kline.1min"}[channel]
+        return "market.{}.{}".format(symbol.upper(), name)
+
+    def subscribe(self, topics):
+        return [json.dumps({"sub": topic, "id": topic}) for topic in topics]
+
+    def unsubscribe(self, topics):
+        return [json.dumps({"unsub": topic, "id": topic}) for topic in topics]
+
+    def decode(self, message):
+        return codec.loads(gzip.decompress(message))
+
+    def parse(self, res):
+        if "ping" in res:
+            return [json.dumps({"pong": res["ping"]})], []
+        if res.get("status") == "error":
+            print("火币行情订阅失败！错误：{}".format(res.get("err-msg")))
+        topic = res.get("ch")
+        if topic not in self.topics:
+            return None, []
+        symbol = self.topics[topic][1]
+        tick = res['tick']
+        if topic.endswith(".trade.detail"):
+            records = [(topic, Trade(self.name, symbol, item['ts'], float(item['price']), float(item['amount']),
+                                     item['direction'])) for item in tick['data']]
+        elif topic.endswith(".detail"):
+            records = [(topic, Ticker(self.name, symbol, res['ts'], float(tick['close']), None, None))]
+        elif topic.endswith(".depth.step0"):
+            records = [(topic, Book(self.name, symbol, res['ts'], _levels(tick['bids'], self.depth),
+                                    _levels(tick['asks'], self.depth)))]
+        else:
+            records = [(topic, Kline(self.name, symbol, tick['id'] * 1000, float(tick['open']), float(tick['high']),
+                                     float(tick['low']), float(tick['close']), float(tick['vol'])))]
+        return None, records
+
+
+class _Binance(_Venue):
+    """币安现货，所有频道通过组合stream在一个连接上订阅"""
+
+    name = "binance"
+    url = "wss://stream.binance.com:9443/stream"
+
+    def topic(self, channel, symbol):
+        if channel == "book":    # 币安的有限档深度只有5、10、20档
+            name = "depth{}@100ms".format(min([x for x in (5, 10, 20) if x >= self.depth] or [20]))
+        else:
+            name = {"trade": "trade", "ticker": "ticker", "kline": "kline_1m"}[channel]
+        return "{}@{}".format(symbol.lower(), name)
+
+    def subscribe(self, topics):
+        return [json.dumps({"method": "SUBSCRIBE", "params": topics, "id": 1})]
+
+    def unsubscribe(self, topics):
+        return [json.dumps({"method": "UNSUBSCRIBE", "params": topics, "id": 2})]
+
+    def parse(self, res):
+        topic = res.get("stream")
+        if topic not in self.topics:
+            return None, []
+        symbol = self.topics[topic][1]
+        data = res['data']
+        if data.get('e') == "trade":
+            record = Trade(self.name, symbol, data['T'], float(data['p']), float(data['q']), "sell" if data['m'] else "buy")
+        elif data.get('e') == "24hrTicker":
+            record = Ticker(self.name, symbol, data['E'], float(data['c']), float(data['b']), float(data['a']))
+        elif data.get('e') == "kline":
+            k = data['k']
+            record = Kline(self.name, symbol, k['t'], float(k['o']), float(k['h']), float(k['l']), float(k['c']), float(k['v']))
+        else:   # 有限档深度推送中没有事件类型与时间，使用本机时间
+            record = Book(self.name, symbol, int(time.time() * 1000), _levels(data['bids'], self.depth), _levels(data['asks'], self.depth))
+        return None, [(topic, record)]
+
+
+class _Bitmex(_Venue):
+
+    name = "bitmex"
+    url = "wss://www.bitmex.com/realtime"
+
+    def __init__(self, depth):
+        super().__init__(depth)
+        self.instruments = {}   # {合约ID: 合并后的instrument数据}，instrument频道的更新只包含变化的字段
+
+    def topic(self, channel, symbol):
+        name = {"trade": "trade", "ticker": "instrument", "book": "orderBook10", "kline": "tradeBin1m"}[channel]
+        return "{}:{}".format(name, symbol)
+
+    def subscribe(self, topics):
+        return [json.dumps({"op": "subscribe", "args": topics})]
+
+    def unsubscribe(self, topics):
+        return [json.dumps({"op": "unsubscribe", "args": topics})]
+
+    def decode(self, message):
+        return None if message == 'pong' else codec.loads(message)
+
+    def ping(self):
+        return 'ping'
+
+    def parse(self, res):
+        table = res.get("table")
+        if table is None:
+            if "error" in res:
+                print("bitmex行情订阅失败！错误：{}".format(res["error"]))
+            return None, []
+        records = []
+        for item in res.get("data", []):
+            symbol = item.get("symbol")
+            topic = table + ":" + symbol
+            if table == "trade":
+                records.append((topic, Trade(self.name, symbol, _iso_ms(item['timestamp']), float(item['price']),
+                                             float(item['size']), item['side'].lower())))
+            elif table == "instrument":
+                instrument = self.instruments.setdefault(symbol, {})
+                instrument.update(item)
+                if instrument.get('lastPrice') is not None:
+                    records.append((topic, Ticker(self.name, symbol, _iso_ms(instrument['timestamp']), instrument['lastPrice'],
+                                                  instrument.get('bidPrice'), instrument.get('askPrice'))))
+            elif table == "orderBook10":
+                records.append((topic, Book(self.name, symbol, _iso_ms(item['timestamp']), _levels(item['bids'], self.depth),
+                                            _levels(item['asks'], self.depth))))
+            elif table == "tradeBin1m":
+                records.append((topic, Kline(self.name, symbol, _iso_ms(item['timestamp']) - 60000, item['open'],
+                                             item['high'], item['low'], item['close'], item['volume'])))
+        return None, records
+
+
+VENUES = {"okex": _Okex, "huobi": _Huobi, "binance": _Binance, "bitmex": _Bitmex}
+
+
+class MARKETDATA:
+
+    def __init__(self, depth=5, maxsize=1000):
+        """
+        行情数据中心，每个交易所只使用一个websocket连接
+        :param depth: 深度记录中买卖盘的档数
+        :param maxsize: 每个订阅者队列的最大长度，队列已满时丢弃最早的记录
+        """
+        self.depth = depth
+        self.maxsize = maxsize
+        self.__venues = {}      # {交易所名称: _Venue}
+        self.__queues = {}      # {(交易所名称, 交易所的频道名称): [asyncio.Queue]}
+        self.__sockets = {}     # {交易所名称: 已连接的websocket}
+        self.__tasks = {}       # {交易所名称: 连接的asyncio.Task}
+        self.__running = False
+
+    def subscribe(self, exchange, symbol, channel, queue=None):
+        """
+        订阅行情
+        :param exchange: "okex"、"huobi"、"binance"或"bitmex"
+        :param symbol: 合约ID
+        :param channel: "trade"、"ticker"、"book"或"kline"
+        :param queue: 接收记录的asyncio.Queue，不填时新建一个，多个订阅可以共用一个队列
+        :return: 返回asyncio.Queue
+        """
+        if exchange not in VENUES:
+            raise ValueError("不支持的交易所：{}".format(exchange))
+        if channel not in CHANNELS:
+            raise ValueError("不支持的行情频道：{}".format(channel))
+        venue = self.__venues.get(exchange)
+        if venue is None:
+            venue = self.__venues[exchange] = VENUES[exchange](self.depth)
+        topic = venue.topic(channel, symbol)
+        queue = queue or asyncio.Queue(self.maxsize)
+        queues = self.__queues.setdefault((exchange, topic), [])
+        queues.append(queue)
+        if topic not in venue.topics:
+            venue.topics[topic] = (channel, symbol)
+            self.__send(exchange, venue.subscribe([topic]))
+        if self.__running and exchange not in self.__tasks:
+            self.__tasks[exchange] = asyncio.ensure_future(self.__connect(venue))
+        return queue
+
+    def unsubscribe(self, queue):
+        """取消某个队列的全部订阅，没有订阅者的频道不再接收推送"""
+        for (exchange, topic), queues in list(self.__queues.items()):
+            if queue in queues:
+                queues.remove(queue)
+                if not queues:
+                    del self.__queues[(exchange, topic)]
+                    venue = self.__venues[exchange]
+                    venue.discard(topic)
+                    self.__send(exchange, venue.unsubscribe([topic]))
+
+    def __send(self, exchange, messages):
+        """在已连接的websocket上发送消息，未连接时在连接后统一订阅"""
+        ws = self.__sockets.get(exchange)
+        if ws is not None:
+            for message in messages:
+                asyncio.ensure_future(ws.send(message))
+
+    async def run(self):
+        """连接全部已订阅的交易所并一直运行，之后订阅新的交易所时自动连接"""
+        self.__running = True
+        for exchange, venue in self.__venues.items():
+            if exchange not in self.__tasks:
+                self.__tasks[exchange] = asyncio.ensure_future(self.__connect(venue))
+        try:
+            while True:
+                await asyncio.sleep(3600)
+        finally:
+            await self.close()
+
+    async def close(self):
+        """断开全部连接"""
+        self.__running = False
+        tasks, self.__tasks = self.__tasks, {}
+        for task in tasks.values():
+            task.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+    async def __connect(self, venue):
+        while True:
+            try:
+                async with websockets.connect(venue.url, max_size=None) as ws:
+                    self.__sockets[venue.name] = ws
+                    topics = list(venue.topics)
+                    if topics:
+                        for message in venue.subscribe(topics):
+                            await ws.send(message)
+                    while True:
+                        try:
+                            message = await asyncio.wait_for(ws.recv(), timeout=HEARTBEAT_SECONDS)
+                        except asyncio.TimeoutError:
+                            if venue.ping() is not None:
+                                await ws.send(venue.ping())
+                            continue
+                        res = venue.decode(message)
+                        if res is None:
+                            continue
+                        replies, records = venue.parse(res)
+                        for reply in replies or []:
+                            await ws.send(reply)
+                        for topic, record in records:
+                            self.__publish(venue.name, topic, record)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print("{}行情websocket连接断开，{}秒后重连……错误：{}".format(venue.name, RECONNECT_SECONDS, str(e)))
+            finally:
+                self.__sockets.pop(venue.name, None)
+            await asyncio.sleep(RECONNECT_SECONDS)
+
+    def __publish(self, exchange, topic, record):
+        for queue in self.__queues.get((exchange, topic), ()):
+            if queue.full():    # 订阅者处理不及时，丢弃最早的记录
+                queue.get_nowait()
+            queue.put_nowait(record)
@@ -0,0 +1,108 @@
+# -*- coding:utf-8 -*-
+
+"""
+参数优化
+
+历史k线只载入一次并放入共享内存，由进程池中的各个进程并行回测不同的参数组合，
+每个进程直接读取同一块内存中的k线数据，不再为每组参数重新读取数据库和转换数据。
+每组参数的回测指标由REPORT计算，汇总到一张pandas表格中返回。
+"""
+
+import itertools
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from purequant.time import get_cur_timestamp
+from purequant.backtest import BACKTEST
+from purequant.account import account
+
+_shm = None
+_engine = None
+_tables = None
+
+
+def _init_worker(name, shape, timestamp, lookback, tables):
+    """进程池中每个进程启动时连接共享内存，并创建指向共享内存的回测引擎"""
+    global _shm, _engine, _tables
+    _shm = shared_memory.SharedMemory(name=name)
+    data = np.ndarray(shape, dtype=np.float64, buffer=_shm.buf)
+    _engine = BACKTEST.from_matrix(timestamp, data, lookback)
+    _tables = tables
+
+
+def _run(task):
+    """在进程池中回测一组参数"""
+    index, strategy, params, save = task
+    account.start()     # 创建策略前启用模拟账户，策略初始化时保存与读取的运行信息也只在内存中
+    account.restore(_tables)    # 同一进程会依次回测多组参数，每组参数开始前恢复到主进程读取的数据
+    try:
+        instance = strategy(**params)
+    except Exception:
+        account.stop()
+        raise
+    cost_time = _engine.run(instance, save=save)
+    result = _engine.report().metrics()
+    result["用时"] = cost_time
+    return index, result
+
+
+class OPTIMIZE:
+
+    def __init__(self, data, lookback=None, processes=None):
+        """
+        参数优化
+        :param data: 历史k线数据，格式与BACKTEST相同，也可以直接传入BACKTEST对象
+        :param lookback: 每次传给策略的k线数量，与BACKTEST相同，传入BACKTEST对象时不填则使用该对象的设置
+        :param processes: 进程数，不填则使用全部cpu核心
+        """
+        engine = data if isinstance(data, BACKTEST) else BACKTEST(data, lookback)
+        self.__timestamp, self.__data = engine.data
+        self.__lookback = engine.lookback if lookback is None else lookback
+        self.__processes = processes or mp.cpu_count()
+
+    def run(self, strategy, params, save=False, **kwargs):
+        """
+        并行回测全部参数组合
+        :param strategy: 策略类，须能以关键字参数创建实例，且有begin_trade(kline=...)方法
+        :param params: 需要优化的参数，如{"fast_length": range(5, 20, 2), "slow_length": range(10, 30, 2)}
+        :param save: 是否将每组参数的运行信息写入数据库，多个进程同时写入同一张数据表时记录会交错，默认不写入
+        :param kwargs: 固定不变的策略参数，如instrument_id="LTC-USDT-201225"
+        :return: 返回一个pandas的DataFrame，每行为一组参数及其回测结果
+        """
+        names = list(params.keys())
+        combinations = [dict(zip(names, values)) for values in itertools.product(*params.values())]
+        tasks = [(index, strategy, dict(kwargs, **combination), save) for index, combination in enumerate(combinations)]
+        tables = self.__seed(strategy, tasks[0][2]) if tasks else {}
+        shm = shared_memory.SharedMemory(create=True, size=max(self.__data.nbytes, 1))
+        try:
+            np.ndarray(self.__data.shape, dtype=np.float64, buffer=shm.buf)[:] = self.__data
+            results = [None] * len(tasks)
+            done = 0
+            start_time = get_cur_timestamp()
+            with mp.Pool(self.__processes, initializer=_init_worker,
+                         initargs=(shm.name, self.__data.shape, self.__timestamp, self.__lookback, tables)) as pool:
+                for index, result in pool.imap_unordered(_run, tasks):
+                    results[index] = result
+                    done += 1
+                    print("参数{}回测完成，已完成{}/{}，已用时{}秒".format(combinations[index], done, len(tasks),
+                                                               get_cur_timestamp() - start_time))
+        finally:
+            shm.close()
+            shm.unlink()
+        return pd.DataFrame([dict(combination, **result) for combination, result in zip(combinations, results)])
+
+    def __seed(self, strategy, params):
+        """
+        在主进程中以模拟账户创建一次策略，将策略初始化时读取的数据表从数据库载入内存，
+        各进程回测每组参数时直接从这份数据开始，不再各自读写数据库
+        :return: 返回account.snapshot()的结果
+        """
+        account.reset()
+        account.start()
+        try:
+            strategy(**params)
+            return account.snapshot()
+        finally:
+            account.stop()
+            account.reset()
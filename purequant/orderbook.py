@@ -0,0 +1,185 @@
+# -*- coding:utf-8 -*-
+
+"""
+本地订单簿
+
+okex websocket原来合并400档深度增量时，每一档增量都在整个买盘或卖盘列表中线性查找，再把整个列表按价格重新排序，
+每秒几百条推送时就会占满CPU。
+OrderBook以价格为键的字典保存每一档，另外维护一个按价格排序的键列表，增量用二分查找插入或删除，
+最优买卖价直接取列表的第一个元素，每秒可以合并数万条增量，合并后按okex的规则计算CRC32校验和。
+校验和只在前25档变化时重新计算，各档的"价格:数量"字符串也只在该侧前25档变化时重新生成，
+还可以设置check_every每N条增量校验一次，校验失败时由调用方重新订阅获取全量数据。
+
+用法：
+    book = OrderBook("BTC-USD-201225")
+    book.apply(res['data'][0], res['action'])   # 传入okex深度频道推送中的数据，校验和不一致时返回False，需要重新订阅
+    book.best_bid()     # ["9000.1", "12", "0", "3"]
+    book.asks(5)        # 前5档卖盘
+"""
+
+from bisect import bisect_left
+import zlib
+
+CHECKSUM_DEPTH = 25     # okex计算校验和使用的档数
+
+
+def _crc(bid_items, ask_items):
+    """买卖盘的"价格:数量"字符串交替拼接后计算CRC32，转换成有符号整数"""
+    n = min(len(bid_items), len(ask_items))
+    items = [None] * (len(bid_items) + len(ask_items))     # 预先分配好列表，一次join，不逐段拼接字符串
+    items[0:2 * n:2] = bid_items[:n]
+    items[1:2 * n:2] = ask_items[:n]
+    items[2 * n:] = bid_items[n:] or ask_items[n:]
+    value = zlib.crc32(":".join(items).encode())
+    return value - (1 << 32) if value > (1 << 31) - 1 else value
+
+
+def checksum(bids, asks, depth=CHECKSUM_DEPTH):
+    """
+    按okex的规则计算深度的校验和：买卖盘前25档的"价格:数量"交替拼接后计算CRC32，转换成有符号整数
+    :param bids: 按价格从高到低排列的买盘，每档为[价格, 数量, ...]的字符串列表
+    :param asks: 按价格从低到高排列的卖盘
+    :param depth: 参与计算的档数
+    :return: 返回整数
+    """
+    return _crc([row[0] + ":" + row[1] for row in bids[:depth]], [row[0] + ":" + row[1] for row in asks[:depth]])
+
+
+class _Side:
+    """订单簿的一侧，键为价格（买盘取负数），按键从小到大排列，第一个即为最优价"""
+
+    def __init__(self, descending, depth=CHECKSUM_DEPTH):
+        self.descending = descending
+        self.depth = depth
+        self.levels = {}    # {键: [价格, 数量, ...]}
+        self.texts = {}     # {键: "价格:数量"}，合并时生成，计算校验和时不必再拼接
+        self.keys = []      # 排好序的键
+        self.changed = True     # 前depth档在上次生成items之后是否变化
+        self.__items = []
+
+    def clear(self):
+        self.levels = {}
+        self.texts = {}
+        self.keys = []
+        self.changed = True
+
+    def apply(self, rows):
+        """合并增量，数量为0的档位删除，同时记录前depth档是否变化"""
+        levels, texts, keys, depth = self.levels, self.texts, self.keys, self.depth
+        changed = self.changed
+        for row in rows:
+            key = float(row[0])
+            if self.descending:
+                key = -key
+            if not changed and (len(keys) < depth or key <= keys[depth - 1]):
+                changed = True
+            if float(row[1]) == 0:
+                if levels.pop(key, None) is not None:
+                    del texts[key]
+                    del keys[bisect_left(keys, key)]
+            else:
+                if key not in levels:
+                    keys.insert(bisect_left(keys, key), key)
+                levels[key] = row
+                texts[key] = row[0] + ":" + row[1]
+        self.changed = changed
+
+    def items(self):
+        """前depth档的"价格:数量"字符串列表，只在前depth档变化后重新生成"""
+        if self.changed:
+            texts = self.texts
+            self.__items = [texts[key] for key in self.keys[:self.depth]]
+            self.changed = False
+        return self.__items
+
+    def top(self, depth=None):
+        levels = self.levels
+        return [levels[key] for key in (self.keys if depth is None else self.keys[:depth])]
+
+    def best(self):
+        return self.levels[self.keys[0]] if self.keys else None
+
+
+class OrderBook:
+    """由全量与增量深度推送合并的本地订单簿，档位保留交易所推送的原始字符串"""
+
+    def __init__(self, instrument_id=None, check_every=1):
+        """
+        :param instrument_id: 合约ID，只用于标识
+        :param check_every: 每多少条增量推送校验一次校验和，全量推送总是校验
+        """
+        self.instrument_id = instrument_id
+        self.check_every = check_every
+        self.timestamp = None
+        self.__unchecked = 0    # 上次校验之后合并的增量推送条数
+        self.__checksum = None
+        self.__bids = _Side(descending=True)
+        self.__asks = _Side(descending=False)
+
+    def partial(self, bids, asks):
+        """
+        使用全量数据重建订单簿
+        :param bids: 买盘，每档为[价格, 数量, ...]的字符串列表
+        :param asks: 卖盘
+        """
+        self.__bids.clear()
+        self.__asks.clear()
+        self.update(bids, asks)
+
+    def update(self, bids, asks):
+        """
+        合并增量数据，数量为"0"的档位删除
+        :param bids: 买盘增量
+        :param asks: 卖盘增量
+        """
+        self.__bids.apply(bids)
+        self.__asks.apply(asks)
+
+    def apply(self, data, action="update"):
+        """
+        合并一条okex深度频道的推送并校验
+        :param data: 推送中的res['data'][0]
+        :param action: 推送中的res['action']，"partial"或"update"
+        :return: 校验和一致时返回True，推送中没有校验和或本条不需要校验时也返回True
+        """
+        if action == "partial":
+            self.partial(data.get('bids', []), data.get('asks', []))
+            self.__unchecked = self.check_every
+        else:
+            self.update(data.get('bids', []), data.get('asks', []))
+            self.__unchecked += 1
+        self.timestamp = data.get('timestamp')
+        if 'checksum' not in data or self.__unchecked < self.check_every:
+            return True
+        self.__unchecked = 0
+        return self.checksum() == data['checksum']
+
+    def bids(self, depth=None):
+        """
+        买盘，按价格从高到低排列
+        :param depth: 档数，不填时返回全部
+        """
+        return self.__bids.top(depth)
+
+    def asks(self, depth=None):
+        """卖盘，按价格从低到高排列"""
+        return self.__asks.top(depth)
+
+    def best_bid(self):
+        """最优买价的一档，没有买盘时返回None"""
+        return self.__bids.best()
+
+    def best_ask(self):
+        """最优卖价的一档，没有卖盘时返回None"""
+        return self.__asks.best()
+
+    def checksum(self, depth=CHECKSUM_DEPTH):
+        """按okex的规则计算当前订单簿的校验和，前25档没有变化时直接返回上次的结果"""
+        if depth != CHECKSUM_DEPTH:
+            return checksum(self.__bids.top(depth), self.__asks.top(depth), depth)
+        if self.__checksum is None or self.__bids.changed or self.__asks.changed:
+            self.__checksum = _crc(self.__bids.items(), self.__asks.items())
+        return self.__checksum
+
+    def __len__(self):
+        return len(self.__bids.keys) + len(self.__asks.keys)
@@ -0,0 +1,354 @@
+# -*- coding:utf-8 -*-
+
+"""
+订单状态跟踪
+
+交易助手原来下单后用REST接口查询订单状态，时间撤单还要先sleep若干秒再查询，每次查询都是一个签名请求并阻塞策略线程。
+ORDERTRACKER在后台线程中订阅交易所的私有websocket订单频道，按订单ID保存最新的订单状态，
+订单完全成交、撤销或失败时立即唤醒等待的线程或协程，成交在毫秒级即可得知：
+
+    okex交割合约与永续合约：futures/order、swap/order频道
+    火币永续合约：orders.$contract_code频道
+    bitmex：order与execution频道
+
+websocket断线期间的订单状态可能缺失，断线时清除尚未结束的订单状态，get()与wait()返回None，由调用方改用REST接口查询。
+
+用法：
+    exchange = OKEXFUTURES(access_key, secret_key, passphrase, "BTC-USD-201225")
+    exchange.track_orders()     # trade中的okex合约与火币永续合约启用后，交易助手只在websocket没有推送时才查询REST接口
+
+    tracker = OKEXORDERTRACKER(access_key, secret_key, passphrase, "BTC-USD-201225")
+    tracker.start()
+    info = tracker.wait(order_id, 10)           # 阻塞等待订单结束，最多10秒
+    info = await tracker.future(order_id)       # 在协程中等待订单结束
+"""
+
+import abc
+import time
+import gzip
+import zlib
+import json
+import asyncio
+import datetime
+import threading
+import urllib.parse
+from collections import OrderedDict
+import websockets
+from purequant import codec
+from purequant.clock import clock
+from purequant.signer import signer
+from purequant.exchange.okex import utils as okexutils     # 注册okex的服务器时间接口
+from purequant.exchange.huobi.util import createSign
+from purequant.exchange.bitmex.bitmex_websocket import generate_signature
+
+FINAL_STATES = ("完全成交", "撤单成功", "失败", "部分成交撤销")   # 订单结束时的状态
+MAX_ORDERS = 1000       # 最多保存的订单数量，超过时丢弃最早的订单
+RECONNECT_SECONDS = 3   # 断线后重连的间隔秒数
+
+
+def okex_order_info(result, exchange):
+    """将okex交割合约与永续合约的订单信息转换成trade中get_order_info()的格式"""
+    instrument_id = result['instrument_id']
+    action = {'1': "买入开多", '2': "卖出开空", '3': "卖出平多", '4': "买入平空"}.get(str(result['type']))
+    price = float(result['price_avg'])   # 成交均价
+    amount = int(result['filled_qty'])   # 已成交数量
+    contract_val = float(result.get('contract_val') or 0)
+    if instrument_id.split("-")[1] in ("usd", "USD"):
+        turnover = contract_val * amount
+    else:
+        turnover = round(contract_val * amount * price, 2)
+    state = int(result['state'])
+    info = {"交易所": exchange, "合约ID": instrument_id, "方向": action}
+    if state in (2, -1, 1):
+        info.update({"订单状态": {2: "完全成交", -1: "撤单成功", 1: "部分成交"}[state], "成交均价": price,
+                     "已成交数量": amount, "成交金额": turnover})
+    else:
+        info["订单状态"] = {-2: "失败", 0: "等待成交", 3: "下单中", 4: "撤单中"}.get(state)
+    return info
+
+
+def huobi_order_info(result):
+    """将火币永续合约的订单信息转换成trade中get_order_info()的格式"""
+    state = int(result['status'])
+    action = {("buy", "open"): "买入开多", ("buy", "close"): "买入平空", ("sell", "open"): "卖出开空",
+              ("sell", "close"): "卖出平多"}.get((result['direction'], result['offset']), "交易方向错误！")
+    info = {"交易所": "Huobi永续合约", "合约ID": result['contract_code'], "方向": action}
+    if state in (6, 7, 4, 5):
+        info.update({"订单状态": {6: "完全成交", 7: "撤单成功", 4: "部分成交", 5: "部分成交撤销"}[state],
+                     "成交均价": result['trade_avg_price'], "已成交数量": result['trade_volume'],
+                     "成交金额": result['trade_turnover']})
+    else:
+        info["订单状态"] = {1: "准备提交", 2: "准备提交", 3: "已提交", 11: "撤单中"}.get(state)
+    return info
+
+
+def bitmex_order_info(result):
+    """将bitmex的订单信息转换成trade中get_order_info()的格式"""
+    info = {"交易所": "BITMEX", "合约ID": result.get("symbol"), "方向": "买入" if result.get('side') == "Buy" else "卖出"}
+    state = {"Filled": "完全成交", "Rejected": "失败", "Canceled": "撤单成功", "New": "等待成交",
+             "PartiallyFilled": "部分成交"}.get(result.get('ordStatus'))
+    info["订单状态"] = state
+    if state in ("完全成交", "撤单成功", "部分成交"):
+        info.update({"成交均价": result.get("avgPx"), "已成交数量": result.get("cumQty")})
+    return info
+
+
+class ORDERTRACKER(abc.ABC):
+    """订单状态跟踪的基类，子类实现_feed()协程，连接websocket后调用_connected()，收到订单推送时调用update()"""
+
+    name = ""   # 交易所名称，用于提示信息
+
+    def __init__(self):
+        self.connected = False
+        self.__orders = OrderedDict()   # {订单ID: 最新的订单信息}
+        self.__futures = {}     # {订单ID: [asyncio.Future]}，等待订单结束的协程
+        self.__condition = threading.Condition()
+        self.__thread = None
+
+    def start(self):
+        """在后台线程中连接websocket，断线后自动重连"""
+        if self.__thread is None:
+            self.__thread = threading.Thread(target=asyncio.run, args=(self.__run(),), daemon=True)
+            self.__thread.start()
+        return self
+
+    async def __run(self):
+        while True:
+            try:
+                await self._feed()
+            except Exception as e:
+                print("{}订单websocket连接断开，{}秒后重连……错误：{}".format(self.name, RECONNECT_SECONDS, str(e)))
+            self._connected(False)
+            await asyncio.sleep(RECONNECT_SECONDS)
+
+    @abc.abstractmethod
+    async def _feed(self):
+        """连接websocket并订阅订单频道，一直接收推送直到断线"""
+
+    def _connected(self, connected=True):
+        """
+        记录websocket连接状态，断线时清除尚未结束的订单状态，断线期间的变化只能从REST接口查询
+        :param connected: 是否已连接并订阅成功
+        """
+        with self.__condition:
+            self.connected = connected
+            if not connected:
+                for order_id in [key for key, info in self.__orders.items() if info.get("订单状态") not in FINAL_STATES]:
+                    del self.__orders[order_id]
+            self.__condition.notify_all()
+
+    def update(self, order_id, info):
+        """
+        记录订单的最新状态，订单结束时唤醒等待的线程与协程
+        :param order_id: 订单ID
+        :param info: 与trade中get_order_info()格式相同的订单信息
+        """
+        order_id = str(order_id)
+        with self.__condition:
+            self.__orders[order_id] = info
+            self.__orders.move_to_end(order_id)
+            while len(self.__orders) > MAX_ORDERS:
+                self.__orders.popitem(last=False)
+            futures = self.__futures.pop(order_id, []) if info.get("订单状态") in FINAL_STATES else []
+            self.__condition.notify_all()
+        for future in futures:
+            future.get_loop().call_soon_threadsafe(_set_result, future, info)
+
+    def get(self, order_id, timeout=0):
+        """
+        获取订单的最新状态
+        :param order_id: 订单ID
+        :param timeout: 已连接但还没有收到该订单的推送时最多等待的秒数
+        :return: 返回订单信息，未连接或没有收到推送时返回None
+        """
+        order_id = str(order_id)
+        with self.__condition:
+            self.__condition.wait_for(lambda: not self.connected or order_id in self.__orders, timeout)
+            return self.__orders.get(order_id) if self.connected else None
+
+    def wait(self, order_id, timeout):
+        """
+        阻塞等待订单结束（完全成交、撤单成功、失败），未连接时与sleep相同
+        :param order_id: 订单ID
+        :param timeout: 最多等待的秒数
+        :return: 返回结束时的订单信息，超时返回None
+        """
+        order_id = str(order_id)
+        end = time.monotonic() + timeout
+        with self.__condition:
+            while True:
+                info = self.__orders.get(order_id)
+                if info is not None and info.get("订单状态") in FINAL_STATES:
+                    return info
+                remaining = end - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self.__condition.wait(remaining)
+
+    def future(self, order_id):
+        """
+        在协程中等待订单结束：info = await tracker.future(order_id)
+        可以配合asyncio.wait_for()设置超时
+        :param order_id: 订单ID
+        :return: 返回asyncio.Future，结果为结束时的订单信息
+        """
+        order_id = str(order_id)
+        future = asyncio.get_running_loop().create_future()
+        with self.__condition:
+            info = self.__orders.get(order_id)
+            if info is not None and info.get("订单状态") in FINAL_STATES:
+                future.set_result(info)
+            else:
+                self.__futures.setdefault(order_id, []).append(future)
+        return future
+
+    def forget(self, order_id):
+        """不再跟踪某个订单"""
+        with self.__condition:
+            self.__orders.pop(str(order_id), None)
+            self.__futures.pop(str(order_id), None)
+
+
+def _set_result(future, info):
+    if not future.done():
+        future.set_result(info)
+
+
+def _inflate(data):
+    decompress = zlib.decompressobj(-zlib.MAX_WBITS)
+    return decompress.decompress(data) + decompress.flush()
+
+
+class OKEXORDERTRACKER(ORDERTRACKER):
+    """okex交割合约与永续合约的订单状态跟踪"""
+
+    URL = "wss://real.okex.com:8443/ws/v3"
+
+    def __init__(self, access_key, secret_key, passphrase, instrument_id):
+        """
+        :param instrument_id: 例如："BTC-USD-201225"、"BTC-USDT-SWAP"，永续合约订阅swap/order，交割合约订阅futures/order
+        """
+        super().__init__()
+        self.__access_key = access_key
+        self.__secret_key = secret_key
+        self.__passphrase = passphrase
+        swap = instrument_id.upper().endswith("SWAP")
+        self.__channel = ("swap/order:" if swap else "futures/order:") + instrument_id
+        self.__exchange = "Okex永续合约" if swap else "Okex交割合约"
+        self.name = self.__exchange
+
+    async def _feed(self):
+        async with websockets.connect(self.URL) as ws:
+            timestamp = str(clock.now_ms("okex") / 1000)
+            sign = signer(self.__secret_key).b64digest(timestamp + 'GET' + '/users/self/verify').decode("utf-8")
+            await ws.send(json.dumps({"op": "login", "args": [self.__access_key, self.__passphrase, timestamp, sign]}))
+            while True:
+                try:
+                    message = await asyncio.wait_for(ws.recv(), timeout=25)
+                except asyncio.TimeoutError:    # 25秒没有推送时发送ping保持连接
+                    await ws.send('ping')
+                    continue
+                message = _inflate(message)
+                if message == b'pong':
+                    continue
+                res = codec.loads(message)
+                event = res.get("event")
+                if event == "login":
+                    await ws.send(json.dumps({"op": "subscribe", "args": [self.__channel]}))
+                elif event == "subscribe":
+                    self._connected()
+                elif event == "error":
+                    raise Exception(res.get("message"))
+                for item in res.get("data", []):
+                    self.update(item['order_id'], okex_order_info(item, self.__exchange))
+
+
+class HUOBIORDERTRACKER(ORDERTRACKER):
+    """火币永续合约的订单状态跟踪"""
+
+    URL = "wss://api.hbdm.com/swap-notification"
+
+    def __init__(self, access_key, secret_key, instrument_id):
+        """
+        :param instrument_id: 例如："BTC-USD-SWAP"或"BTC-USD"
+        """
+        super().__init__()
+        self.__access_key = access_key
+        self.__secret_key = secret_key
+        self.__topic = "orders.{}-{}".format(instrument_id.split("-")[0], instrument_id.split("-")[1]).lower()
+        self.name = "Huobi永续合约"
+
+    async def _feed(self):
+        async with websockets.connect(self.URL) as ws:
+            url = urllib.parse.urlparse(self.URL)
+            params = {"AccessKeyId": self.__access_key, "SignatureMethod": "HmacSHA256", "SignatureVersion": "2",
+                      "Timestamp": datetime.datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S')}
+            params["Signature"] = createSign(params, "GET", url.hostname, url.path, self.__secret_key)
+            params.update({"op": "auth", "type": "api"})
+            await ws.send(json.dumps(params))
+            while True:
+                res = codec.loads(gzip.decompress(await ws.recv()))
+                op = res.get("op")
+                if op == "ping":
+                    await ws.send(json.dumps({"op": "pong", "ts": res["ts"]}))
+                elif op in ("auth", "sub") and res.get("err-code", 0) != 0:
+                    raise Exception(res.get("err-msg"))
+                elif op == "auth":
+                    await ws.send(json.dumps({"op": "sub", "cid": "purequant", "topic": self.__topic}))
+                elif op == "sub":
+                    self._connected()
+                elif op == "notify" and res.get("topic", "").lower() == self.__topic:
+                    self.update(res['order_id_str'], huobi_order_info(res))
+
+
+class BITMEXORDERTRACKER(ORDERTRACKER):
+    """bitmex的订单状态跟踪，order频道推送的更新只包含变化的字段，按订单ID合并后再转换格式"""
+
+    def __init__(self, access_key, secret_key, instrument_id, testing=False):
+        """
+        :param instrument_id: 例如："XBTUSD"
+        :param testing: 是否是测试网
+        """
+        super().__init__()
+        self.__access_key = access_key
+        self.__secret_key = secret_key
+        self.__instrument_id = instrument_id
+        self.__url = "wss://testnet.bitmex.com/realtime" if testing else "wss://www.bitmex.com/realtime"
+        self.__rows = {}    # {订单ID: 合并后的订单数据}
+        self.name = "BITMEX"
+
+    async def _feed(self):
+        async with websockets.connect(self.__url) as ws:
+            expires = int(time.time()) + 5
+            signature = generate_signature(self.__secret_key, 'GET', '/realtime', expires, '')
+            await ws.send(json.dumps({"op": "authKeyExpires", "args": [self.__access_key, expires, signature]}))
+            channels = ["order:" + self.__instrument_id, "execution:" + self.__instrument_id]
+            await ws.send(json.dumps({"op": "subscribe", "args": channels}))
+            subscribed = 0
+            while True:
+                try:
+                    message = await asyncio.wait_for(ws.recv(), timeout=25)
+                except asyncio.TimeoutError:
+                    await ws.send('ping')
+                    continue
+                if message == 'pong':
+                    continue
+                res = codec.loads(message)
+                if "error" in res:
+                    raise Exception(res["error"])
+                if res.get("subscribe") in channels and res.get("success"):
+                    subscribed += 1
+                    if subscribed == len(channels):
+                        self._connected()
+                    continue
+                if res.get("table") not in ("order", "execution"):
+                    continue
+                if res.get("action") == "partial" and res["table"] == "order":
+                    self.__rows = {}
+                for item in res.get("data", []):
+                    row = self.__rows.setdefault(item['orderID'], {})
+                    row.update({key: value for key, value in item.items() if value is not None})
+                    if row.get("ordStatus"):
+                        self.update(item['orderID'], bitmex_order_info(row))
+                    if row.get("ordStatus") in ("Filled", "Canceled", "Rejected"):
+                        del self.__rows[item['orderID']]
@@ -10,6 +10,7 @@ email: interstella.ranger2020@gmail.com
 from purequant.market import MARKET
 from purequant.config import config
 from purequant.storage import storage
+from purequant.account import account
 
 class POSITION:
 
@@ -19,13 +20,21 @@ class POSITION:
         self.__time_frame = time_frame
         self.__market = MARKET(self.__platform, self.__instrument_id, self.__time_frame)
 
+    def __backtest_info(self):
+        """回测模式下获取策略最新保存的一条运行信息"""
+        database = "回测"
+        data_sheet = self.__instrument_id.split("-")[0].lower() + "_" + self.__time_frame
+        if account.enabled and account.has(database, data_sheet):
+            return account.last(database, data_sheet)
+        return storage.read_mysql_datas(0, database, data_sheet, "总资金", ">")[-1]
+
     def direction(self):
         """获取当前持仓方向"""
         if config.backtest != "enabled":    # 实盘模式下实时获取账户实际持仓方向，仅支持单向持仓模式下的查询
             result = self.__platform.get_position()['direction']
             return result
-        else:   # 回测模式下从数据库中读取持仓方向
-            result = storage.read_mysql_datas(0, "回测", self.__instrument_id.split("-")[0].lower() + "_" + self.__time_frame, "总资金", ">")[-1][6]
+        else:   # 回测模式下读取策略保存的持仓方向，启用了回测模拟账户时直接从内存中读取
+            result = self.__backtest_info()[6]
             return result
 
     def amount(self, mode=None, side=None):
@@ -42,8 +51,8 @@ class POSITION:
             else:
                 result = self.__platform.get_position()['amount']
                 return result
-        else:   # 回测模式下从数据库中读取持仓数量
-            result = storage.read_mysql_datas(0, "回测", self.__instrument_id.split("-")[0].lower() + "_" + self.__time_frame, "总资金", ">")[-1][7]
+        else:   # 回测模式下读取策略保存的持仓数量，启用了回测模拟账户时直接从内存中读取
+            result = self.__backtest_info()[7]
             return result
 
     def price(self, mode=None, side=None):
@@ -60,8 +69,8 @@ class POSITION:
             else:
                 result = self.__platform.get_position()['price']
                 return result
-        else:   # 回测模式下从数据库中读取持仓价格
-            result = storage.read_mysql_datas(0, "回测", self.__instrument_id.split("-")[0].lower() + "_" + self.__time_frame, "总资金", ">")[-1][5]
+        else:   # 回测模式下读取策略保存的持仓价格，启用了回测模拟账户时直接从内存中读取
+            result = self.__backtest_info()[5]
             return result
 
 
@@ -0,0 +1,197 @@
+# -*- coding:utf-8 -*-
+
+"""
+交易所REST请求频率限制
+
+策略轮询与交易助手的重复查询叠加后容易超过交易所的频率限制，被拒绝的请求可能导致订单丢失。
+transport与async_transport发送每个请求之前先从对应的令牌桶中取出令牌，令牌不足时等待到有令牌为止，
+请求按交易所规定的频率排队发出，而不是超限后失败重试。
+
+    okex：每个接口单独计数，下单与撤单为2秒40次，其他接口为2秒20次
+    币安：按接口权重计数，现货1分钟1200，合约1分钟2400，并根据响应头X-MBX-USED-WEIGHT-1M校准已用权重
+    火币：私有接口3秒36次，行情接口1秒800次
+    bitmex：1分钟60次，并根据响应头x-ratelimit-remaining校准剩余次数
+
+默认只使用限制的90%，可在配置文件中设置：{"RATELIMIT": {"enabled": "true", "safety": 0.9}}，
+"enabled"为"false"时不限制。收到429或418时按响应头Retry-After暂停该组请求。
+"""
+
+import re
+import time
+import threading
+from urllib.parse import urlsplit
+from purequant.config import config
+
+# (域名, 路径前缀, 次数或权重, 时间窗口秒数, 是否每个接口单独计数)，按顺序匹配第一条
+RULES = [
+    ("www.okex.com", "/api/futures/v3/order", 40, 2, True),
+    ("www.okex.com", "/api/futures/v3/cancel_order", 40, 2, True),
+    ("www.okex.com", "/api/swap/v3/order", 40, 2, True),
+    ("www.okex.com", "/api/swap/v3/cancel_order", 40, 2, True),
+    ("www.okex.com", "/", 20, 2, True),
+    ("www.binance.com", "/dapi", 2400, 60, False),
+    ("www.binance.com", "/fapi", 2400, 60, False),
+    ("www.binance.com", "/api", 1200, 60, False),
+    ("api.hbdm.com", "/market", 800, 1, False),
+    ("api.hbdm.com", "/swap-ex", 800, 1, False),
+    ("api.hbdm.com", "/swap-api", 36, 3, False),
+    ("api.hbdm.com", "/api", 36, 3, False),
+    ("api.huobi.pro", "/market", 800, 1, False),
+    ("api.huobi.pro", "/", 100, 10, False),
+    ("www.bitmex.com", "/api/v1", 60, 60, False),
+    ("testnet.bitmex.com", "/api/v1", 60, 60, False),
+]
+
+# 币安权重不为1的接口
+WEIGHTS = {
+    "/api/v3/account": 10,
+    "/api/v3/allOrders": 10,
+    "/api/v3/myTrades": 10,
+    "/api/v3/openOrders": 3,
+    "/api/v3/ticker/bookTicker": 2,
+    "/fapi/v2/balance": 5,
+    "/fapi/v2/positionRisk": 5,
+    "/fapi/v1/userTrades": 5,
+    "/dapi/v1/userTrades": 20,
+}
+
+_ID = re.compile(r"[A-Z0-9-]")
+_VERSION = re.compile(r"v\d+$")
+
+
+def _normalize(path):
+    """把路径中的合约ID、订单ID等替换成*，同一接口共用一个令牌桶"""
+    return "/".join("*" if _ID.search(x) and not _VERSION.match(x) else x for x in path.split("/"))
+
+
+class TokenBucket:
+    """令牌桶，令牌不足时预约未来的令牌，按预约顺序排队"""
+
+    def __init__(self, limit, period, safety=1.0):
+        """
+        :param limit: 时间窗口内允许的次数或权重
+        :param period: 时间窗口秒数
+        :param safety: 实际使用的比例
+        """
+        self.limit = limit
+        self.period = period
+        self.capacity = limit * safety
+        self.rate = self.capacity / period
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.__lock = threading.Lock()
+
+    def __refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, weight=1):
+        """
+        取出weight个令牌
+        :return: 返回需要等待的秒数，0表示可以立即发送
+        """
+        with self.__lock:
+            now = time.monotonic()
+            self.__refill(now)
+            self.tokens -= weight
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(wait, self.paused_until - now)
+
+    def sync(self, remaining):
+        """
+        按交易所返回的剩余次数校准令牌数量
+        :param remaining: 当前时间窗口内交易所允许的剩余次数或权重
+        """
+        with self.__lock:
+            self.__refill(time.monotonic())
+            self.tokens = min(self.tokens, remaining - (self.limit - self.capacity))
+
+    def pause(self, seconds):
+        """暂停发送请求"""
+        with self.__lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+class __RateLimit:
+    """交易所REST请求频率限制"""
+
+    def __init__(self):
+        self.__rules = list(RULES)
+        self.__buckets = {}     # {(域名, 路径前缀或接口): TokenBucket}
+        self.__lock = threading.Lock()
+
+    def set_limit(self, host, prefix, limit, period, per_path=False):
+        """
+        设置或修改频率限制，优先于默认规则
+        :param host: 域名，如"www.okex.com"
+        :param prefix: 路径前缀，如"/api/futures/v3/order"
+        :param limit: 时间窗口内允许的次数或权重
+        :param period: 时间窗口秒数
+        :param per_path: 是否每个接口单独计数
+        """
+        with self.__lock:
+            self.__rules.insert(0, (host, prefix, limit, period, per_path))
+            self.__buckets = {}
+
+    def bucket(self, url):
+        """
+        获取请求所属的令牌桶
+        :param url: 请求的完整网址
+        :return: 返回TokenBucket对象与请求路径，没有匹配的规则时返回(None, 路径)
+        """
+        parts = urlsplit(url)
+        path = parts.path
+        for host, prefix, limit, period, per_path in self.__rules:
+            if parts.netloc == host and (prefix == "/" or path == prefix or path.startswith(prefix + "/")):
+                key = (host, _normalize(path) if per_path else prefix)
+                bucket = self.__buckets.get(key)
+                if bucket is None:
+                    with self.__lock:
+                        bucket = self.__buckets.setdefault(key, TokenBucket(limit, period, getattr(config, "ratelimit_safety", 0.9)))
+                return bucket, path
+        return None, path
+
+    def acquire(self, url):
+        """
+        为一次请求取出令牌
+        :param url: 请求的完整网址
+        :return: 返回发送前需要等待的秒数
+        """
+        if getattr(config, "ratelimit_enabled", "true") != "true":
+            return 0.0
+        bucket, path = self.bucket(url)
+        if bucket is None:
+            return 0.0
+        return bucket.reserve(WEIGHTS.get(path, 1))
+
+    def wait(self, url):
+        """取出令牌，令牌不足时阻塞等待"""
+        seconds = self.acquire(url)
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def feedback(self, url, status_code, headers):
+        """
+        根据响应头校准令牌桶
+        :param url: 请求的完整网址
+        :param status_code: 响应状态码
+        :param headers: 响应头
+        """
+        bucket, path = self.bucket(url)
+        if bucket is None:
+            return
+        used = headers.get("X-MBX-USED-WEIGHT-1M")
+        remaining = headers.get("x-ratelimit-remaining")
+        if used is not None:
+            bucket.sync(bucket.limit - int(used))
+        elif remaining is not None:
+            bucket.sync(int(remaining))
+        if status_code in (418, 429):
+            try:
+                bucket.pause(float(headers.get("Retry-After")))
+            except (TypeError, ValueError):     # 没有Retry-After或为日期格式时暂停一个时间窗口
+                bucket.pause(bucket.period)
+
+
+ratelimit = __RateLimit()
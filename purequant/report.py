@@ -0,0 +1,116 @@
+# -*- coding:utf-8 -*-
+
+"""
+回测报告
+
+根据回测过程中记录的资金曲线、持仓与策略运行信息，一次性用numpy计算夏普比率、索提诺比率、最大回撤及其持续时间、
+胜率、盈亏比、持仓时间占比、换手率等指标，可输出为字典、JSON或HTML，
+参数优化时每组参数的回测结果不必再逐个查询数据库计算。
+"""
+
+import json
+import numpy as np
+import pandas as pd
+
+
+class REPORT:
+
+    def __init__(self, timestamp, equity, position=None, records=None, periods=None):
+        """
+        回测报告
+        :param timestamp: 每根k线的时间，ISO格式的utc时间字符串或秒/毫秒时间戳
+        :param equity: 每根k线上的总资金，策略记录第一条运行信息之前为nan
+        :param position: 每根k线上的持仓数量，多头为正，空头为负，不填则不计算持仓时间占比
+        :param records: 策略保存的运行信息，字段顺序与storage.mysql_save_strategy_run_info()相同，用于统计每笔交易
+        :param periods: 一年的k线数量，用于年化，不填则根据k线时间间隔计算
+        """
+        equity = np.asarray(equity, dtype=np.float64)
+        valid = np.flatnonzero(~np.isnan(equity))
+        first = valid[0] if len(valid) else len(equity)
+        index = np.where(np.isnan(equity), 0, np.arange(len(equity)))
+        self.__equity = equity[np.maximum.accumulate(index)][first:]     # 没有新记录的k线沿用上一根k线的总资金
+        self.__position = None if position is None else np.asarray(position, dtype=np.float64)[first:]
+        self.__records = records or []
+        self.__interval = self.__bar_interval(timestamp)
+        self.__periods = periods or (365 * 86400 / self.__interval if self.__interval else 1)
+
+    def __bar_interval(self, timestamp):
+        """k线时间间隔的中位数（秒）"""
+        if len(timestamp) < 2:
+            return 0
+        value = timestamp[0]
+        if isinstance(value, str):
+            seconds = np.array([x.rstrip("Zz") for x in timestamp], dtype="datetime64[s]").astype(np.int64)
+        else:
+            seconds = np.asarray(timestamp, dtype=np.float64)
+            if seconds[0] > 10 ** 11:   # 毫秒时间戳
+                seconds = seconds / 1000
+        return float(np.median(np.diff(seconds)))
+
+    def metrics(self):
+        """
+        计算回测指标
+        :return: 返回一个字典
+        """
+        equity = self.__equity
+        if len(equity) == 0:
+            return {}
+        returns = np.diff(equity) / equity[:-1] if len(equity) > 1 else np.zeros(0)
+        mean = returns.mean() if len(returns) else 0.0
+        std = returns.std() if len(returns) else 0.0
+        downside = np.sqrt(np.mean(np.minimum(returns, 0) ** 2)) if len(returns) else 0.0
+        peak = np.maximum.accumulate(equity)
+        drawdown = np.where(peak > 0, 1 - equity / peak, 0)
+        highs = np.flatnonzero(equity >= peak)  # 创出新高的k线
+        duration = int((np.diff(np.append(highs, len(equity))) - 1).max())
+        profit = np.array([row[8] for row in self.__records], dtype=np.float64)
+        turnover = np.array([row[4] for row in self.__records], dtype=np.float64)
+        closed = profit[profit != 0]    # 有盈亏的记录即为平仓交易
+        win = closed[closed > 0].sum()
+        loss = -closed[closed < 0].sum()
+        total_return = equity[-1] / equity[0] - 1
+        years = len(equity) / self.__periods
+        return {
+            "起始资金": float(equity[0]),
+            "最终资金": float(equity[-1]),
+            "总收益率": float(total_return),
+            "年化收益率": float((1 + total_return) ** (1 / years) - 1) if years > 0 and total_return > -1 else float("nan"),
+            "夏普比率": float(mean / std * np.sqrt(self.__periods)) if std > 0 else float("nan"),
+            "索提诺比率": float(mean / downside * np.sqrt(self.__periods)) if downside > 0 else float("nan"),
+            "最大回撤": float(drawdown.max()),
+            "最大回撤持续k线数": duration,
+            "最大回撤持续秒数": duration * self.__interval,
+            "交易次数": int(len(closed)),
+            "胜率": float((closed > 0).mean()) if len(closed) else float("nan"),
+            "盈亏比": float(win / loss) if loss > 0 else float("nan"),
+            "持仓时间占比": float((self.__position != 0).mean()) if self.__position is not None and len(self.__position) else float("nan"),
+            "换手率": float(turnover.sum() / equity.mean()) if equity.mean() else float("nan")
+        }
+
+    def to_json(self, path=None):
+        """
+        输出JSON格式的回测报告
+        :param path: 文件路径，不填则只返回字符串
+        :return: 返回JSON字符串
+        """
+        metrics = {key: (None if isinstance(value, float) and np.isnan(value) else value) for key, value in self.metrics().items()}
+        result = json.dumps(metrics, ensure_ascii=False, indent=4)
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(result)
+        return result
+
+    def to_html(self, path=None):
+        """
+        输出HTML格式的回测报告，包含回测指标与资金曲线
+        :param path: 文件路径，不填则只返回字符串
+        :return: 返回HTML字符串
+        """
+        metrics = pd.DataFrame(list(self.metrics().items()), columns=["指标", "数值"])
+        equity = pd.DataFrame({"总资金": self.__equity})
+        result = "<html><head><meta charset=\"utf-8\"><title>回测报告</title></head><body>" \
+                 "<h2>回测指标</h2>{}<h2>资金曲线</h2>{}</body></html>".format(metrics.to_html(index=False), equity.to_html())
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(result)
+        return result
@@ -7,17 +7,30 @@ Author: Gary-Hertel
 Date:   2020/07/09
 email: interstella.ranger2020@gmail.com
 """
-import logging, mysql.connector, pymongo
+import logging, mysql.connector, pymongo, threading, atexit
 from purequant import time
 from purequant.indicators import INDICATORS
 import pandas as pd
 from purequant.config import config
+from purequant.account import account, RUN_INFO_COLUMNS
+
+_logger = logging.getLogger(__name__)
+MISSING_TABLE_ERRORS = (1049, 1146)    # mysql的数据库不存在、数据表不存在错误码
 
 class __Storage:
     """K线等各种数据的存储与读取"""
 
     def __init__(self):
         self.__old_kline = 0
+        # 策略运行信息的写入缓冲
+        self.__run_info_lock = threading.RLock()
+        self.__run_info_buffer = {}     # {(数据库, 数据表): 尚未写入的数据行列表}
+        self.__run_info_count = 0
+        self.__run_info_last_flush = time.get_cur_timestamp()
+        self.__run_info_timer = None
+        self.__run_info_tables = set()  # 已确认存在的(数据库, 数据表)
+        self.__run_info_conn = None
+        atexit.register(self.flush_strategy_run_info)   # 程序退出时写入缓冲中的所有数据
 
     def save_asset_and_profit(self, database, data_sheet, profit, asset):
         """存储单笔交易盈亏与总资金信息至mysql数据库"""
@@ -237,6 +250,11 @@ class __Storage:
         :param field: 字段
         :return: 返回值查询到的数据，如未查询到则返回None
         """
+        if account.enabled:     # 启用了回测模拟账户时从内存中查询，数据表不在内存中时只从数据库读取一次
+            self.__load_to_account(database, datasheet)
+            return account.select(data, database, datasheet, field, operator)
+        if self.__run_info_buffer:   # 先写入缓冲中的策略运行信息，保证能读取到刚保存的数据
+            self.flush_strategy_run_info()
         # 连接数据库
         user = config.mysql_user_name if config.mysql_authorization == "enabled" else 'root'
         password = config.mysql_password if config.mysql_authorization == "enabled" else 'root'
@@ -259,6 +277,12 @@ class __Storage:
         :param field: 字段
         :return: 返回值查询到的数据，如未查询到则返回None
         """
+        if account.enabled:
+            self.__load_to_account(database, datasheet)
+            result = account.select(data, database, datasheet, field, "=")
+            return result[0] if result else None
+        if self.__run_info_buffer:   # 先写入缓冲中的策略运行信息，保证能读取到刚保存的数据
+            self.flush_strategy_run_info()
         # 连接数据库
         user = config.mysql_user_name if config.mysql_authorization == "enabled" else 'root'
         password = config.mysql_password if config.mysql_authorization == "enabled" else 'root'
@@ -272,6 +296,36 @@ class __Storage:
         conn.close()
         return LogData
 
+    def __load_to_account(self, database, datasheet, missing_ok=False):
+        """
+        将数据表整张读入回测模拟账户，已在内存中的数据表不再读取
+        :param missing_ok: 数据库或数据表不存在时是否在内存中建立一张空表，否则抛出异常
+        """
+        if account.has(database, datasheet):
+            return
+        if self.__run_info_buffer:
+            self.flush_strategy_run_info()
+        user = config.mysql_user_name if config.mysql_authorization == "enabled" else 'root'
+        password = config.mysql_password if config.mysql_authorization == "enabled" else 'root'
+        try:
+            conn = mysql.connector.connect(user=user, password=password, database=database, buffered = True)
+        except mysql.connector.Error as e:
+            if not missing_ok or e.errno not in MISSING_TABLE_ERRORS:
+                raise
+            account.load(database, datasheet, RUN_INFO_COLUMNS, [])
+            return
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT * FROM {}".format(datasheet))
+            account.load(database, datasheet, cursor.column_names, cursor.fetchall())
+        except mysql.connector.Error as e:
+            if not missing_ok or e.errno not in MISSING_TABLE_ERRORS:
+                raise
+            account.load(database, datasheet, RUN_INFO_COLUMNS, [])
+        finally:
+            cursor.close()
+            conn.close()
+
     def text_save(self, content, filename, mode='a'):
         """
         保存数据至txt文件。
@@ -511,6 +565,8 @@ class __Storage:
         # 删除数据库
         sql = "DROP DATABASE IF EXISTS {}".format(database)
         cursor.execute(sql)
+        with self.__run_info_lock:  # 之后写入策略运行信息时重新创建数据库与数据表
+            self.__run_info_tables = {table for table in self.__run_info_tables if table[0] != database}
         # 保存更改并关闭连接
         conn.commit()
         cursor.close()
@@ -542,44 +598,89 @@ class __Storage:
         :param total_asset: 当前总资金
         :return:
         """
-        # 检查数据库是否存在，如不存在则创建
-        user = config.mysql_user_name if config.mysql_authorization == "enabled" else 'root'
-        password = config.mysql_password if config.mysql_authorization == "enabled" else 'root'
-        conn1 = mysql.connector.connect(user=user, password=password)
-        cursor1 = conn1.cursor()
-        cursor1.execute("SHOW DATABASES")
-        list1 = []
-        for item in cursor1:
-            for x in item:
-                list1.append(x)
-        if database in list1:
-            pass
-        else:
-            cursor1.execute("CREATE DATABASE {}".format(database))
-        conn1.commit()
-        cursor1.close()
-        conn1.close()
-        # 检查数据表是否存在，如不存在则创建
-        conn2 = mysql.connector.connect(user=user, password=password, database=database)
-        cursor2 = conn2.cursor()
-        cursor2.execute("SHOW TABLES")
-        list2 = []
-        for item in cursor2:
-            for x in item:
-                list2.append(x)
-        if data_sheet in list2:
-            pass
-        else:  # 如果数据表不存在就创建
-            cursor2.execute(
-                "CREATE TABLE {} (时间 TEXT, 类型 TEXT, 价格 FLOAT, 数量 FLOAT, 成交金额 FLOAT, 当前持仓价格 FLOAT, 当前持仓方向 TEXT, 当前持仓数量 FLOAT, 此次盈亏 FLOAT, 总盈亏 FLOAT, 总资金 FLOAT)".format(data_sheet))
-        # 插入新数据
-        cursor2.execute(
-            'insert into {} (时间, 类型, 价格, 数量, 成交金额, 当前持仓价格, 当前持仓方向, 当前持仓数量, 此次盈亏, 总盈亏, 总资金) values (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)'.format(data_sheet),
-            [timestamp, action, price, amount, turnover, hold_price, hold_direction, hold_amount, profit, total_profit, total_asset])
-        conn2.commit()
-        cursor2.close()
-        conn2.close()
+        if account.enabled:     # 启用了回测模拟账户时只记录在内存中，回测结束时再统一写入数据库
+            self.__load_to_account(database, data_sheet, missing_ok=True)   # 数据表中已有的记录先读入内存，与之后的记录接续
+            account.record(database, data_sheet, [timestamp, action, price, amount, turnover, hold_price, hold_direction, hold_amount, profit, total_profit, total_asset])
+            return
+        # 先写入缓冲，数据条数或距上次写入的时间达到阈值时再一次性写入数据库
+        with self.__run_info_lock:
+            self.__run_info_buffer.setdefault((database, data_sheet), []).append(
+                [timestamp, action, price, amount, turnover, hold_price, hold_direction, hold_amount, profit, total_profit, total_asset])
+            self.__run_info_count += 1
+            if self.__run_info_count >= getattr(config, "mysql_buffer_size", 100) or \
+                    time.get_cur_timestamp() - self.__run_info_last_flush >= getattr(config, "mysql_flush_interval", 5):
+                self.flush_strategy_run_info()
+            elif self.__run_info_timer is None:     # 之后没有新数据时，也会在一段时间后写入数据库
+                self.__run_info_timer = threading.Timer(getattr(config, "mysql_flush_interval", 5), self.flush_strategy_run_info)
+                self.__run_info_timer.daemon = True
+                self.__run_info_timer.start()
+
+    def flush_strategy_run_info(self):
+        """将缓冲中的策略运行信息全部写入数据库"""
+        with self.__run_info_lock:
+            if self.__run_info_timer is not None:
+                self.__run_info_timer.cancel()
+                self.__run_info_timer = None
+            buffer = self.__run_info_buffer
+            self.__run_info_buffer = {}
+            self.__run_info_count = 0
+            self.__run_info_last_flush = time.get_cur_timestamp()
+            for (database, data_sheet), rows in buffer.items():
+                try:
+                    self.mysql_save_strategy_run_info_many(database, data_sheet, rows)
+                except Exception as e:  # 写入失败的数据放回缓冲，下次写入时重试，不影响其他数据表
+                    _logger.error("策略运行信息写入数据库{}.{}失败，{}条数据将在下次写入时重试！错误：{}".format(
+                        database, data_sheet, len(rows), str(e)))
+                    self.__run_info_buffer[(database, data_sheet)] = rows + self.__run_info_buffer.get((database, data_sheet), [])
+                    self.__run_info_count += len(rows)
+            if self.__run_info_buffer and self.__run_info_timer is None:     # 有写入失败的数据时，一段时间后再次重试
+                self.__run_info_timer = threading.Timer(getattr(config, "mysql_flush_interval", 5), self.flush_strategy_run_info)
+                self.__run_info_timer.daemon = True
+                self.__run_info_timer.start()
 
+    def __run_info_connection(self):
+        """策略运行信息共用的数据库连接，断开时重新连接"""
+        if self.__run_info_conn is None or not self.__run_info_conn.is_connected():
+            user = config.mysql_user_name if config.mysql_authorization == "enabled" else 'root'
+            password = config.mysql_password if config.mysql_authorization == "enabled" else 'root'
+            self.__run_info_conn = mysql.connector.connect(user=user, password=password)
+        return self.__run_info_conn
+
+    def mysql_save_strategy_run_info_many(self, database, data_sheet, rows):
+        """
+        批量保存策略运行过程中的数据信息到mysql数据库中，数据库与数据表只检查一次，所有数据一次插入
+        :param database: 数据库名称
+        :param data_sheet: 数据表名称
+        :param rows: 数据行列表，每行的字段顺序与mysql_save_strategy_run_info()的参数顺序相同
+        :return:
+        """
+        if not rows:
+            return
+        with self.__run_info_lock:
+            try:
+                self.__insert_run_info(database, data_sheet, rows)
+            except mysql.connector.Error as e:
+                if e.errno not in MISSING_TABLE_ERRORS:
+                    raise
+                # 数据库或数据表已在别处被删除，重新创建后再写入一次
+                self.__run_info_tables.discard((database, data_sheet))
+                self.__insert_run_info(database, data_sheet, rows)
+
+    def __insert_run_info(self, database, data_sheet, rows):
+        conn = self.__run_info_connection()
+        cursor = conn.cursor()
+        try:
+            if (database, data_sheet) not in self.__run_info_tables:    # 检查数据库与数据表是否存在，如不存在则创建
+                cursor.execute("CREATE DATABASE IF NOT EXISTS {}".format(database))
+                cursor.execute(
+                    "CREATE TABLE IF NOT EXISTS {}.{} (时间 TEXT, 类型 TEXT, 价格 FLOAT, 数量 FLOAT, 成交金额 FLOAT, 当前持仓价格 FLOAT, 当前持仓方向 TEXT, 当前持仓数量 FLOAT, 此次盈亏 FLOAT, 总盈亏 FLOAT, 总资金 FLOAT)".format(database, data_sheet))
+                self.__run_info_tables.add((database, data_sheet))
+            cursor.executemany(
+                'insert into {}.{} (时间, 类型, 价格, 数量, 成交金额, 当前持仓价格, 当前持仓方向, 当前持仓数量, 此次盈亏, 总盈亏, 总资金) values (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)'.format(database, data_sheet),
+                [list(row) for row in rows])
+            conn.commit()
+        finally:
+            cursor.close()
 
     def read_purequant_server_datas(self, datasheet):  # 获取数据库满足条件的数据
         # 连接数据库
@@ -0,0 +1,382 @@
+# -*- coding:utf-8 -*-
+
+"""
+增量计算的技术指标
+
+与INDICATORS每次调用都用TA-Lib重新计算整段k线不同，这里的指标对象会保存计算状态，
+每来一根新k线或最新一根k线的价格发生变化时只做O(1)的更新，计算结果与TA-Lib一致。
+
+用法：
+    ma = MA(20)
+    ma.sync(kline)      # 传入按时间先后排列的k线数据，回测时每根bar调用一次，实盘时每次轮询调用一次
+    ma.value            # 最新一根k线上的指标值，数据不足时为nan
+
+也可以不传k线，自行调用update(新k线的值)与revise(最新一根k线变化后的值)。
+"""
+
+import math
+from collections import deque
+
+nan = float("nan")
+
+
+class _Stream:
+    """增量指标的基类"""
+
+    columns = (4,)      # 计算时使用的k线列序号，默认使用收盘价
+
+    def reset(self):
+        """清空计算状态"""
+        self.timestamp = None   # 最近一次同步的k线时间
+        self.count = 0          # 已计算的k线数量
+        self.value = nan
+
+    def _push(self, *bar):
+        raise NotImplementedError
+
+    def _save(self):
+        """保存更新前的状态，用于撤销最近一次更新"""
+        self._state = {key: value for key, value in vars(self).items() if key != "_state"}
+
+    def _restore(self):
+        """撤销最近一次更新"""
+        vars(self).update(self._state)
+
+    def update(self, *bar):
+        """
+        新增一根k线
+        :param bar: 新k线上的值，如收盘价；ATR依次传入最高价、最低价、收盘价
+        :return: 返回最新的指标值
+        """
+        self._save()
+        self.count += 1
+        self.value = self._push(*bar)
+        return self.value
+
+    def revise(self, *bar):
+        """
+        最新一根k线尚未走完、价格发生变化时，用新的值重新计算最新一根k线上的指标
+        :return: 返回最新的指标值
+        """
+        if self.count == 0:
+            return self.update(*bar)
+        self._restore()
+        return self.update(*bar)
+
+    def sync(self, kline):
+        """
+        按k线数据同步指标，只计算上次同步之后变化或新增的k线
+        :param kline: 按时间先后排列的k线数据，如回测引擎传入的kline，或实盘时倒序后的交易所k线数据
+        :return: 返回最新的指标值
+        """
+        if not kline:
+            return self.value
+        last = self.timestamp
+        index = len(kline) - 1
+        while index >= 0 and kline[index][0] != last:     # 从后向前查找上次同步到的k线
+            index -= 1
+        if index < 0:   # 第一次同步或k线数据已不连续，重新计算全部k线
+            self.reset()
+            index = 0
+        else:   # 上次同步到的k线可能在同步后又发生了变化
+            self.revise(*[kline[index][column] for column in self.columns])
+            index += 1
+        for i in range(index, len(kline)):
+            self.update(*[kline[i][column] for column in self.columns])
+        self.timestamp = kline[-1][0]
+        return self.value
+
+
+class MA(_Stream):
+
+    def __init__(self, length):
+        """
+        简单移动平均线，滚动求和
+        :param length: 周期参数
+        """
+        self.length = length
+        self.reset()
+
+    def reset(self):
+        super().reset()
+        self.__window = deque()
+        self.__sum = 0.0
+        self.__dropped = None
+
+    def _push(self, x):
+        self.__window.append(x)
+        self.__sum += x
+        self.__dropped = self.__window.popleft() if len(self.__window) > self.length else None
+        if self.__dropped is not None:
+            self.__sum -= self.__dropped
+        if self.count % self.length == 0:   # 每length根k线重新求和一次，避免浮点误差累积
+            self.__sum = math.fsum(self.__window)
+        return self.__sum / self.length if len(self.__window) == self.length else nan
+
+    def _restore(self):
+        self.__window.pop()
+        if self.__dropped is not None:
+            self.__window.appendleft(self.__dropped)
+        super()._restore()
+
+
+class EMA(_Stream):
+
+    def __init__(self, length):
+        """
+        指数移动平均线，以前length根k线的简单平均值为初始值，之后递推
+        :param length: 周期参数
+        """
+        self.length = length
+        self.reset()
+
+    def reset(self):
+        super().reset()
+        self.__sum = 0.0
+
+    def _push(self, x):
+        if self.count < self.length:
+            self.__sum += x
+            return nan
+        if self.count == self.length:
+            return (self.__sum + x) / self.length
+        return self.value + 2 / (self.length + 1) * (x - self.value)
+
+
+class MACD(_Stream):
+
+    def __init__(self, fastperiod, slowperiod, signalperiod):
+        """
+        MACD指标，快慢均线与TA-Lib一样从同一根k线开始输出
+        :return: value为字典 {'DIF': DIF值, 'DEA': DEA值, 'MACD': MACD值}，与INDICATORS.MACD()相同
+        """
+        self.fastperiod = fastperiod
+        self.slowperiod = slowperiod
+        self.signalperiod = signalperiod
+        self.reset()
+
+    def reset(self):
+        super().reset()
+        self.value = {'DIF': nan, 'DEA': nan, 'MACD': nan}
+        self.__fast = EMA(self.fastperiod)
+        self.__slow = EMA(self.slowperiod)
+        self.__signal = EMA(self.signalperiod)
+        self.__updated = []     # 最近一次更新中计算过的均线
+
+    def _push(self, x):
+        self.__updated = [self.__slow]
+        slow = self.__slow.update(x)
+        if self.count <= self.slowperiod - self.fastperiod:
+            return {'DIF': nan, 'DEA': nan, 'MACD': nan}
+        self.__updated.append(self.__fast)
+        fast = self.__fast.update(x)
+        if math.isnan(slow):
+            return {'DIF': nan, 'DEA': nan, 'MACD': nan}
+        self.__updated.append(self.__signal)
+        dif = fast - slow
+        dea = self.__signal.update(dif)
+        if math.isnan(dea):
+            return {'DIF': nan, 'DEA': nan, 'MACD': nan}
+        return {'DIF': dif, 'DEA': dea, 'MACD': (dif - dea) * 2}
+
+    def _restore(self):
+        for ema in self.__updated:
+            ema._restore()
+        super()._restore()
+
+
+class ATR(_Stream):
+
+    columns = (2, 3, 4)
+
+    def __init__(self, length):
+        """
+        平均真实波幅，Wilder平滑
+        :param length: 周期参数
+        """
+        self.length = length
+        self.reset()
+
+    def reset(self):
+        super().reset()
+        self.__prev_close = None
+        self.__sum = 0.0
+
+    def _push(self, high, low, close):
+        prev_close = self.__prev_close
+        self.__prev_close = close
+        if prev_close is None:
+            return nan
+        tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
+        if self.count <= self.length:
+            self.__sum += tr
+            return nan
+        if self.count == self.length + 1:
+            return (self.__sum + tr) / self.length
+        return (self.value * (self.length - 1) + tr) / self.length
+
+
+class RSI(_Stream):
+
+    def __init__(self, length):
+        """
+        相对强弱指标，Wilder平滑
+        :param length: 周期参数
+        """
+        self.length = length
+        self.reset()
+
+    def reset(self):
+        super().reset()
+        self.__prev_close = None
+        self.__gain = 0.0
+        self.__loss = 0.0
+
+    def _push(self, close):
+        prev_close = self.__prev_close
+        self.__prev_close = close
+        if prev_close is None:
+            return nan
+        diff = close - prev_close
+        gain = diff if diff > 0 else 0.0
+        loss = -diff if diff < 0 else 0.0
+        if self.count <= self.length + 1:   # 前length个涨跌幅取简单平均
+            self.__gain += gain
+            self.__loss += loss
+            if self.count <= self.length:
+                return nan
+            self.__gain /= self.length
+            self.__loss /= self.length
+        else:
+            self.__gain = (self.__gain * (self.length - 1) + gain) / self.length
+            self.__loss = (self.__loss * (self.length - 1) + loss) / self.length
+        total = self.__gain + self.__loss
+        return 100 * self.__gain / total if total != 0 else 0.0
+
+
+class _Extreme(_Stream):
+    """区间最高值与最低值的基类，单调队列"""
+
+    def __init__(self, length):
+        self.length = length
+        self.reset()
+
+    def reset(self):
+        super().reset()
+        self.__queue = deque()      # [(k线序号, 值)]，值单调排列，队首即为区间极值
+        self.__popped = []
+        self.__expired = None
+
+    def _dominates(self, x, y):
+        raise NotImplementedError
+
+    def _push(self, x):
+        self.__popped = []
+        while self.__queue and self._dominates(x, self.__queue[-1][1]):
+            self.__popped.append(self.__queue.pop())
+        self.__queue.append((self.count, x))
+        self.__expired = self.__queue.popleft() if self.__queue[0][0] <= self.count - self.length else None
+        return self.__queue[0][1] if self.count >= self.length else nan
+
+    def _restore(self):
+        self.__queue.pop()
+        self.__queue.extend(reversed(self.__popped))
+        if self.__expired is not None:
+            self.__queue.appendleft(self.__expired)
+        super()._restore()
+
+
+class HIGHEST(_Extreme):
+    """
+    区间最高价
+    :param length: 周期参数
+    """
+
+    columns = (2,)
+
+    def _dominates(self, x, y):
+        return x >= y
+
+
+class LOWEST(_Extreme):
+    """
+    区间最低价
+    :param length: 周期参数
+    """
+
+    columns = (3,)
+
+    def _dominates(self, x, y):
+        return x <= y
+
+
+class STDDEV(_Stream):
+
+    def __init__(self, length, nbdev=1):
+        """
+        总体标准差，滑动窗口的Welford算法
+        :param length: 周期参数
+        :param nbdev: 标准差的倍数
+        """
+        self.length = length
+        self.nbdev = nbdev
+        self.reset()
+
+    def reset(self):
+        super().reset()
+        self.__window = deque()
+        self.__mean = 0.0
+        self.__m2 = 0.0
+        self.__dropped = None
+
+    def _push(self, x):
+        self.__window.append(x)
+        self.__dropped = None
+        if len(self.__window) <= self.length:
+            delta = x - self.__mean
+            self.__mean += delta / len(self.__window)
+            self.__m2 += delta * (x - self.__mean)
+        else:
+            self.__dropped = old = self.__window.popleft()
+            mean = self.__mean + (x - old) / self.length
+            self.__m2 += (x - old) * (x - mean + old - self.__mean)
+            self.__mean = mean
+        if len(self.__window) < self.length:
+            return nan
+        return math.sqrt(max(self.__m2, 0.0) / self.length) * self.nbdev
+
+    def _restore(self):
+        self.__window.pop()
+        if self.__dropped is not None:
+            self.__window.appendleft(self.__dropped)
+        super()._restore()
+
+
+class BOLL(_Stream):
+
+    def __init__(self, length, nbdev=2):
+        """
+        布林指标
+        :param length: 周期参数
+        :param nbdev: 上下轨的标准差倍数
+        :return: value为字典 {"upperband": 上轨值， "middleband": 中轨值， "lowerband": 下轨值}，与INDICATORS.BOLL()相同
+        """
+        self.length = length
+        self.nbdev = nbdev
+        self.reset()
+
+    def reset(self):
+        super().reset()
+        self.value = {"upperband": nan, "middleband": nan, "lowerband": nan}
+        self.__ma = MA(self.length)
+        self.__stddev = STDDEV(self.length)
+
+    def _push(self, x):
+        middle = self.__ma.update(x)
+        band = self.__stddev.update(x) * self.nbdev
+        return {"upperband": middle + band, "middleband": middle, "lowerband": middle - band}
+
+    def _restore(self):
+        self.__ma._restore()
+        self.__stddev._restore()
+        super()._restore()
@@ -17,11 +17,55 @@ from purequant.exchange.binance import binance_spot
 from purequant.exchange.binance import binance_futures
 from purequant.exchange.binance import binance_swap
 from purequant.exchange.bitmex.bitmex import Bitmex
+from purequant.exchange.okex.exceptions import OkexAPIException
 from purequant.time import ts_to_utc_str
 from purequant.exchange.huobi import huobi_spot as huobispot
 from purequant.config import config
 from purequant.exceptions import *
 from purequant.storage import storage
+from purequant.ordertracker import OKEXORDERTRACKER, HUOBIORDERTRACKER
+
+BATCH_LIMIT = 10    # okex与火币的批量下单、撤单、改单接口每次最多10个订单
+OKEX_ORDER_TYPE = {"buy": 1, "sellshort": 2, "sell": 3, "buytocover": 4}   # 批量下单的交易方向对应的okex订单类型
+HUOBI_DIRECTION = {"buy": ("buy", "open"), "sellshort": ("sell", "open"), "sell": ("sell", "close"), "buytocover": ("buy", "close")}
+HUOBI_ORDER_PRICE_TYPE = {0: "limit", 1: "post_only", 2: "fok", 3: "ioc", 4: "opponent"}
+_NOT_REISSUED = object()  # 追单时撤单后订单状态不是"撤单成功"，没有重新下单，交易助手需继续处理原订单
+
+
+def _chunks(items):
+    """按批量接口的数量上限分组"""
+    items = list(items)
+    return [items[i:i + BATCH_LIMIT] for i in range(0, len(items), BATCH_LIMIT)]
+
+
+def _okex_batch_orders(orders, order_type):
+    """将(交易方向, 价格, 数量)转换成okex批量下单的订单参数"""
+    orders_data = []
+    for action, price, size in orders:
+        if action not in OKEX_ORDER_TYPE:
+            raise SendOrderError("交易方向错误：{}，只能是buy、sell、sellshort或buytocover！".format(action))
+        orders_data.append({"type": str(OKEX_ORDER_TYPE[action]), "price": str(price), "size": str(size),
+                            "order_type": str(order_type or 0)})
+    return orders_data
+
+
+def _okex_batch_result(receipt, key, count):
+    """将okex批量下单或改单的返回结果转换成每个订单的订单ID与错误信息"""
+    items = receipt.get(key) or []
+    if not items:   # 整个请求失败时每个订单都返回相同的错误信息
+        return [{"订单ID": None, "错误信息": receipt.get("error_message") or "批量请求失败！"} for _ in range(count)]
+    return [{"订单ID": item.get("order_id"),
+             "错误信息": "" if str(item.get("error_code", "0")) in ("0", "") else item.get("error_message", "")} for item in items]
+
+
+def _okex_batch_cancel_result(receipts):
+    """将okex批量撤单的返回结果转换成与revoke_order()相同格式的提示"""
+    errors = [receipt.get("error_message") or str(receipt) for receipt in receipts
+              if str(receipt.get("result")).lower() != "true"]
+    if errors:
+        return '【交易提醒】批量撤单失败' + "；".join(errors)
+    return '【交易提醒】批量撤单成功'
+
 
 class OKEXFUTURES:
     """okex交割合约操作  https://www.okex.com/docs/zh/#futures-README"""
@@ -41,6 +85,7 @@ class OKEXFUTURES:
         self.__instrument_id = instrument_id
         self.__okex_futures = okexfutures.FutureAPI(self.__access_key, self.__secret_key, self.__passphrase)
         self.__leverage = leverage or 20
+        self.__tracker = None   # 订单状态跟踪，调用track_orders()后启用
         try:
             self.__okex_futures.set_margin_mode(underlying=self.__instrument_id.split("-")[0] + "-" + self.__instrument_id.split("-")[1],
                                                 margin_mode="crossed")
@@ -64,68 +109,7 @@ class OKEXFUTURES:
         if config.backtest != "enabled":   # 实盘模式
             order_type = order_type or 0    # 如果不填order_type,则默认为普通委托
             result = self.__okex_futures.take_order(self.__instrument_id, 1, price, size, order_type=order_type) # 下订单
-            order_info = self.get_order_info(order_id=result['order_id'])   # 下单后查询一次订单状态
-            if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ": # 如果订单状态为"完全成交"或者"失败"，返回结果
-                return {"【交易提醒】下单结果": order_info}
-            # 如果订单状态不是"完全成交"或者"失败"
-            if config.price_cancellation == "true": # 选择了价格撤单时，如果最新价超过委托价一定幅度，撤单重发，返回下单结果
-                if order_info["订单状态"] == "等待成交":
-                    if float(self.get_ticker()['last']) >= price * (1 + config.price_cancellation_amplitude):
-                        try:    # 如果撤单失败，则订单可能在此期间已完全成交或部分成交
-                            self.revoke_order(order_id=result['order_id'])
-                            state = self.get_order_info(order_id=result['order_id'])
-                            if state['订单状态'] == "撤单成功": # 已完全成交时，以原下单数量重发；部分成交时，重发委托数量为原下单数量减去已成交数量
-                                return self.buy(float(self.get_ticker()['last']) * (1 + config.reissue_order), size - state["已成交数量"])
-                        except:     # 撤单失败时，说明订单已完全成交
-                            order_info = self.get_order_info(order_id=result['order_id'])   # 再查询一次订单状态
-                            if order_info["订单状态"] == "完全成交":
-                                return {"【交易提醒】下单结果": order_info}
-                if order_info["订单状态"] == "部分成交":
-                    if float(self.get_ticker()['last']) >= price * (1 + config.price_cancellation_amplitude):
-                        try:
-                            self.revoke_order(order_id=result['order_id'])
-                            state = self.get_order_info(order_id=result['order_id'])
-                            if state['订单状态'] == "撤单成功":
-                                return self.buy(float(self.get_ticker()['last']) * (1 + config.reissue_order), size - state["已成交数量"])
-                        except:     # 撤单失败时，说明订单已完全成交，再查询一次订单状态，如果已完全成交，返回下单结果
-                            order_info = self.get_order_info(order_id=result['order_id'])  # 再查询一次订单状态
-                            if order_info["订单状态"] == "完全成交":
-                                return {"【交易提醒】下单结果": order_info}
-            if config.time_cancellation == "true": # 选择了时间撤单时，如果委托单发出多少秒后不成交，撤单重发，直至完全成交，返回成交结果
-                time.sleep(config.time_cancellation_seconds)
-                order_info = self.get_order_info(order_id=result['order_id'])
-                if order_info["订单状态"] == "等待成交":
-                    try:
-                        self.revoke_order(order_id=result['order_id'])
-                        state = self.get_order_info(order_id=result['order_id'])
-                        if state['订单状态'] == "撤单成功":
-                            return self.buy(float(self.get_ticker()['last']) * (1 + config.reissue_order), size - state["已成交数量"])
-                    except:
-                        order_info = self.get_order_info(order_id=result['order_id'])  # 再查询一次订单状态
-                        if order_info["订单状态"] == "完全成交":
-                            return {"【交易提醒】下单结果": order_info}
-                if order_info["订单状态"] == "部分成交":
-                    try:
-                        self.revoke_order(order_id=result['order_id'])
-                        state = self.get_order_info(order_id=result['order_id'])
-                        if state['订单状态'] == "撤单成功":
-                            return self.buy(float(self.get_ticker()['last']) * (1 + config.reissue_order), size - state["已成交数量"])
-                    except:
-                        order_info = self.get_order_info(order_id=result['order_id'])  # 再查询一次订单状态
-                        if order_info["订单状态"] == "完全成交":
-                            return {"【交易提醒】下单结果": order_info}
-            if config.automatic_cancellation == "true":
-                # 如果订单未完全成交，且未设置价格撤单和时间撤单，且设置了自动撤单，就自动撤单并返回下单结果与撤单结果
-                try:
-                    self.revoke_order(order_id=result['order_id'])
-                    state = self.get_order_info(order_id=result['order_id'])
-                    return {"【交易提醒】下单结果": state}
-                except:
-                    order_info = self.get_order_info(order_id=result['order_id'])  # 再查询一次订单状态
-                    if order_info["订单状态"] == "完全成交":
-                        return {"【交易提醒】下单结果": order_info}
-            else:   # 未启用交易助手时，下单并查询订单状态后直接返回下单结果
-                return {"【交易提醒】下单结果": order_info}
+            return self.__assist(result['order_id'], price, size, self.buy, 1)
         else:   # 回测模式
             return "回测模拟下单成功！"
 
@@ -133,68 +117,7 @@ class OKEXFUTURES:
         if config.backtest != "enabled":    # 实盘模式
             order_type = order_type or 0
             result = self.__okex_futures.take_order(self.__instrument_id, 3, price, size, order_type=order_type)
-            order_info = self.get_order_info(order_id=result['order_id'])  # 下单后查询一次订单状态
-            if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                return {"【交易提醒】下单结果": order_info}
-            # 如果订单状态不是"完全成交"或者"失败"
-            if config.price_cancellation == "true":  # 选择了价格撤单时，如果最新价超过委托价一定幅度，撤单重发，返回下单结果
-                if order_info["订单状态"] == "等待成交":
-                    if float(self.get_ticker()['last']) <= price * (1 - config.price_cancellation_amplitude):
-                        try:
-                            self.revoke_order(order_id=result['order_id'])
-                            state = self.get_order_info(order_id=result['order_id'])
-                            if state['订单状态'] == "撤单成功":
-                                return self.sell(float(self.get_ticker()['last']) * (1 - config.reissue_order), size - state["已成交数量"])
-                        except:
-                            order_info = self.get_order_info(order_id=result['order_id'])  # 再查询一次订单状态
-                            if order_info["订单状态"] == "完全成交":
-                                return {"【交易提醒】下单结果": order_info}
-                if order_info["订单状态"] == "部分成交":
-                    if float(self.get_ticker()['last']) <= price * (1 - config.price_cancellation_amplitude):
-                        try:
-                            self.revoke_order(order_id=result['order_id'])
-                            state = self.get_order_info(order_id=result['order_id'])
-                            if state['订单状态'] == "撤单成功":
-                                return self.sell(float(self.get_ticker()['last']) * (1 - config.reissue_order), size - state["已成交数量"])
-                        except:
-                            order_info = self.get_order_info(order_id=result['order_id'])  # 再查询一次订单状态
-                            if order_info["订单状态"] == "完全成交":
-                                return {"【交易提醒】下单结果": order_info}
-            if config.time_cancellation == "true":  # 选择了时间撤单时，如果委托单发出多少秒后不成交，撤单重发，直至完全成交，返回成交结果
-                time.sleep(config.time_cancellation_seconds)
-                order_info = self.get_order_info(order_id=result['order_id'])
-                if order_info["订单状态"] == "等待成交":
-                    try:
-                        self.revoke_order(order_id=result['order_id'])
-                        state = self.get_order_info(order_id=result['order_id'])
-                        if state['订单状态'] == "撤单成功":
-                            return self.sell(float(self.get_ticker()['last']) * (1 - config.reissue_order), size - state["已成交数量"])
-                    except:
-                        order_info = self.get_order_info(order_id=result['order_id'])  # 再查询一次订单状态
-                        if order_info["订单状态"] == "完全成交":
-                            return {"【交易提醒】下单结果": order_info}
-                if order_info["订单状态"] == "部分成交":
-                    try:
-                        self.revoke_order(order_id=result['order_id'])
-                        state = self.get_order_info(order_id=result['order_id'])
-                        if state['订单状态'] == "撤单成功":
-                            return self.sell(float(self.get_ticker()['last']) * (1 - config.reissue_order), size - state["已成交数量"])
-                    except:
-                        order_info = self.get_order_info(order_id=result['order_id'])  # 再查询一次订单状态
-                        if order_info["订单状态"] == "完全成交":
-                            return {"【交易提醒】下单结果": order_info}
-            if config.automatic_cancellation == "true":
-                # 如果订单未完全成交，且未设置价格撤单和时间撤单，且设置了自动撤单，就自动撤单并返回下单结果与撤单结果
-                try:
-                    self.revoke_order(order_id=result['order_id'])
-                    state = self.get_order_info(order_id=result['order_id'])
-                    return {"【交易提醒】下单结果": state}
-                except:
-                    order_info = self.get_order_info(order_id=result['order_id'])  # 再查询一次订单状态
-                    if order_info["订单状态"] == "完全成交":
-                        return {"【交易提醒】下单结果": order_info}
-            else:  # 未启用交易助手时，下单并查询订单状态后直接返回下单结果
-                return {"【交易提醒】下单结果": order_info}
+            return self.__assist(result['order_id'], price, size, self.sell, -1)
         else:   # 回测模式
             return "回测模拟下单成功！"
 
@@ -202,68 +125,7 @@ class OKEXFUTURES:
         if config.backtest != "enabled":   # 实盘模式
             order_type = order_type or 0
             result = self.__okex_futures.take_order(self.__instrument_id, 2, price, size, order_type=order_type)
-            order_info = self.get_order_info(order_id=result['order_id'])  # 下单后查询一次订单状态
-            if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                return {"【交易提醒】下单结果": order_info}
-            # 如果订单状态不是"完全成交"或者"失败"
-            if config.price_cancellation == "true":  # 选择了价格撤单时，如果最新价超过委托价一定幅度，撤单重发，返回下单结果
-                if order_info["订单状态"] == "等待成交":
-                    if float(self.get_ticker()['last']) <= price * (1 - config.price_cancellation_amplitude):
-                        try:
-                            self.revoke_order(order_id=result['order_id'])
-                            state = self.get_order_info(order_id=result['order_id'])
-                            if state['订单状态'] == "撤单成功":
-                                return self.sellshort(float(self.get_ticker()['last']) * (1 - config.reissue_order), size - state["已成交数量"])
-                        except:
-                            order_info = self.get_order_info(order_id=result['order_id'])  # 再查询一次订单状态
-                            if order_info["订单状态"] == "完全成交":
-                                return {"【交易提醒】下单结果": order_info}
-                if order_info["订单状态"] == "部分成交":
-                    if float(self.get_ticker()['last']) <= price * (1 - config.price_cancellation_amplitude):
-                        try:
-                            self.revoke_order(order_id=result['order_id'])
-                            state = self.get_order_info(order_id=result['order_id'])
-                            if state['订单状态'] == "撤单成功":
-                                return self.sellshort(float(self.get_ticker()['last']) * (1 - config.reissue_order), size - state["已成交数量"])
-                        except:
-                            order_info = self.get_order_info(order_id=result['order_id'])  # 再查询一次订单状态
-                            if order_info["订单状态"] == "完全成交":
-                                return {"【交易提醒】下单结果": order_info}
-            if config.time_cancellation == "true":  # 选择了时间撤单时，如果委托单发出多少秒后不成交，撤单重发，直至完全成交，返回成交结果
-                time.sleep(config.time_cancellation_seconds)
-                order_info = self.get_order_info(order_id=result['order_id'])
-                if order_info["订单状态"] == "等待成交":
-                    try:
-                        self.revoke_order(order_id=result['order_id'])
-                        state = self.get_order_info(order_id=result['order_id'])
-                        if state['订单状态'] == "撤单成功":
-                            return self.sellshort(float(self.get_ticker()['last']) * (1 - config.reissue_order), size - state["已成交数量"])
-                    except:
-                        order_info = self.get_order_info(order_id=result['order_id'])  # 再查询一次订单状态
-                        if order_info["订单状态"] == "完全成交":
-                            return {"【交易提醒】下单结果": order_info}
-                if order_info["订单状态"] == "部分成交":
-                    try:
-                        self.revoke_order(order_id=result['order_id'])
-                        state = self.get_order_info(order_id=result['order_id'])
-                        if state['订单状态'] == "撤单成功":
-                            return self.sellshort(float(self.get_ticker()['last']) * (1 - config.reissue_order), size - state["已成交数量"])
-                    except:
-                        order_info = self.get_order_info(order_id=result['order_id'])  # 再查询一次订单状态
-                        if order_info["订单状态"] == "完全成交":
-                            return {"【交易提醒】下单结果": order_info}
-            if config.automatic_cancellation == "true":
-                # 如果订单未完全成交，且未设置价格撤单和时间撤单，且设置了自动撤单，就自动撤单并返回下单结果与撤单结果
-                try:
-                    self.revoke_order(order_id=result['order_id'])
-                    state = self.get_order_info(order_id=result['order_id'])
-                    return {"【交易提醒】下单结果": state}
-                except:
-                    order_info = self.get_order_info(order_id=result['order_id'])  # 再查询一次订单状态
-                    if order_info["订单状态"] == "完全成交":
-                        return {"【交易提醒】下单结果": order_info}
-            else:  # 未启用交易助手时，下单并查询订单状态后直接返回下单结果
-                return {"【交易提醒】下单结果": order_info}
+            return self.__assist(result['order_id'], price, size, self.sellshort, -1)
         else:   # 回测模式
             return "回测模拟下单成功！"
 
@@ -271,70 +133,82 @@ class OKEXFUTURES:
         if config.backtest != "enabled":    # 实盘模式
             order_type = order_type or 0
             result = self.__okex_futures.take_order(self.__instrument_id, 4, price, size, order_type=order_type)
-            order_info = self.get_order_info(order_id=result['order_id'])  # 下单后查询一次订单状态
-            if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                return {"【交易提醒】下单结果": order_info}
-            # 如果订单状态不是"完全成交"或者"失败"
-            if config.price_cancellation == "true":  # 选择了价格撤单时，如果最新价超过委托价一定幅度，撤单重发，返回下单结果
-                if order_info["订单状态"] == "等待成交":
-                    if float(self.get_ticker()['last']) >= price * (1 + config.price_cancellation_amplitude):
-                        try:
-                            self.revoke_order(order_id=result['order_id'])
-                            state = self.get_order_info(order_id=result['order_id'])
-                            if state['订单状态'] == "撤单成功":
-                                return self.buytocover(float(self.get_ticker()['last']) * (1 + config.reissue_order), size - state["已成交数量"])
-                        except:
-                            order_info = self.get_order_info(order_id=result['order_id'])  # 再查询一次订单状态
-                            if order_info["订单状态"] == "完全成交":
-                                return {"【交易提醒】下单结果": order_info}
-                if order_info["订单状态"] == "部分成交":
-                    if float(self.get_ticker()['last']) >= price * (1 + config.price_cancellation_amplitude):
-                        try:
-                            self.revoke_order(order_id=result['order_id'])
-                            state = self.get_order_info(order_id=result['order_id'])
-                            if state['订单状态'] == "撤单成功":
-                                return self.buytocover(float(self.get_ticker()['last']) * (1 + config.reissue_order), size - state["已成交数量"])
-                        except:
-                            order_info = self.get_order_info(order_id=result['order_id'])  # 再查询一次订单状态
-                            if order_info["订单状态"] == "完全成交":
-                                return {"【交易提醒】下单结果": order_info}
-            if config.time_cancellation == "true":  # 选择了时间撤单时，如果委托单发出多少秒后不成交，撤单重发，直至完全成交，返回成交结果
-                time.sleep(config.time_cancellation_seconds)
-                order_info = self.get_order_info(order_id=result['order_id'])
-                if order_info["订单状态"] == "等待成交":
-                    try:
-                        self.revoke_order(order_id=result['order_id'])
-                        state = self.get_order_info(order_id=result['order_id'])
-                        if state['订单状态'] == "撤单成功":
-                            return self.buytocover(float(self.get_ticker()['last']) * (1 + config.reissue_order), size - state["已成交数量"])
-                    except:
-                        order_info = self.get_order_info(order_id=result['order_id'])  # 再查询一次订单状态
-                        if order_info["订单状态"] == "完全成交":
-                            return {"【交易提醒】下单结果": order_info}
-                if order_info["订单状态"] == "部分成交":
-                    try:
-                        self.revoke_order(order_id=result['order_id'])
-                        state = self.get_order_info(order_id=result['order_id'])
-                        if state['订单状态'] == "撤单成功":
-                            return self.buytocover(float(self.get_ticker()['last']) * (1 + config.reissue_order), size - state["已成交数量"])
+            return self.__assist(result['order_id'], price, size, self.buytocover, 1)
+        else:   # 回测模式
+            return "回测模拟下单成功！"
+
+    def __assist(self, order_id, price, size, place, side):
+        """
+        交易助手：下单后按配置的价格撤单、时间撤单与自动撤单处理订单
+        需要追单时先把订单直接改到新价格并继续跟踪，改单失败时才撤单后以剩余数量重新下单
+        :param order_id: 订单ID
+        :param price: 委托价格
+        :param size: 下单数量
+        :param place: 重新下单的方法，如self.buy
+        :param side: 买入开多与买入平空为1，卖出平多与卖出开空为-1
+        :return: 返回下单结果
+        """
+        order_info = self.__placed_order_info(order_id)   # 下单后查询一次订单状态
+        if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ": # 如果订单状态为"完全成交"或者"失败"，返回结果
+            return {"【交易提醒】下单结果": order_info}
+        # 如果订单状态不是"完全成交"或者"失败"
+        if config.price_cancellation == "true": # 选择了价格撤单时，如果最新价超过委托价一定幅度，改单或撤单重发，返回下单结果
+            if order_info["订单状态"] == "等待成交" or order_info["订单状态"] == "部分成交":
+                last = float(self.get_ticker()['last'])
+                if (side > 0 and last >= price * (1 + config.price_cancellation_amplitude)) or \
+                        (side < 0 and last <= price * (1 - config.price_cancellation_amplitude)):
+                    try:    # 如果改单与撤单都失败，则订单可能在此期间已完全成交
+                        receipt = self.__chase(order_id, last * (1 + side * config.reissue_order), size, place, side)
+                        if receipt is not _NOT_REISSUED:
+                            return receipt
                     except:
-                        order_info = self.get_order_info(order_id=result['order_id'])  # 再查询一次订单状态
+                        order_info = self.get_order_info(order_id=order_id)  # 再查询一次订单状态
                         if order_info["订单状态"] == "完全成交":
                             return {"【交易提醒】下单结果": order_info}
-            if config.automatic_cancellation == "true":
-                # 如果订单未完全成交，且未设置价格撤单和时间撤单，且设置了自动撤单，就自动撤单并返回下单结果与撤单结果
+        if config.time_cancellation == "true": # 选择了时间撤单时，如果委托单发出多少秒后不成交，改单或撤单重发，直至完全成交，返回成交结果
+            self.__wait(order_id, config.time_cancellation_seconds)
+            order_info = self.get_order_info(order_id=order_id)
+            if order_info["订单状态"] == "等待成交" or order_info["订单状态"] == "部分成交":
                 try:
-                    self.revoke_order(order_id=result['order_id'])
-                    state = self.get_order_info(order_id=result['order_id'])
-                    return {"【交易提醒】下单结果": state}
+                    last = float(self.get_ticker()['last'])
+                    receipt = self.__chase(order_id, last * (1 + side * config.reissue_order), size, place, side)
+                    if receipt is not _NOT_REISSUED:
+                        return receipt
                 except:
-                    order_info = self.get_order_info(order_id=result['order_id'])  # 再查询一次订单状态
+                    order_info = self.get_order_info(order_id=order_id)  # 再查询一次订单状态
                     if order_info["订单状态"] == "完全成交":
                         return {"【交易提醒】下单结果": order_info}
-            else:  # 未启用交易助手时，下单并查询订单状态后直接返回下单结果
-                return {"【交易提醒】下单结果": order_info}
-        else:   # 回测模式
-            return "回测模拟下单成功！"
+        if config.automatic_cancellation == "true":
+            # 如果订单未完全成交，且未设置价格撤单和时间撤单，且设置了自动撤单，就自动撤单并返回下单结果与撤单结果
+            try:
+                self.revoke_order(order_id=order_id)
+                state = self.get_order_info(order_id=order_id)
+                return {"【交易提醒】下单结果": state}
+            except:
+                order_info = self.get_order_info(order_id=order_id)  # 再查询一次订单状态
+                if order_info["订单状态"] == "完全成交":
+                    return {"【交易提醒】下单结果": order_info}
+        else:   # 未启用交易助手时，下单并查询订单状态后直接返回下单结果
+            return {"【交易提醒】下单结果": order_info}
+
+    def __chase(self, order_id, price, size, place, side):
+        """
+        追单：okex支持修改订单，把未成交的订单直接改到新价格后继续跟踪，省去撤单、查询与重新下单的往返；
+        改单失败时（如订单已成交或正在撤销）按原来的方式撤单，以剩余数量重新下单
+        :return: 返回下单结果，撤单后订单状态不是"撤单成功"时返回_NOT_REISSUED
+        """
+        try:
+            receipt = self.__okex_futures.amend_order(self.__instrument_id, cancel_on_fail="0", order_id=order_id, new_price=price)
+            amended = str(receipt.get("error_code", "0")) in ("0", "")
+        except Exception:
+            amended = False
+        if amended:
+            return self.__assist(order_id, price, size, place, side)
+        self.revoke_order(order_id=order_id)
+        state = self.get_order_info(order_id=order_id)
+        if state['订单状态'] == "撤单成功":   # 部分成交时，重发委托数量为原下单数量减去已成交数量
+            return place(price, size - state["已成交数量"])
+        return _NOT_REISSUED
 
     def BUY(self, cover_short_price, cover_short_size, open_long_price, open_long_size, order_type=None):
         if config.backtest != "enabled":    # 实盘模式
@@ -360,18 +234,107 @@ class OKEXFUTURES:
         else:   # 回测模式
             return "回测模拟下单成功！"
 
+    def batch_place(self, orders, order_type=None):
+        """
+        批量下单，每10个订单合并成一次请求，如平空与开多、网格挂单可以在一次请求中发出
+        :param orders: 订单列表，每个订单为(交易方向, 价格, 数量)，交易方向为"buy"、"sell"、"sellshort"或"buytocover"，
+                       例如[("buytocover", 9000, 1), ("buy", 9000, 1)]
+        :param order_type: 同buy()，所有订单使用相同的委托类型
+        :return: 返回与orders顺序相同的列表，每项为{"订单ID": 订单ID, "错误信息": 错误信息}，下单成功的订单错误信息为空字符串
+        """
+        if config.backtest != "enabled":    # 实盘模式
+            result = []
+            for group in _chunks(orders):
+                try:
+                    receipt = self.__okex_futures.take_orders(self.__instrument_id, _okex_batch_orders(group, order_type))
+                except OkexAPIException as e:   # 某一组请求失败时不影响已经发出的其他组，只将这一组标记为失败
+                    result.extend({"订单ID": None, "错误信息": str(e)} for _ in group)
+                    continue
+                result.extend(_okex_batch_result(receipt, "order_info", len(group)))
+            return result
+        else:   # 回测模式
+            return "回测模拟下单成功！"
+
+    def batch_cancel(self, order_ids):
+        """
+        批量撤单，每10个订单合并成一次请求
+        :param order_ids: 订单ID列表
+        :return: 返回与revoke_order()相同格式的提示
+        """
+        receipts = []
+        for group in _chunks(order_ids):
+            try:
+                receipts.append(self.__okex_futures.revoke_orders(self.__instrument_id, order_ids=group))
+            except OkexAPIException as e:
+                receipts.append({"result": False, "error_message": str(e)})
+        return _okex_batch_cancel_result(receipts)
+
+    def batch_amend(self, amends, cancel_on_fail=0):
+        """
+        批量修改订单的价格与数量，每10个订单合并成一次请求
+        :param amends: 改单列表，每项为(订单ID, 新价格, 新数量)，不修改数量时新数量填None
+        :param cancel_on_fail: 改单失败时是否撤单，0：不撤单，1：撤单
+        :return: 返回与amends顺序相同的列表，每项为{"订单ID": 订单ID, "错误信息": 错误信息}，改单成功的订单错误信息为空字符串
+        """
+        result = []
+        for group in _chunks(amends):
+            amend_data = []
+            for order_id, price, size in group:
+                data = {"order_id": str(order_id), "cancel_on_fail": str(cancel_on_fail), "new_price": str(price)}
+                if size is not None:
+                    data["new_size"] = str(size)
+                amend_data.append(data)
+            try:
+                receipt = self.__okex_futures.amend_batch_orders(self.__instrument_id, amend_data)
+            except OkexAPIException as e:
+                result.extend({"订单ID": None, "错误信息": str(e)} for _ in group)
+                continue
+            result.extend(_okex_batch_result(receipt, "amend_info", len(group)))
+        return result
+
     def get_order_list(self, state, limit):
         receipt = self.__okex_futures.get_order_list(self.__instrument_id, state=state, limit=limit)
         return receipt
 
+    def track_orders(self):
+        """
+        订阅websocket私有订单频道跟踪订单状态，启用后交易助手等待订单结束时不再固定sleep，
+        get_order_info()优先使用websocket推送的订单状态，websocket断线或没有推送时再查询REST接口
+        :return: 返回OKEXORDERTRACKER对象
+        """
+        if self.__tracker is None:
+            self.__tracker = OKEXORDERTRACKER(self.__access_key, self.__secret_key, self.__passphrase, self.__instrument_id).start()
+        return self.__tracker
+
+    def __placed_order_info(self, order_id):
+        """下单后查询一次订单状态，跟踪订单状态时稍等websocket推送新订单，推送未到达时再查询REST接口"""
+        if self.__tracker is not None:
+            order_info = self.__tracker.get(order_id, timeout=1)
+            if order_info is not None:
+                return order_info
+        return self.get_order_info(order_id=order_id)
+
+    def __wait(self, order_id, seconds):
+        """等待订单结束，最多等待seconds秒，没有跟踪订单状态时与time.sleep()相同"""
+        if self.__tracker is not None:
+            self.__tracker.wait(order_id, seconds)
+        else:
+            time.sleep(seconds)
+
     def revoke_order(self, order_id):
         receipt = self.__okex_futures.revoke_order(self.__instrument_id, order_id)
         if receipt['error_code'] == "0":
+            if self.__tracker is not None:  # 等待websocket推送撤单结果，之后查询到的订单状态不会是撤单前的状态
+                self.__tracker.wait(order_id, 1)
             return '【交易提醒】撤单成功'
         else:
             return '【交易提醒】撤单失败' + receipt['error_message']
 
     def get_order_info(self, order_id):
+        if self.__tracker is not None:
+            order_info = self.__tracker.get(order_id)    # 只取已收到的推送，不等待
+            if order_info is not None:
+                return order_info
         result = self.__okex_futures.get_order_info(self.__instrument_id, order_id)
         instrument_id = result['instrument_id']
         action = None
@@ -834,90 +797,30 @@ class OKEXSWAP:
         self.__instrument_id = instrument_id
         self.__okex_swap = okexswap.SwapAPI(self.__access_key, self.__secret_key, self.__passphrase)
         self.__leverage = leverage or 20
+        self.__tracker = None   # 订单状态跟踪，调用track_orders()后启用
         try:
             self.__okex_swap.set_leverage(leverage=self.__leverage, instrument_id=self.__instrument_id, side=3)
         except Exception as e:
             print("OKEX永续合约设置杠杆倍数失败！请检查账户是否已设置成全仓模式！错误：{}".format(str(e)))
-
-    def get_single_equity(self, instrument_id):
-        """
-        获取单个合约账户的权益
-        :param instrument_id: 例如"TRX-USDT-SWAP"
-        :return:返回浮点数
-        """
-        data = self.__okex_swap.get_coin_account(instrument_id=instrument_id)
-        result =float(data["info"]["equity"])
-        return result
-
-    def buy(self, price, size, order_type=None):
-        if config.backtest != "enabled":    # 实盘模式
-            order_type = order_type or 0  # 如果不填order_type,则默认为普通委托
-            try:
-                result = self.__okex_swap.take_order(self.__instrument_id, 1, price, size, order_type=order_type)
-            except Exception as e:
-                raise SendOrderError(e)
-            order_info = self.get_order_info(order_id=result['order_id'])  # 下单后查询一次订单状态
-            if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                return {"【交易提醒】下单结果": order_info}
-            # 如果订单状态不是"完全成交"或者"失败"
-            if config.price_cancellation == "true":  # 选择了价格撤单时，如果最新价超过委托价一定幅度，撤单重发，返回下单结果
-                if order_info["订单状态"] == "等待成交":
-                    if float(self.get_ticker()['last']) >= price * (1 + config.price_cancellation_amplitude):
-                        try:
-                            self.revoke_order(order_id=result['order_id'])
-                            state = self.get_order_info(order_id=result['order_id'])
-                            if state['订单状态'] == "撤单成功":
-                                return self.buy(float(self.get_ticker()['last']) * (1 + config.reissue_order), size - state["已成交数量"])
-                        except:
-                            order_info = self.get_order_info(order_id=result['order_id'])  # 下单后查询一次订单状态
-                            if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                                return {"【交易提醒】下单结果": order_info}
-                if order_info["订单状态"] == "部分成交":
-                    if float(self.get_ticker()['last']) >= price * (1 + config.price_cancellation_amplitude):
-                        try:
-                            self.revoke_order(order_id=result['order_id'])
-                            state = self.get_order_info(order_id=result['order_id'])
-                            if state['订单状态'] == "撤单成功":
-                                return self.buy(float(self.get_ticker()['last']) * (1 + config.reissue_order), size - state["已成交数量"])
-                        except:
-                            order_info = self.get_order_info(order_id=result['order_id'])  # 下单后查询一次订单状态
-                            if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                                return {"【交易提醒】下单结果": order_info}
-            if config.time_cancellation == "true":  # 选择了时间撤单时，如果委托单发出多少秒后不成交，撤单重发，直至完全成交，返回成交结果
-                time.sleep(config.time_cancellation_seconds)
-                order_info = self.get_order_info(order_id=result['order_id'])
-                if order_info["订单状态"] == "等待成交":
-                    try:
-                        self.revoke_order(order_id=result['order_id'])
-                        state = self.get_order_info(order_id=result['order_id'])
-                        if state['订单状态'] == "撤单成功":
-                            return self.buy(float(self.get_ticker()['last']) * (1 + config.reissue_order), size - state["已成交数量"])
-                    except:
-                        order_info = self.get_order_info(order_id=result['order_id'])  # 下单后查询一次订单状态
-                        if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                            return {"【交易提醒】下单结果": order_info}
-                if order_info["订单状态"] == "部分成交":
-                    try:
-                        self.revoke_order(order_id=result['order_id'])
-                        state = self.get_order_info(order_id=result['order_id'])
-                        if state['订单状态'] == "撤单成功":
-                            return self.buy(float(self.get_ticker()['last']) * (1 + config.reissue_order), size - state["已成交数量"])
-                    except:
-                        order_info = self.get_order_info(order_id=result['order_id'])  # 下单后查询一次订单状态
-                        if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                            return {"【交易提醒】下单结果": order_info}
-            if config.automatic_cancellation == "true":
-                # 如果订单未完全成交，且未设置价格撤单和时间撤单，且设置了自动撤单，就自动撤单并返回下单结果与撤单结果
-                try:
-                    self.revoke_order(order_id=result['order_id'])
-                    state = self.get_order_info(order_id=result['order_id'])
-                    return {"【交易提醒】下单结果": state}
-                except:
-                    order_info = self.get_order_info(order_id=result['order_id'])  # 下单后查询一次订单状态
-                    if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                        return {"【交易提醒】下单结果": order_info}
-            else:  # 未启用交易助手时，下单并查询订单状态后直接返回下单结果
-                return {"【交易提醒】下单结果": order_info}
+
+    def get_single_equity(self, instrument_id):
+        """
+        获取单个合约账户的权益
+        :param instrument_id: 例如"TRX-USDT-SWAP"
+        :return:返回浮点数
+        """
+        data = self.__okex_swap.get_coin_account(instrument_id=instrument_id)
+        result =float(data["info"]["equity"])
+        return result
+
+    def buy(self, price, size, order_type=None):
+        if config.backtest != "enabled":    # 实盘模式
+            order_type = order_type or 0  # 如果不填order_type,则默认为普通委托
+            try:
+                result = self.__okex_swap.take_order(self.__instrument_id, 1, price, size, order_type=order_type)
+            except Exception as e:
+                raise SendOrderError(e)
+            return self.__assist(result['order_id'], price, size, self.buy, 1)
         else:   # 回测模式
             return "回测模拟下单成功！"
 
@@ -928,68 +831,7 @@ class OKEXSWAP:
                 result = self.__okex_swap.take_order(self.__instrument_id, 3, price, size, order_type=order_type)
             except Exception as e:
                 raise SendOrderError(e)
-            order_info = self.get_order_info(order_id=result['order_id'])  # 下单后查询一次订单状态
-            if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                return {"【交易提醒】下单结果": order_info}
-            # 如果订单状态不是"完全成交"或者"失败"
-            if config.price_cancellation == "true":  # 选择了价格撤单时，如果最新价超过委托价一定幅度，撤单重发，返回下单结果
-                if order_info["订单状态"] == "等待成交":
-                    if float(self.get_ticker()['last']) <= price * (1 - config.price_cancellation_amplitude):
-                        try:
-                            self.revoke_order(order_id=result['order_id'])
-                            state = self.get_order_info(order_id=result['order_id'])
-                            if state['订单状态'] == "撤单成功":
-                                return self.sell(float(self.get_ticker()['last']) * (1 - config.reissue_order), size - state["已成交数量"])
-                        except:
-                            order_info = self.get_order_info(order_id=result['order_id'])  # 下单后查询一次订单状态
-                            if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                                return {"【交易提醒】下单结果": order_info}
-                if order_info["订单状态"] == "部分成交":
-                    if float(self.get_ticker()['last']) <= price * (1 - config.price_cancellation_amplitude):
-                        try:
-                            self.revoke_order(order_id=result['order_id'])
-                            state = self.get_order_info(order_id=result['order_id'])
-                            if state['订单状态'] == "撤单成功":
-                                return self.sell(float(self.get_ticker()['last']) * (1 - config.reissue_order), size - state["已成交数量"])
-                        except:
-                            order_info = self.get_order_info(order_id=result['order_id'])  # 下单后查询一次订单状态
-                            if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                                return {"【交易提醒】下单结果": order_info}
-            if config.time_cancellation == "true":  # 选择了时间撤单时，如果委托单发出多少秒后不成交，撤单重发，直至完全成交，返回成交结果
-                time.sleep(config.time_cancellation_seconds)
-                order_info = self.get_order_info(order_id=result['order_id'])
-                if order_info["订单状态"] == "等待成交":
-                    try:
-                        self.revoke_order(order_id=result['order_id'])
-                        state = self.get_order_info(order_id=result['order_id'])
-                        if state['订单状态'] == "撤单成功":
-                            return self.sell(float(self.get_ticker()['last']) * (1 - config.reissue_order), size - state["已成交数量"])
-                    except:
-                        order_info = self.get_order_info(order_id=result['order_id'])  # 下单后查询一次订单状态
-                        if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                            return {"【交易提醒】下单结果": order_info}
-                if order_info["订单状态"] == "部分成交":
-                    try:
-                        self.revoke_order(order_id=result['order_id'])
-                        state = self.get_order_info(order_id=result['order_id'])
-                        if state['订单状态'] == "撤单成功":
-                            return self.sell(float(self.get_ticker()['last']) * (1 - config.reissue_order), size - state["已成交数量"])
-                    except:
-                        order_info = self.get_order_info(order_id=result['order_id'])  # 下单后查询一次订单状态
-                        if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                            return {"【交易提醒】下单结果": order_info}
-            if config.automatic_cancellation == "true":
-                # 如果订单未完全成交，且未设置价格撤单和时间撤单，且设置了自动撤单，就自动撤单并返回下单结果与撤单结果
-                try:
-                    self.revoke_order(order_id=result['order_id'])
-                    state = self.get_order_info(order_id=result['order_id'])
-                    return {"【交易提醒】下单结果": state}
-                except:
-                    order_info = self.get_order_info(order_id=result['order_id'])  # 下单后查询一次订单状态
-                    if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                        return {"【交易提醒】下单结果": order_info}
-            else:  # 未启用交易助手时，下单并查询订单状态后直接返回下单结果
-                return {"【交易提醒】下单结果": order_info}
+            return self.__assist(result['order_id'], price, size, self.sell, -1)
         else:   # 回测模式
             return "回测模拟下单成功！"
 
@@ -1000,68 +842,7 @@ class OKEXSWAP:
                 result = self.__okex_swap.take_order(self.__instrument_id, 2, price, size, order_type=order_type)
             except Exception as e:
                 raise SendOrderError(e)
-            order_info = self.get_order_info(order_id=result['order_id'])  # 下单后查询一次订单状态
-            if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                return {"【交易提醒】下单结果": order_info}
-            # 如果订单状态不是"完全成交"或者"失败"
-            if config.price_cancellation == "true":  # 选择了价格撤单时，如果最新价超过委托价一定幅度，撤单重发，返回下单结果
-                if order_info["订单状态"] == "等待成交":
-                    if float(self.get_ticker()['last']) <= price * (1 - config.price_cancellation_amplitude):
-                        try:
-                            self.revoke_order(order_id=result['order_id'])
-                            state = self.get_order_info(order_id=result['order_id'])
-                            if state['订单状态'] == "撤单成功":
-                                return self.sellshort(float(self.get_ticker()['last']) * (1 - config.reissue_order), size - state["已成交数量"])
-                        except:
-                            order_info = self.get_order_info(order_id=result['order_id'])  # 下单后查询一次订单状态
-                            if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                                return {"【交易提醒】下单结果": order_info}
-                if order_info["订单状态"] == "部分成交":
-                    if float(self.get_ticker()['last']) <= price * (1 - config.price_cancellation_amplitude):
-                        try:
-                            self.revoke_order(order_id=result['order_id'])
-                            state = self.get_order_info(order_id=result['order_id'])
-                            if state['订单状态'] == "撤单成功":
-                                return self.sellshort(float(self.get_ticker()['last']) * (1 - config.reissue_order), size - state["已成交数量"])
-                        except:
-                            order_info = self.get_order_info(order_id=result['order_id'])  # 下单后查询一次订单状态
-                            if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                                return {"【交易提醒】下单结果": order_info}
-            if config.time_cancellation == "true":  # 选择了时间撤单时，如果委托单发出多少秒后不成交，撤单重发，直至完全成交，返回成交结果
-                time.sleep(config.time_cancellation_seconds)
-                order_info = self.get_order_info(order_id=result['order_id'])
-                if order_info["订单状态"] == "等待成交":
-                    try:
-                        self.revoke_order(order_id=result['order_id'])
-                        state = self.get_order_info(order_id=result['order_id'])
-                        if state['订单状态'] == "撤单成功":
-                            return self.sellshort(float(self.get_ticker()['last']) * (1 - config.reissue_order), size - state["已成交数量"])
-                    except:
-                        order_info = self.get_order_info(order_id=result['order_id'])  # 下单后查询一次订单状态
-                        if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                            return {"【交易提醒】下单结果": order_info}
-                if order_info["订单状态"] == "部分成交":
-                    try:
-                        self.revoke_order(order_id=result['order_id'])
-                        state = self.get_order_info(order_id=result['order_id'])
-                        if state['订单状态'] == "撤单成功":
-                            return self.sellshort(float(self.get_ticker()['last']) * (1 - config.reissue_order), size - state["已成交数量"])
-                    except:
-                        order_info = self.get_order_info(order_id=result['order_id'])  # 下单后查询一次订单状态
-                        if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                            return {"【交易提醒】下单结果": order_info}
-            if config.automatic_cancellation == "true":
-                # 如果订单未完全成交，且未设置价格撤单和时间撤单，且设置了自动撤单，就自动撤单并返回下单结果与撤单结果
-                try:
-                    self.revoke_order(order_id=result['order_id'])
-                    state = self.get_order_info(order_id=result['order_id'])
-                    return {"【交易提醒】下单结果": state}
-                except:
-                    order_info = self.get_order_info(order_id=result['order_id'])  # 下单后查询一次订单状态
-                    if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                        return {"【交易提醒】下单结果": order_info}
-            else:  # 未启用交易助手时，下单并查询订单状态后直接返回下单结果
-                return {"【交易提醒】下单结果": order_info}
+            return self.__assist(result['order_id'], price, size, self.sellshort, -1)
         else:   # 回测模式
             return "回测模拟下单成功！"
 
@@ -1072,70 +853,82 @@ class OKEXSWAP:
                 result = self.__okex_swap.take_order(self.__instrument_id, 4, price, size, order_type=order_type)
             except Exception as e:
                 raise SendOrderError(e)
-            order_info = self.get_order_info(order_id=result['order_id'])  # 下单后查询一次订单状态
-            if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                return {"【交易提醒】下单结果": order_info}
-            # 如果订单状态不是"完全成交"或者"失败"
-            if config.price_cancellation == "true":  # 选择了价格撤单时，如果最新价超过委托价一定幅度，撤单重发，返回下单结果
-                if order_info["订单状态"] == "等待成交":
-                    if float(self.get_ticker()['last']) >= price * (1 + config.price_cancellation_amplitude):
-                        try:
-                            self.revoke_order(order_id=result['order_id'])
-                            state = self.get_order_info(order_id=result['order_id'])
-                            if state['订单状态'] == "撤单成功":
-                                return self.buytocover(float(self.get_ticker()['last']) * (1 + config.reissue_order), size - state["已成交数量"])
-                        except:
-                            order_info = self.get_order_info(order_id=result['order_id'])  # 下单后查询一次订单状态
-                            if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                                return {"【交易提醒】下单结果": order_info}
-                if order_info["订单状态"] == "部分成交":
-                    if float(self.get_ticker()['last']) >= price * (1 + config.price_cancellation_amplitude):
-                        try:
-                            self.revoke_order(order_id=result['order_id'])
-                            state = self.get_order_info(order_id=result['order_id'])
-                            if state['订单状态'] == "撤单成功":
-                                return self.buytocover(float(self.get_ticker()['last']) * (1 + config.reissue_order), size - state["已成交数量"])
-                        except:
-                            order_info = self.get_order_info(order_id=result['order_id'])  # 下单后查询一次订单状态
-                            if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                                return {"【交易提醒】下单结果": order_info}
-            if config.time_cancellation == "true":  # 选择了时间撤单时，如果委托单发出多少秒后不成交，撤单重发，直至完全成交，返回成交结果
-                time.sleep(config.time_cancellation_seconds)
-                order_info = self.get_order_info(order_id=result['order_id'])
-                if order_info["订单状态"] == "等待成交":
-                    try:
-                        self.revoke_order(order_id=result['order_id'])
-                        state = self.get_order_info(order_id=result['order_id'])
-                        if state['订单状态'] == "撤单成功":
-                            return self.buytocover(float(self.get_ticker()['last']) * (1 + config.reissue_order), size - state["已成交数量"])
-                    except:
-                        order_info = self.get_order_info(order_id=result['order_id'])  # 下单后查询一次订单状态
-                        if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                            return {"【交易提醒】下单结果": order_info}
-                if order_info["订单状态"] == "部分成交":
-                    try:
-                        self.revoke_order(order_id=result['order_id'])
-                        state = self.get_order_info(order_id=result['order_id'])
-                        if state['订单状态'] == "撤单成功":
-                            return self.buytocover(float(self.get_ticker()['last']) * (1 + config.reissue_order), size - state["已成交数量"])
+            return self.__assist(result['order_id'], price, size, self.buytocover, 1)
+        else:   # 回测模式
+            return "回测模拟下单成功！"
+
+    def __assist(self, order_id, price, size, place, side):
+        """
+        交易助手：下单后按配置的价格撤单、时间撤单与自动撤单处理订单
+        需要追单时先把订单直接改到新价格并继续跟踪，改单失败时才撤单后以剩余数量重新下单
+        :param order_id: 订单ID
+        :param price: 委托价格
+        :param size: 下单数量
+        :param place: 重新下单的方法，如self.buy
+        :param side: 买入开多与买入平空为1，卖出平多与卖出开空为-1
+        :return: 返回下单结果
+        """
+        order_info = self.__placed_order_info(order_id)   # 下单后查询一次订单状态
+        if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ": # 如果订单状态为"完全成交"或者"失败"，返回结果
+            return {"【交易提醒】下单结果": order_info}
+        # 如果订单状态不是"完全成交"或者"失败"
+        if config.price_cancellation == "true": # 选择了价格撤单时，如果最新价超过委托价一定幅度，改单或撤单重发，返回下单结果
+            if order_info["订单状态"] == "等待成交" or order_info["订单状态"] == "部分成交":
+                last = float(self.get_ticker()['last'])
+                if (side > 0 and last >= price * (1 + config.price_cancellation_amplitude)) or \
+                        (side < 0 and last <= price * (1 - config.price_cancellation_amplitude)):
+                    try:    # 如果改单与撤单都失败，则订单可能在此期间已完全成交
+                        receipt = self.__chase(order_id, last * (1 + side * config.reissue_order), size, place, side)
+                        if receipt is not _NOT_REISSUED:
+                            return receipt
                     except:
-                        order_info = self.get_order_info(order_id=result['order_id'])  # 下单后查询一次订单状态
-                        if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
+                        order_info = self.get_order_info(order_id=order_id)  # 再查询一次订单状态
+                        if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":
                             return {"【交易提醒】下单结果": order_info}
-            if config.automatic_cancellation == "true":
-                # 如果订单未完全成交，且未设置价格撤单和时间撤单，且设置了自动撤单，就自动撤单并返回下单结果与撤单结果
+        if config.time_cancellation == "true": # 选择了时间撤单时，如果委托单发出多少秒后不成交，改单或撤单重发，直至完全成交，返回成交结果
+            self.__wait(order_id, config.time_cancellation_seconds)
+            order_info = self.get_order_info(order_id=order_id)
+            if order_info["订单状态"] == "等待成交" or order_info["订单状态"] == "部分成交":
                 try:
-                    self.revoke_order(order_id=result['order_id'])
-                    state = self.get_order_info(order_id=result['order_id'])
-                    return {"【交易提醒】下单结果": state}
+                    last = float(self.get_ticker()['last'])
+                    receipt = self.__chase(order_id, last * (1 + side * config.reissue_order), size, place, side)
+                    if receipt is not _NOT_REISSUED:
+                        return receipt
                 except:
-                    order_info = self.get_order_info(order_id=result['order_id'])  # 下单后查询一次订单状态
-                    if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
+                    order_info = self.get_order_info(order_id=order_id)  # 再查询一次订单状态
+                    if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":
                         return {"【交易提醒】下单结果": order_info}
-            else:  # 未启用交易助手时，下单并查询订单状态后直接返回下单结果
-                return {"【交易提醒】下单结果": order_info}
-        else:   # 回测模式
-            return "回测模拟下单成功！"
+        if config.automatic_cancellation == "true":
+            # 如果订单未完全成交，且未设置价格撤单和时间撤单，且设置了自动撤单，就自动撤单并返回下单结果与撤单结果
+            try:
+                self.revoke_order(order_id=order_id)
+                state = self.get_order_info(order_id=order_id)
+                return {"【交易提醒】下单结果": state}
+            except:
+                order_info = self.get_order_info(order_id=order_id)  # 再查询一次订单状态
+                if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":
+                    return {"【交易提醒】下单结果": order_info}
+        else:   # 未启用交易助手时，下单并查询订单状态后直接返回下单结果
+            return {"【交易提醒】下单结果": order_info}
+
+    def __chase(self, order_id, price, size, place, side):
+        """
+        追单：okex支持修改订单，把未成交的订单直接改到新价格后继续跟踪，省去撤单、查询与重新下单的往返；
+        改单失败时（如订单已成交或正在撤销）按原来的方式撤单，以剩余数量重新下单
+        :return: 返回下单结果，撤单后订单状态不是"撤单成功"时返回_NOT_REISSUED
+        """
+        try:
+            receipt = self.__okex_swap.amend_order(self.__instrument_id, cancel_on_fail="0", order_id=order_id, new_price=price)
+            amended = str(receipt.get("error_code", "0")) in ("0", "")
+        except Exception:
+            amended = False
+        if amended:
+            return self.__assist(order_id, price, size, place, side)
+        self.revoke_order(order_id=order_id)
+        state = self.get_order_info(order_id=order_id)
+        if state['订单状态'] == "撤单成功":   # 部分成交时，重发委托数量为原下单数量减去已成交数量
+            return place(price, size - state["已成交数量"])
+        return _NOT_REISSUED
 
     def BUY(self, cover_short_price, cover_short_size, open_long_price, open_long_size, order_type=None):
         if config.backtest != "enabled":
@@ -1161,18 +954,107 @@ class OKEXSWAP:
         else:  # 回测模式
             return "回测模拟下单成功！"
 
+    def batch_place(self, orders, order_type=None):
+        """
+        批量下单，每10个订单合并成一次请求，如平空与开多、网格挂单可以在一次请求中发出
+        :param orders: 订单列表，每个订单为(交易方向, 价格, 数量)，交易方向为"buy"、"sell"、"sellshort"或"buytocover"，
+                       例如[("buytocover", 9000, 1), ("buy", 9000, 1)]
+        :param order_type: 同buy()，所有订单使用相同的委托类型
+        :return: 返回与orders顺序相同的列表，每项为{"订单ID": 订单ID, "错误信息": 错误信息}，下单成功的订单错误信息为空字符串
+        """
+        if config.backtest != "enabled":    # 实盘模式
+            result = []
+            for group in _chunks(orders):
+                try:
+                    receipt = self.__okex_swap.take_orders(self.__instrument_id, _okex_batch_orders(group, order_type))
+                except OkexAPIException as e:   # 某一组请求失败时不影响已经发出的其他组，只将这一组标记为失败
+                    result.extend({"订单ID": None, "错误信息": str(e)} for _ in group)
+                    continue
+                result.extend(_okex_batch_result(receipt, "order_info", len(group)))
+            return result
+        else:   # 回测模式
+            return "回测模拟下单成功！"
+
+    def batch_cancel(self, order_ids):
+        """
+        批量撤单，每10个订单合并成一次请求
+        :param order_ids: 订单ID列表
+        :return: 返回与revoke_order()相同格式的提示
+        """
+        receipts = []
+        for group in _chunks(order_ids):
+            try:
+                receipts.append(self.__okex_swap.revoke_orders(self.__instrument_id, ids=group))
+            except OkexAPIException as e:
+                receipts.append({"result": False, "error_message": str(e)})
+        return _okex_batch_cancel_result(receipts)
+
+    def batch_amend(self, amends, cancel_on_fail=0):
+        """
+        批量修改订单的价格与数量，每10个订单合并成一次请求
+        :param amends: 改单列表，每项为(订单ID, 新价格, 新数量)，不修改数量时新数量填None
+        :param cancel_on_fail: 改单失败时是否撤单，0：不撤单，1：撤单
+        :return: 返回与amends顺序相同的列表，每项为{"订单ID": 订单ID, "错误信息": 错误信息}，改单成功的订单错误信息为空字符串
+        """
+        result = []
+        for group in _chunks(amends):
+            amend_data = []
+            for order_id, price, size in group:
+                data = {"order_id": str(order_id), "cancel_on_fail": str(cancel_on_fail), "new_price": str(price)}
+                if size is not None:
+                    data["new_size"] = str(size)
+                amend_data.append(data)
+            try:
+                receipt = self.__okex_swap.amend_batch_orders(self.__instrument_id, amend_data)
+            except OkexAPIException as e:
+                result.extend({"订单ID": None, "错误信息": str(e)} for _ in group)
+                continue
+            result.extend(_okex_batch_result(receipt, "amend_info", len(group)))
+        return result
+
     def get_order_list(self, state, limit):
         receipt = self.__okex_swap.get_order_list(self.__instrument_id, state=state, limit=limit)
         return receipt
 
+    def track_orders(self):
+        """
+        订阅websocket私有订单频道跟踪订单状态，启用后交易助手等待订单结束时不再固定sleep，
+        get_order_info()优先使用websocket推送的订单状态，websocket断线或没有推送时再查询REST接口
+        :return: 返回OKEXORDERTRACKER对象
+        """
+        if self.__tracker is None:
+            self.__tracker = OKEXORDERTRACKER(self.__access_key, self.__secret_key, self.__passphrase, self.__instrument_id).start()
+        return self.__tracker
+
+    def __placed_order_info(self, order_id):
+        """下单后查询一次订单状态，跟踪订单状态时稍等websocket推送新订单，推送未到达时再查询REST接口"""
+        if self.__tracker is not None:
+            order_info = self.__tracker.get(order_id, timeout=1)
+            if order_info is not None:
+                return order_info
+        return self.get_order_info(order_id=order_id)
+
+    def __wait(self, order_id, seconds):
+        """等待订单结束，最多等待seconds秒，没有跟踪订单状态时与time.sleep()相同"""
+        if self.__tracker is not None:
+            self.__tracker.wait(order_id, seconds)
+        else:
+            time.sleep(seconds)
+
     def revoke_order(self, order_id):
         receipt = self.__okex_swap.revoke_order(self.__instrument_id, order_id)
         if receipt['error_code'] == "0":
+            if self.__tracker is not None:  # 等待websocket推送撤单结果，之后查询到的订单状态不会是撤单前的状态
+                self.__tracker.wait(order_id, 1)
             return '【交易提醒】撤单成功'
         else:
             return '【交易提醒】撤单失败' + receipt['error_message']
 
     def get_order_info(self, order_id):
+        if self.__tracker is not None:
+            order_info = self.__tracker.get(order_id)    # 只取已收到的推送，不等待
+            if order_info is not None:
+                return order_info
         result = self.__okex_swap.get_order_info(self.__instrument_id, order_id)
         instrument_id = result['instrument_id']
         action = None
@@ -1917,6 +1799,7 @@ class HUOBISWAP:
         self.__instrument_id = "{}-{}".format(instrument_id.split("-")[0], instrument_id.split("-")[1])
         self.__huobi_swap = huobiswap.HuobiSwap(self.__access_key, self.__secret_key)
         self.__leverage = leverage or 20
+        self.__tracker = None   # 订单状态跟踪，调用track_orders()后启用
 
     def get_single_equity(self, contract_code):
         """
@@ -1958,7 +1841,7 @@ class HUOBISWAP:
                             client_order_id='', price=price, volume=size, direction='buy',
                             offset='open', lever_rate=self.__leverage, order_price_type=order_price_type)
             try:
-                order_info = self.get_order_info(order_id=result['data']['order_id_str'])  # 下单后查询一次订单状态
+                order_info = self.__placed_order_info(result['data']['order_id_str'])  # 下单后查询一次订单状态
             except:
                 raise SendOrderError(result['err_msg'])
             if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
@@ -1988,7 +1871,7 @@ class HUOBISWAP:
                             if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
                                 return {"【交易提醒】下单结果": order_info}
             if config.time_cancellation == "true":  # 选择了时间撤单时，如果委托单发出多少秒后不成交，撤单重发，直至完全成交，返回成交结果
-                time.sleep(config.time_cancellation_seconds)
+                self.__wait(result['data']['order_id_str'], config.time_cancellation_seconds)
                 order_info = self.get_order_info(order_id=result['data']['order_id_str'])
                 if order_info["订单状态"] == "准备提交" or order_info["订单状态"] == "已提交":
                     try:
@@ -2055,7 +1938,7 @@ class HUOBISWAP:
                             client_order_id='', price=price, volume=size, direction='sell',
                             offset='close', lever_rate=self.__leverage, order_price_type=order_price_type)
             try:
-                order_info = self.get_order_info(order_id=result['data']['order_id_str'])  # 下单后查询一次订单状态
+                order_info = self.__placed_order_info(result['data']['order_id_str'])  # 下单后查询一次订单状态
             except:
                 raise SendOrderError(result['err_msg'])
             if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
@@ -2085,7 +1968,7 @@ class HUOBISWAP:
                             if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
                                 return {"【交易提醒】下单结果": order_info}
             if config.time_cancellation == "true":  # 选择了时间撤单时，如果委托单发出多少秒后不成交，撤单重发，直至完全成交，返回成交结果
-                time.sleep(config.time_cancellation_seconds)
+                self.__wait(result['data']['order_id_str'], config.time_cancellation_seconds)
                 order_info = self.get_order_info(order_id=result['data']['order_id_str'])
                 if order_info["订单状态"] == "准备提交" or order_info["订单状态"] == "已提交":
                     try:
@@ -2152,7 +2035,7 @@ class HUOBISWAP:
                             client_order_id='', price=price, volume=size, direction='buy',
                             offset='close', lever_rate=self.__leverage, order_price_type=order_price_type)
             try:
-                order_info = self.get_order_info(order_id=result['data']['order_id_str'])  # 下单后查询一次订单状态
+                order_info = self.__placed_order_info(result['data']['order_id_str'])  # 下单后查询一次订单状态
             except:
                 raise SendOrderError(result['err_msg'])
             if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
@@ -2182,7 +2065,7 @@ class HUOBISWAP:
                             if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
                                 return {"【交易提醒】下单结果": order_info}
             if config.time_cancellation == "true":  # 选择了时间撤单时，如果委托单发出多少秒后不成交，撤单重发，直至完全成交，返回成交结果
-                time.sleep(config.time_cancellation_seconds)
+                self.__wait(result['data']['order_id_str'], config.time_cancellation_seconds)
                 order_info = self.get_order_info(order_id=result['data']['order_id_str'])
                 if order_info["订单状态"] == "准备提交" or order_info["订单状态"] == "已提交":
                     try:
@@ -2249,7 +2132,7 @@ class HUOBISWAP:
                             client_order_id='', price=price, volume=size, direction='sell',
                             offset='open', lever_rate=self.__leverage, order_price_type=order_price_type)
             try:
-                order_info = self.get_order_info(order_id=result['data']['order_id_str'])  # 下单后查询一次订单状态
+                order_info = self.__placed_order_info(result['data']['order_id_str'])  # 下单后查询一次订单状态
             except:
                 raise SendOrderError(result['err_msg'])
             if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
@@ -2279,7 +2162,7 @@ class HUOBISWAP:
                             if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
                                 return {"【交易提醒】下单结果": order_info}
             if config.time_cancellation == "true":  # 选择了时间撤单时，如果委托单发出多少秒后不成交，撤单重发，直至完全成交，返回成交结果
-                time.sleep(config.time_cancellation_seconds)
+                self.__wait(result['data']['order_id_str'], config.time_cancellation_seconds)
                 order_info = self.get_order_info(order_id=result['data']['order_id_str'])
                 if order_info["订单状态"] == "准备提交" or order_info["订单状态"] == "已提交":
                     try:
@@ -2342,14 +2225,98 @@ class HUOBISWAP:
         else:
             return "回测模拟下单成功！"
 
+    def batch_place(self, orders, order_type=None):
+        """
+        火币永续合约批量下单，每10个订单合并成一次请求，如平空与开多、网格挂单可以在一次请求中发出
+        :param orders: 订单列表，每个订单为(交易方向, 价格, 数量)，交易方向为"buy"、"sell"、"sellshort"或"buytocover"，
+                       例如[("buytocover", 9000, 1), ("buy", 9000, 1)]
+        :param order_type: 同buy()，所有订单使用相同的订单报价类型
+        :return: 返回与orders顺序相同的列表，每项为{"订单ID": 订单ID, "错误信息": 错误信息}，下单成功的订单错误信息为空字符串
+        """
+        if config.backtest != "enabled":
+            order_price_type = HUOBI_ORDER_PRICE_TYPE.get(order_type or 0)
+            if order_price_type is None:
+                return "【交易提醒】交易所: Huobi 订单报价类型错误！"
+            result = []
+            for group in _chunks(orders):
+                orders_data = []
+                for action, price, size in group:
+                    if action not in HUOBI_DIRECTION:
+                        raise SendOrderError("交易方向错误：{}，只能是buy、sell、sellshort或buytocover！".format(action))
+                    direction, offset = HUOBI_DIRECTION[action]
+                    orders_data.append({"contract_code": self.__instrument_id, "price": price, "volume": size,
+                                        "direction": direction, "offset": offset, "lever_rate": self.__leverage,
+                                        "order_price_type": order_price_type})
+                receipt = self.__huobi_swap.send_contract_batchorder({"orders_data": orders_data})
+                if receipt.get('status') != "ok":   # 整个请求失败时每个订单都返回相同的错误信息
+                    result.extend({"订单ID": None, "错误信息": receipt.get('err_msg') or receipt.get('msg') or "批量下单失败！"} for _ in group)
+                    continue
+                group_result = [{"订单ID": None, "错误信息": ""} for _ in group]
+                for item in receipt['data'].get('success', []):     # index从1开始
+                    group_result[item['index'] - 1]["订单ID"] = item['order_id_str']
+                for item in receipt['data'].get('errors', []):
+                    group_result[item['index'] - 1]["错误信息"] = item.get('err_msg') or item.get('msg', "")
+                result.extend(group_result)
+            return result
+        else:
+            return "回测模拟下单成功！"
+
+    def batch_cancel(self, order_ids):
+        """
+        火币永续合约批量撤单，每10个订单合并成一次请求
+        :param order_ids: 订单ID列表
+        :return: 返回与revoke_order()相同格式的提示
+        """
+        errors = []
+        for group in _chunks(order_ids):
+            receipt = self.__huobi_swap.cancel_contract_order(self.__instrument_id, ",".join(str(x) for x in group))
+            if receipt.get('status') != "ok":   # 请求错误时火币可能只返回msg
+                errors.append(receipt.get('err_msg') or receipt.get('msg') or "批量撤单失败！")
+            else:
+                errors.extend("{}：{}".format(item['order_id'], item['err_msg']) for item in receipt['data'].get('errors', []))
+        if errors:
+            return '【交易提醒】交易所: Huobi 批量撤单失败' + "；".join(errors)
+        return '【交易提醒】交易所: Huobi 批量撤单成功'
+
+    def track_orders(self):
+        """
+        订阅websocket私有订单频道跟踪订单状态，启用后交易助手等待订单结束时不再固定sleep，
+        get_order_info()优先使用websocket推送的订单状态，websocket断线或没有推送时再查询REST接口
+        :return: 返回HUOBIORDERTRACKER对象
+        """
+        if self.__tracker is None:
+            self.__tracker = HUOBIORDERTRACKER(self.__access_key, self.__secret_key, self.__instrument_id).start()
+        return self.__tracker
+
+    def __placed_order_info(self, order_id):
+        """下单后查询一次订单状态，跟踪订单状态时稍等websocket推送新订单，推送未到达时再查询REST接口"""
+        if self.__tracker is not None:
+            order_info = self.__tracker.get(order_id, timeout=1)
+            if order_info is not None:
+                return order_info
+        return self.get_order_info(order_id=order_id)
+
+    def __wait(self, order_id, seconds):
+        """等待订单结束，最多等待seconds秒，没有跟踪订单状态时与time.sleep()相同"""
+        if self.__tracker is not None:
+            self.__tracker.wait(order_id, seconds)
+        else:
+            time.sleep(seconds)
+
     def revoke_order(self, order_id):
         receipt = self.__huobi_swap.cancel_contract_order(self.__instrument_id, order_id)
         if receipt['status'] == "ok":
+            if self.__tracker is not None:  # 等待websocket推送撤单结果，之后查询到的订单状态不会是撤单前的状态
+                self.__tracker.wait(order_id, 1)
             return '【交易提醒】交易所: Huobi 撤单成功'
         else:
             return '【交易提醒】交易所: Huobi 撤单失败' + receipt['data']['errors'][0]['err_msg']
 
     def get_order_info(self, order_id):
+        if self.__tracker is not None:
+            order_info = self.__tracker.get(order_id)    # 只取已收到的推送，不等待
+            if order_info is not None:
+                return order_info
         result = self.__huobi_swap.get_contract_order_info(self.__instrument_id, order_id)
         instrument_id = self.__instrument_id
         state = int(result['data'][0]['status'])
@@ -0,0 +1,292 @@
+# -*- coding:utf-8 -*-
+
+"""
+HTTP连接池
+
+各交易所的REST客户端共用此模块发送请求，每个域名使用一个保持长连接的requests.Session，
+下单与轮询不必每次都重新建立TCP与TLS连接。
+连接池大小、重试次数与超时秒数可在配置文件中设置：{"HTTP": {"pool_size": 10, "retries": 3, "timeout": 10}}，不设置时使用默认值。
+只有GET等幂等请求会在服务器返回502、503、504时重试，下单等POST请求只在连接尚未建立成功时重试，不会重复提交。
+发送前按purequant.ratelimit中各交易所的频率限制排队。
+多个策略或线程同时发出相同的公共行情GET请求（ticker、深度、k线等）时，只有第一个请求真正发出，
+其余请求等待并共用它的响应，带签名的私有请求不会合并。
+
+响应的json()使用purequant.codec解码，安装了orjson或ujson时自动使用。
+
+async_transport是基于aiohttp的异步版本，供purequant.aiotrade中的异步交易接口使用，配置与重试规则相同，
+需要另外安装aiohttp：pip install aiohttp
+"""
+
+import asyncio
+import threading
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from purequant.config import config
+from purequant.ratelimit import ratelimit
+from purequant import codec
+try:
+    import aiohttp
+except ImportError:     # 只使用同步接口时不需要安装aiohttp
+    aiohttp = None
+
+AUTH_HEADERS = ("OK-ACCESS-KEY", "X-MBX-APIKEY", "api-key")   # 带有这些请求头的是私有请求
+PUBLIC_PATHS = ("/instruments",)    # okex的公共行情接口也会签名，按路径判断
+
+
+def coalesce_key(method, url, params=None, headers=None):
+    """
+    相同的公共GET请求返回同一个键，私有请求或非GET请求返回None
+    :return: 返回可哈希的元组或None
+    """
+    if method.upper() != "GET":
+        return None
+    if isinstance(params, dict):
+        if "Signature" in params or "signature" in params:
+            return None
+        params = tuple(sorted(params.items()))
+    elif params and "ignature=" in params:
+        return None
+    if "ignature=" in url:
+        return None
+    if headers:
+        if any(key in headers for key in AUTH_HEADERS) and not any(x in urlsplit(url).path for x in PUBLIC_PATHS):
+            return None
+        return url, params, headers.get("x-simulated-trading")
+    return url, params, None
+
+
+class Response(requests.Response):
+    """json()使用purequant.codec解码的requests.Response"""
+
+    def json(self, **kwargs):
+        if kwargs:
+            return super().json(**kwargs)
+        try:
+            return codec.loads(self.content)
+        except ValueError:  # 不是utf-8编码或内容不是JSON时按requests原来的方式解码，出错时抛出相同的异常
+            return super().json()
+
+
+class _Call:
+    """正在进行中的请求"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.response = None
+        self.error = None
+
+
+class __Transport:
+    """HTTP连接池"""
+
+    def __init__(self):
+        self.__sessions = {}    # {域名: requests.Session}
+        self.__calls = {}       # {请求的键: _Call}，正在进行中的公共GET请求
+        self.__lock = threading.Lock()
+
+    def __retry(self):
+        retries = getattr(config, "http_retries", 3)
+        kwargs = dict(total=retries, read=0, backoff_factor=0.3, status_forcelist=(502, 503, 504), raise_on_status=False)
+        try:
+            return Retry(allowed_methods=frozenset(["GET", "HEAD", "OPTIONS"]), **kwargs)
+        except TypeError:   # 旧版本的urllib3
+            return Retry(method_whitelist=frozenset(["GET", "HEAD", "OPTIONS"]), **kwargs)
+
+    def session(self, url):
+        """
+        获取某个域名的Session，第一次请求该域名时创建
+        :param url: 请求的完整网址
+        :return: 返回一个requests.Session对象
+        """
+        parts = urlsplit(url)
+        host = parts.scheme + "://" + parts.netloc
+        session = self.__sessions.get(host)
+        if session is None:
+            with self.__lock:
+                session = self.__sessions.get(host)
+                if session is None:
+                    pool_size = getattr(config, "http_pool_size", 10)
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=self.__retry())
+                    session = requests.Session()
+                    session.mount(host, adapter)
+                    self.__sessions[host] = session
+        return session
+
+    def request(self, method, url, **kwargs):
+        """
+        发送HTTP请求，参数与requests.request()相同，未指定超时秒数时使用配置中的默认值
+        :return: 返回一个requests.Response对象
+        """
+        if isinstance(url, bytes):
+            url = url.decode("utf-8")
+        kwargs.setdefault("timeout", getattr(config, "http_timeout", 10))
+        key = coalesce_key(method, url, kwargs.get("params"), kwargs.get("headers"))
+        if key is None:
+            return self.__send(method, url, **kwargs)
+        with self.__lock:
+            call = self.__calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.__calls[key] = _Call()
+        if not leader:  # 相同的请求正在进行中，等待并共用它的响应
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.response
+        try:
+            call.response = self.__send(method, url, **kwargs)
+            return call.response
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self.__lock:
+                del self.__calls[key]
+            call.event.set()
+
+    def __send(self, method, url, **kwargs):
+        ratelimit.wait(url)
+        response = self.session(url).request(method, url, **kwargs)
+        ratelimit.feedback(url, response.status_code, response.headers)
+        response.__class__ = Response
+        return response
+
+    def get(self, url, params=None, **kwargs):
+        return self.request("GET", url, params=params, **kwargs)
+
+    def post(self, url, data=None, **kwargs):
+        return self.request("POST", url, data=data, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request("DELETE", url, **kwargs)
+
+    def close(self):
+        """关闭所有连接"""
+        with self.__lock:
+            for session in self.__sessions.values():
+                session.close()
+            self.__sessions = {}
+
+
+transport = __Transport()
+
+
+class AsyncResponse:
+    """异步请求的响应，属性与requests.Response中各交易所客户端用到的部分相同"""
+
+    def __init__(self, url, status_code, headers, content):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return codec.loads(self.content)
+
+
+class __AsyncTransport:
+    """异步HTTP连接池"""
+
+    def __init__(self):
+        self.__sessions = {}    # {(事件循环, 域名): aiohttp.ClientSession}
+        self.__calls = {}       # {(事件循环, 请求的键): asyncio.Task}，正在进行中的公共GET请求
+
+    def session(self, url):
+        """
+        获取当前事件循环中某个域名的ClientSession，第一次请求该域名时创建，每个事件循环使用各自的ClientSession
+        :param url: 请求的完整网址
+        :return: 返回一个aiohttp.ClientSession对象
+        """
+        loop = asyncio.get_running_loop()
+        parts = urlsplit(url)
+        key = (loop, parts.scheme + "://" + parts.netloc)
+        session = self.__sessions.get(key)
+        if session is None or session.closed:
+            self.__discard_closed_loops()
+            connector = aiohttp.TCPConnector(limit=getattr(config, "http_pool_size", 10))
+            session = self.__sessions[key] = aiohttp.ClientSession(connector=connector)
+        return session
+
+    def __discard_closed_loops(self):
+        """丢弃已关闭的事件循环中的ClientSession，其连接已无法在原来的事件循环中正常关闭，只与连接器分离后释放"""
+        for key in [key for key in self.__sessions if key[0].is_closed()]:
+            self.__sessions.pop(key).detach()
+
+    async def request(self, method, url, params=None, data=None, headers=None, timeout=None):
+        """
+        发送HTTP请求，未指定超时秒数时使用配置中的默认值
+        :return: 返回一个AsyncResponse对象
+        """
+        if aiohttp is None:
+            raise ImportError("异步接口需要安装aiohttp：pip install aiohttp")
+        if isinstance(url, bytes):
+            url = url.decode("utf-8")
+        if isinstance(params, str):     # 已经编码好的查询字符串
+            if params:
+                url = url + ("&" if "?" in url else "?") + params
+            params = None
+        if headers:     # requests接受bytes类型的请求头，aiohttp只接受字符串
+            headers = {key: value.decode("utf-8") if isinstance(value, bytes) else value for key, value in headers.items()}
+        key = coalesce_key(method, url, params, headers)
+        if key is None:
+            return await self.__send(method, url, params, data, headers, timeout)
+        key = (asyncio.get_running_loop(), key)
+        task = self.__calls.get(key)
+        if task is None:    # 请求在单独的任务中发送，发起请求的协程被取消时，其他等待同一响应的协程不受影响
+            task = self.__calls[key] = asyncio.ensure_future(self.__send(method, url, params, data, headers, timeout))
+            task.add_done_callback(lambda done: self.__done(key, done))
+        return await asyncio.shield(task)   # 相同的请求正在进行中时，等待并共用它的响应
+
+    def __done(self, key, task):
+        """合并的请求结束后移除，之后相同的请求重新发送"""
+        if self.__calls.get(key) is task:
+            del self.__calls[key]
+        if not task.cancelled():
+            task.exception()    # 没有协程等待时不提示异常未被获取
+
+    async def __send(self, method, url, params, data, headers, timeout):
+        timeout = aiohttp.ClientTimeout(total=timeout or getattr(config, "http_timeout", 10))
+        retries = getattr(config, "http_retries", 3)
+        idempotent = method.upper() in ("GET", "HEAD", "OPTIONS")
+        for attempt in range(retries + 1):
+            seconds = ratelimit.acquire(url)
+            if seconds > 0:
+                await asyncio.sleep(seconds)
+            try:
+                async with self.session(url).request(method, url, params=params, data=data, headers=headers,
+                                                     timeout=timeout) as response:
+                    content = await response.read()
+                    ratelimit.feedback(url, response.status, response.headers)
+                    if idempotent and response.status in (502, 503, 504) and attempt < retries:
+                        await asyncio.sleep(0.3 * 2 ** attempt)
+                        continue
+                    return AsyncResponse(str(response.url), response.status, response.headers, content)
+            except aiohttp.ClientConnectorError:    # 连接尚未建立，请求没有发出，可以安全重试
+                if attempt >= retries:
+                    raise
+                await asyncio.sleep(0.3 * 2 ** attempt)
+
+    async def get(self, url, params=None, **kwargs):
+        return await self.request("GET", url, params=params, **kwargs)
+
+    async def post(self, url, data=None, **kwargs):
+        return await self.request("POST", url, data=data, **kwargs)
+
+    async def delete(self, url, **kwargs):
+        return await self.request("DELETE", url, **kwargs)
+
+    async def close(self):
+        """关闭当前事件循环中的所有连接"""
+        loop = asyncio.get_running_loop()
+        for key in [key for key in self.__sessions if key[0] is loop]:  # 其他事件循环中的ClientSession由各自的事件循环关闭
+            await self.__sessions.pop(key).close()
+        self.__discard_closed_loops()
+
+
+async_transport = __AsyncTransport()